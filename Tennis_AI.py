@@ -1,12 +1,16 @@
-import os
-import torch
-os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+from app.resources import ResourcePlan, configure_environment, apply_limits
+
+# torch 가 import 되기 전에 스레드 예산을 정해야 OpenMP/MKL 풀이 그 크기로 만들어짐
+RESOURCE_PLAN = ResourcePlan("interactive")
+configure_environment(RESOURCE_PLAN)
+import torch # noqa: E402, F401
 
 import sys
 from PyQt6.QtWidgets import QApplication
 from gui.main_window import MainWindow
 
 def main():
+    apply_limits(RESOURCE_PLAN)
     app = QApplication(sys.argv)
     app.setStyle("Fusion") 
     
@@ -1,14 +0,0 @@
-# pendulum_main.py
-
-import sys
-from PyQt6.QtWidgets import QApplication
-from gui.main_window import MainWindow
-
-def main():
-    app = QApplication(sys.argv)
-    win = MainWindow()
-    win.show()
-    sys.exit(app.exec())
-
-if __name__ == "__main__":
-    main()
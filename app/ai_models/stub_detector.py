@@ -0,0 +1,45 @@
+import time
+import cv2
+import numpy as np
+
+
+class StubBallDetector:
+    """
+    YOLO 가중치 없이 동작하는 대체 공 검출기.
+
+    노란 공(채도 높은 노랑)을 색상 임계값으로 찾아 YOLO와 같은 형식의 박스를 돌려준다.
+    합성 테스트 영상(benchmarks/synthetic_clip.py)에서는 정확하게 동작하고, 실제 영상에서는
+    정확도가 아니라 파이프라인 처리량을 재기 위한 용도다. `latency_ms`로 모델 추론 시간을 흉내낼 수 있다.
+    """
+    SPORTS_BALL_CLASS = 32
+
+    def __init__(self, latency_ms: float = 0.0, min_area: int = 4, max_area: int = 2500):
+        self.latency_ms = latency_ms
+        self.min_area = min_area
+        self.max_area = max_area
+        # BGR 기준 노랑: B 낮음, G/R 높음 (흰 코트 라인은 B가 높아서 제외됨)
+        self.lower = np.array([0, 160, 160], dtype=np.uint8)
+        self.upper = np.array([110, 255, 255], dtype=np.uint8)
+
+    def detect(self, frame: np.ndarray, conf: float = 0.25) -> np.ndarray:
+        """(N, 6) 배열 반환: x1, y1, x2, y2, conf, cls (면적이 큰 순)"""
+        start = time.perf_counter()
+
+        mask = cv2.inRange(frame, self.lower, self.upper)
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+        boxes = []
+        for i in range(1, n):
+            x, y, w, h, area = stats[i]
+            if self.min_area <= area <= self.max_area:
+                boxes.append((x, y, x + w, y + h, 0.9, self.SPORTS_BALL_CLASS, area))
+        boxes.sort(key=lambda b: b[6], reverse=True)
+
+        if self.latency_ms > 0:
+            remaining = self.latency_ms / 1000.0 - (time.perf_counter() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+        if not boxes or 0.9 < conf:
+            return np.zeros((0, 6), dtype=np.float32)
+        return np.array([b[:6] for b in boxes], dtype=np.float32)
@@ -1,38 +1,146 @@
-import torch
-from ultralytics import YOLO
+import os
+import sys
+import time
 import numpy as np
 import cv2
 from collections import deque
 from typing import List, Tuple, Dict, Any
 from itertools import combinations
+from .profiling import PROFILER
+from .quality import model_variant, variant_model_path
+from .ball_tracker import SingleBallTracker
+from .frame_timing import DuplicateFrameDetector
+
+# 렌더링 모드: 분석 핫패스는 기본적으로 구조화된 결과만 만든다
+RENDER_NONE = 'none'  # annotated_frame을 만들지 않음 (None 반환)
+RENDER_INTO = 'into'  # 호출자가 준 버퍼(out)에 그림 (out 필수 — 입력 프레임은 건드리지 않음)
+RENDER_COPY = 'copy'  # 입력 프레임의 복사본에 그림
+
+DEFAULT_IMGSZ = 640 # ultralytics 기본 모델 입력 크기 (settings['imgsz'] 가 없을 때)
 
 class TennisAnalyzerCore:
-    def __init__(self, settings: Dict[str, Any]):
+    def __init__(self, settings: Dict[str, Any], load_model: bool = True):
         self.settings = settings
         self.model = None
         self.device = 'cpu'
         
         # 30프레임 동안의 공 위치를 저장하는 버퍼 (deque 사용)
         self.trajectory_buffer = deque(maxlen=30) 
+        # 여러 검출 중 "그 공"을 고르는 단일 공 트래커 (ByteTrack 대신)
+        self.ball_tracker = SingleBallTracker()
         # 최종 바운스 지점 히스토리 (SwingVision처럼 누적됨)
         # 형식: List[Tuple[float, float, str]] -> (x_ratio, y_ratio, result_color)
         self.bounce_history: List[Tuple[float, float, str]] = [] 
+        self._bounce_snapshot = None # (history, 마지막 항목, 전체 개수, tuple) — bounce_snapshot() 캐시
         
         # 1. GPU/CPU 디바이스 초기화 및 모델 로드
+        # detector='stub': 가중치 없이 색상으로 공을 찾는 대체 검출기 (벤치마크/합성 영상용)
+        self.detector = settings.get('detector', 'yolo')
+        self.model_path = settings.get('model_path', 'yolov8m.pt')
+        self._models = {} # model_path -> 로드된 모델 (품질 조절로 n/s/m 을 오갈 때 재사용)
+        # load_model=False: 검출은 다른 프로세스가 하고 update_position()만 쓰는 경우
+        if load_model:
+            self._load_model()
+
+        # 동작점 (app.quality.QualityController 가 조절): 모델 입력 크기, 공 주변 ROI 검출
+        self.imgsz = settings.get('imgsz') # None 이면 모델 기본값
+        self.roi_mode = False
+        self.roi_size = settings.get('roi_size', 640) # ROI 한 변 길이 (px)
+        self.roi_window = None # 마지막 검출에 쓴 ROI (x0, y0, x1, y1), 전체 프레임이면 None
+
+        self.court_type = settings.get('court_type', 'Singles')
+        self.H_matrix = None # Perspective transformation matrix
+        self.court_lines_detected = False # Flag to indicate if court lines have been detected and H_matrix is set
+        self.court_corners = None # Auto-detected corners (image coords), drawn only by the renderer
+
+        # 렌더러가 붙어 있을 때만 annotated_frame을 만든다 (attach_renderer 참고)
+        self.renderer = None
+        self.render_mode = RENDER_NONE
+
+        # 단계별 타이머 (stats['timings'] 및 Chrome trace 내보내기)
+        self.profiler = PROFILER
+
+        # 마지막으로 분석한 프레임 번호 (seek 등으로 연속성이 깨졌는지 판단)
+        self.last_frame_idx = None
+        # 이 간격까지는 연속으로 취급 (stride 로 k 프레임마다 분석할 때 k)
+        self.max_frame_gap = 1
+        # 직전에 반영한 프레임의 표시 시각 (초). 있으면 속도는 1/fps 대신 실제 시각 차이로 계산 (VFR 영상)
+        self.last_timestamp = None
+
+        # 중복 프레임(같은 장면이 반복 저장된 프레임)은 추론하지 않고 직전 결과를 그대로 돌려줌
+        self.duplicates = DuplicateFrameDetector() if settings.get('skip_duplicates', True) else None
+        self.frames_duplicate = 0
+        self._last_result = None # (ball_pos_ratio, stats) — 중복 프레임에 돌려줄 직전 결과
+        self._carry_elapsed = 0 # 건너뛴 중복 프레임 수 (다음 실제 프레임의 간격에 더함)
+
+    def _load_model(self):
+        if self.detector == 'stub':
+            from .ai_models.stub_detector import StubBallDetector
+            self.device = 'cpu'
+            self.model = StubBallDetector(latency_ms=self.settings.get('stub_latency_ms', 0.0))
+            return
+
+        if self.model_path in self._models:
+            self.model = self._models[self.model_path]
+            return
+
+        # torch/ultralytics는 실제 모델을 쓸 때만 import
+        import torch
+        from ultralytics import YOLO
         try:
             self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-            self.model = YOLO('yolov8m.pt')
+            self.model = YOLO(self.model_path)
             self.model.to(self.device)
         except Exception as e:
             print(f"CORE ERROR: GPU initialization failed ({e}). Forcing CPU.")
             self.device = 'cpu'
-            self.model = YOLO('yolov8m.pt')  # Consistent with the chosen model
+            self.model = YOLO(self.model_path)  # Consistent with the chosen model
             self.model.to(self.device)
+        self._models[self.model_path] = self.model
+
+    def set_operating_point(self, model: str | None = None, imgsz: int | None = None,
+                            roi: bool | None = None, stride: int | None = None):
+        """
+        품질/속도 동작점을 바꿉니다 (app.quality.QUALITY_LADDER 항목을 그대로 넘길 수 있음).
+        `model`: YOLO 크기 변형 'n'/'s'/'m' — 같은 계열의 가중치로 바꿔 로드 (stub 검출기는 무시)
+        `imgsz`: 모델 입력 크기, `roi`: 마지막 공 위치 주변만 검출, `stride`: 분석 프레임 간격
+        """
+        if model is not None and self.detector != 'stub' and model_variant(self.model_path) not in (None, model):
+            self._switch_model(variant_model_path(self.model_path, model))
+        if imgsz is not None:
+            self.imgsz = imgsz
+        if roi is not None:
+            self.roi_mode = roi
+        if stride is not None:
+            self.max_frame_gap = max(1, stride)
+
+    def _switch_model(self, model_path: str):
+        """새 가중치를 로드하고, 성공했을 때만 model_path를 바꿈 (실패하면 이전 모델을 유지하고 예외 전달)"""
+        if self.model is None: # 모델 없이 만든 분석기(load_model=False)는 경로만 기록
+            self.model_path = model_path
+            return
+        if not os.path.exists(model_path):
+            # 없는 가중치는 YOLO() 가 내려받으므로 재생/분석 도중에는 바꾸지 않음 (app.quality.available_ladder)
+            raise FileNotFoundError(f"Model weights not found on disk: {model_path}")
+        previous = (self.model_path, self.model, self.device)
+        print(f"Switching model to {model_path}")
+        self.model_path = model_path
+        try:
+            self._load_model()
+        except Exception:
+            self.model_path, self.model, self.device = previous
+            raise
+
+    def attach_renderer(self, renderer, mode: str = RENDER_COPY):
+        """
+        analyze_frame()이 결과를 그려서 돌려주도록 렌더러(app.renderer.OverlayRenderer)를 붙입니다.
+        mode=RENDER_NONE 또는 renderer=None 이면 렌더링을 끕니다.
+        """
+        if mode not in (RENDER_NONE, RENDER_INTO, RENDER_COPY):
+            raise ValueError(f"Unknown render mode: {mode}")
+        self.renderer = renderer
+        self.render_mode = mode if renderer is not None else RENDER_NONE
 
-        self.court_type = settings.get('court_type', 'Singles')
-        self.H_matrix = None # Perspective transformation matrix
-        self.court_lines_detected = False # Flag to indicate if court lines have been detected and H_matrix is set
-        
     def _detect_court_lines(self, frame):
         """
         Detects court lines automatically using a more robust method.
@@ -77,8 +185,11 @@ class TennisAnalyzerCore:
                 A = np.array([[np.cos(theta1), np.sin(theta1)], [np.cos(theta2), np.sin(theta2)]])
                 b = np.array([[rho1], [rho2]])
                 try:
-                    intersection = np.linalg.solve(A, b)
-                    intersections.append(intersection.flatten())
+                    intersection = np.linalg.solve(A, b).flatten()
+                    # Nearly parallel lines "intersect" far outside the image; they would
+                    # blow up the hull (and approxPolyDP's epsilon), so ignore them.
+                    if np.all(np.abs(intersection) < 4 * max(frame.shape[:2])):
+                        intersections.append(intersection)
                 except np.linalg.LinAlgError:
                     continue
 
@@ -137,6 +248,16 @@ class TennisAnalyzerCore:
         court_y = transformed_point[0][0][1] / 2000
         
         return (court_x, court_y)
+
+    def _transform_court_to_point(self, point_court: Tuple[float, float], frame_width: int, frame_height: int) -> Tuple[float, float] | None:
+        """_transform_point_to_court의 역변환: 정규화된 코트 좌표 -> 이미지 비율"""
+        if self.H_matrix is None:
+            return None
+
+        point_3d = np.array([[[point_court[0] * 1000, point_court[1] * 2000]]], dtype=np.float32)
+        image_point = cv2.perspectiveTransform(point_3d, np.linalg.inv(self.H_matrix))
+
+        return (float(image_point[0][0][0]) / frame_width, float(image_point[0][0][1]) / frame_height)
         
     def _calculate_ball_speed(self, current_pos_court: Tuple[float, float], prev_pos_court: Tuple[float, float], fps: float) -> float:
         distance = np.sqrt((current_pos_court[0] - prev_pos_court[0])**2 + 
@@ -150,53 +271,314 @@ class TennisAnalyzerCore:
             return "N/A"
         return "Flat"
 
-    def analyze_frame(self, frame, conf=0.25):
+    def reset(self, settings: Dict[str, Any] | None = None):
+        """
+        로드된 모델은 유지한 채 다른 영상을 분석할 수 있도록 영상별 상태를 모두 초기화합니다.
+        """
+        if settings is not None:
+            self.settings = settings
+            self.court_type = settings.get('court_type', 'Singles')
+            self.duplicates = DuplicateFrameDetector() if settings.get('skip_duplicates', True) else None
+        self.H_matrix = None
+        self.court_lines_detected = False
+        self.court_corners = None
+        self.bounce_history = []
+        self.last_frame_idx = None
+        self.frames_duplicate = 0
+        self.reset_tracking()
+
+    def release(self):
+        """
+        모델/트래커와 영상별 상태를 모두 놓아줍니다 (분석을 끝낸 워커 정리용).
+        이후에는 analyze_frame()이 빈 결과를 돌려줍니다.
+        """
+        self.reset()
+        self.model = None
+        self._models.clear()
+        # torch 를 이미 쓰고 있었을 때만 GPU 캐시 반환 (stub 검출기에서는 import 하지 않음)
+        torch = sys.modules.get('torch')
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def reset_tracking(self):
+        """궤적/바운스 판단 상태와 트래커를 초기화합니다 (seek 등 불연속 구간 이후)."""
+        self.trajectory_buffer.clear()
+        self.prev_ball_y_court = None
+        self.is_falling = False
+        self.latest_ball_speed = 0.0
+        self.latest_ball_trajectory_type = "N/A"
+        self.ball_tracker.reset()
+        self.last_timestamp = None
+        self._last_result = None
+        self._carry_elapsed = 0
+        if self.duplicates is not None:
+            self.duplicates.reset()
+
+    def resync(self, frame_idx: int, previous_records: List[Dict[str, Any]] | None = None):
+        """
+        frame_idx 직전까지의 저장된 결과(ResultsCache 레코드, 오래된 순)로 궤적 상태를 다시 채웁니다.
+        레코드가 없으면 초기화만 합니다. 다음 analyze_frame(frame_idx=frame_idx)은 연속 프레임으로 처리됩니다.
+        """
+        self.reset_tracking()
+        for record in (previous_records or [])[-self.trajectory_buffer.maxlen:]:
+            court = record.get("ball_pos_court")
+            ratio = record.get("ball_pos_ratio")
+            if court is None:
+                self.trajectory_buffer.append((None, None))
+                self.prev_ball_y_court = None
+                continue
+            self.trajectory_buffer.append((tuple(ratio), tuple(court)))
+            self.prev_ball_y_court = court[1]
+        self.last_frame_idx = frame_idx - 1
+
+    def bounce_snapshot(self) -> Tuple[tuple, int]:
+        """
+        다른 스레드(GUI)로 넘길 바운스 히스토리의 불변 스냅샷: (최근 항목 tuple, 지금까지의 전체 개수).
+        BounceHistory면 메모리에 남은 최근 항목만 들어감. 바운스가 늘었을 때만 tuple을 새로 만듦.
+        """
+        history = self.bounce_history
+        count = len(history)
+        last = history[-1] if count else None
+        cached = self._bounce_snapshot
+        if cached is None or cached[0] is not history or cached[1] != last or cached[2] != count:
+            cached = (history, last, count, tuple(history))
+            self._bounce_snapshot = cached
+        return cached[3], count
+
+    def is_continuous(self, frame_idx: int) -> bool:
+        """frame_idx 가 직전 분석 프레임에서 이어지는지 (max_frame_gap 이내의 다음 프레임)"""
+        return self.last_frame_idx is not None and 0 < frame_idx - self.last_frame_idx <= self.max_frame_gap
+
+    def analyze_frame(self, frame, conf=0.25, out=None, frame_idx: int | None = None,
+                      continuous: bool | None = None, model_input=None, timestamp: float | None = None):
+        """
+        입력 프레임은 읽기만 하고 수정하지 않습니다 (다른 소비자와 공유될 수 있음).
+        annotated_frame은 렌더러가 붙어 있을 때만 만들어지고, 그렇지 않으면 None입니다.
+        `out`: RENDER_INTO 모드에서 그려 넣을 버퍼 (frame과 같은 shape/dtype)
+        `frame_idx`: 영상 내 프레임 번호. 직전 분석 프레임에서 이어지지 않으면(seek)
+                     궤적/트래커 상태를 초기화해서 가짜 속도·바운스가 생기지 않게 합니다.
+        `continuous`: 호출자가 seek 여부를 알 때 (예: 큐에서 프레임이 버려져 간격이 벌어졌지만 seek은 아님).
+                      None이면 max_frame_gap 으로 판단합니다.
+        `model_input`: 디코드 단계에서 미리 만든 app.preprocess.ModelInput (있으면 추론 전처리를 건너뜀)
+        `timestamp`: 프레임 표시 시각 (초, app.frame_timing.frame_timestamp). 가변 프레임레이트 영상의 속도 계산용
+        직전 프레임의 중복이면 추론 없이 직전 결과를 돌려줍니다 (stats["duplicate"] = True).
+        """
         if self.model is None:
-            return frame, None, {}
+            return None, None, {}
+
+        if self._is_duplicate(frame, frame_idx, continuous):
+            # 시간만 흐른 것으로 처리: 다음 실제 프레임의 간격/시각 차이에 포함됨
+            self._carry_elapsed += self._advance_to(frame_idx, continuous)
+            self.frames_duplicate += 1
+            ball_pos_ratio, stats = self._last_result
+            stats = dict(stats, frame_idx=frame_idx, duplicate=True)
+            annotated_frame = None
+            if self.render_mode != RENDER_NONE:
+                with self.profiler.stage("render"):
+                    annotated_frame = self._render(frame, out, ball_pos_ratio, stats["ball_speed"])
+            return annotated_frame, ball_pos_ratio, stats
+
+        frames_elapsed = self._advance_to(frame_idx, continuous) + self._carry_elapsed
+        self._carry_elapsed = 0
+
+        # 0~2. 코트 검출(필요하면), AI 추론, 공 좌표 계산
+        ball_pos_ratio, ball_pos_court = self.detect_position(frame, conf, frame_idx, model_input)
 
+        with self.profiler.stage("post_process"):
+            # 3. 공 위치를 핵심 로직으로 전달하여 처리 (궤적 버퍼 업데이트 및 바운스 감지)
+            stats = self.update_position(ball_pos_ratio, ball_pos_court, frame_idx, frames_elapsed, timestamp)
+        self._last_result = (ball_pos_ratio, stats)
+
+        annotated_frame = None
+        if self.render_mode != RENDER_NONE:
+            with self.profiler.stage("render"):
+                annotated_frame = self._render(frame, out, ball_pos_ratio, stats["ball_speed"])
+
+        # 4. 반환값: 현재 프레임, 현재 공 위치 (이미지 비율), 누적 히스토리 데이터, 추가 통계
+        return annotated_frame, ball_pos_ratio, stats
+
+    def _is_duplicate(self, frame, frame_idx: int | None, continuous: bool | None) -> bool:
+        """직전 분석 프레임에서 이어지는 프레임이고 내용이 같으면 True (seek 직후에는 비교하지 않음)"""
+        if self.duplicates is None:
+            return False
+        follows = self._last_result is not None and (
+            frame_idx is None or (self.last_frame_idx is not None and frame_idx > self.last_frame_idx
+                                  and (continuous if continuous is not None else self.is_continuous(frame_idx))))
+        return self.duplicates.check(frame, compare=follows)
+
+    def detect_position(self, frame, conf=0.25, frame_idx: int | None = None, model_input=None):
+        """
+        프레임 하나에서 공 위치 (이미지 비율, 코트 좌표)를 찾습니다. 궤적/바운스 상태는 (트래커가 공을
+        새로 잡아서 궤적을 끊을 때 말고는) 바꾸지 않으므로 update_position()은 따로 호출합니다.
+        (app.inference_pool 워커는 _detect_ball() 만 하고 공 고르기는 부모가 프레임 순서대로 _locate_ball() 로 함)
+        `frame_idx`: 공 트래커가 예측 위치를 계산할 때 쓰는 프레임 번호 (없으면 직전 호출의 다음 프레임)
+        """
         # 0. Detect court lines and calculate perspective transform if not already done
         if not self.court_lines_detected:
-            corners = self._detect_court_lines(frame)
-            if corners and len(corners) == 4:
-                self.H_matrix = self._calculate_perspective_transform(frame, corners)
-                if self.H_matrix is not None:
-                    self.court_lines_detected = True
-                    print("Court automatically detected.")
-                    # Draw corners for debugging
-                    for x, y in corners:
-                        cv2.circle(frame, (int(x), int(y)), 10, (0,0,255), -1)
-                else:
-                    print("Failed to calculate H_matrix from auto-detected corners.")
+            with self.profiler.stage("court_detect"):
+                self._update_court(frame)
+
+        # 1. AI 추론 (스포츠 공만 대상으로 지정)
+        detections = self._detect_ball(frame, conf, model_input)
+
+        # 2. 공 고르기 및 좌표 계산
+        return self._locate_ball(detections, frame.shape, frame_idx)
+
+    def _advance_to(self, frame_idx: int | None, continuous: bool | None = None) -> int:
+        """
+        frame_idx 로 넘어가면서 직전 분석 프레임과의 간격(프레임 수)을 돌려줍니다.
+        이어지지 않으면(seek) 궤적/트래커 상태를 초기화하고 1을 돌려줍니다.
+        """
+        frames_elapsed = 1
+        if frame_idx is not None:
+            if continuous is None:
+                continuous = self.is_continuous(frame_idx)
+            elif continuous and (self.last_frame_idx is None or frame_idx <= self.last_frame_idx):
+                continuous = False # 뒤로 가거나 처음인 프레임은 간격을 계산할 수 없음
+            if continuous:
+                frames_elapsed = frame_idx - self.last_frame_idx
+            elif self.last_frame_idx is not None:
+                self.reset_tracking()
+            self.last_frame_idx = frame_idx
+        return frames_elapsed
+
+    def update_position(self, ball_pos_ratio, ball_pos_court, frame_idx: int | None = None,
+                        frames_elapsed: int = 1, timestamp: float | None = None) -> Dict[str, Any]:
+        """
+        검출(또는 보간)된 공 위치 하나를 궤적/바운스 로직에 반영하고 stats를 돌려줍니다.
+        `frames_elapsed`: 직전 위치와의 프레임 간격 (속도 계산용)
+        `timestamp`: 프레임 표시 시각 (초). 직전 시각이 있으면 frames_elapsed 대신 실제 시간 차이를 씀
+        """
+        # Pass both image ratio and court-transformed position
+        # Need FPS for speed calculation, so passing it along
+        fps = self.settings.get('fps', 30) # Get FPS from settings, default to 30
+        fps /= frames_elapsed # stride 로 건너뛴 프레임만큼 시간 간격이 길어짐
+        if timestamp is not None and self.last_timestamp is not None and timestamp > self.last_timestamp:
+            fps = 1.0 / (timestamp - self.last_timestamp) # VFR: 실제 프레임 간격
+        self.last_timestamp = timestamp
+        self._process_ball_position(ball_pos_ratio, ball_pos_court, fps)
+
+        # Retrieve analysis results to return
+        ball_speed = self.latest_ball_speed if hasattr(self, 'latest_ball_speed') else 0.0
+        ball_trajectory_type = self.latest_ball_trajectory_type if hasattr(self, 'latest_ball_trajectory_type') else "N/A"
+
+        bounce_history, bounce_count = self.bounce_snapshot()
+        return {
+            "bounce_history": bounce_history, # 불변 tuple (분석 스레드가 계속 추가하므로 원본은 넘기지 않음)
+            "bounce_count": bounce_count,
+            "ball_pos_ratio": ball_pos_ratio,
+            "ball_pos_court": ball_pos_court,
+            "ball_speed": ball_speed,
+            "ball_trajectory_type": ball_trajectory_type,
+            "frame_idx": frame_idx,
+            "timestamp": timestamp,
+            "timings": self.profiler.summary()
+        }
+
+    def _update_court(self, frame):
+        corners = self._detect_court_lines(frame)
+        if corners and len(corners) == 4:
+            self.H_matrix = self._calculate_perspective_transform(frame, corners)
+            if self.H_matrix is not None:
+                self.court_lines_detected = True
+                self.court_corners = corners # Drawn by the renderer (if attached) for debugging
+                print("Court automatically detected.")
             else:
-                print("Automatic court detection failed for this frame.")
+                print("Failed to calculate H_matrix from auto-detected corners.")
+        else:
+            print("Automatic court detection failed for this frame.")
 
-        # 1. AI 추론 및 추적 (스포츠 공만 대상으로 지정)
-        results = self.model.track(
-            frame, 
+    def _accepts_model_input(self, model_input, window) -> bool:
+        """미리 만든 모델 입력을 그대로 쓸 수 있는지 (ROI 검출이나 다른 입력 크기면 직접 전처리)"""
+        if model_input is None or window is not None or self.detector == 'stub':
+            return False
+        return max(model_input.tensor.shape[-2:]) == (self.imgsz or DEFAULT_IMGSZ)
+
+    def _detect_ball(self, frame, conf, model_input=None) -> np.ndarray:
+        """
+        공 검출 결과를 (N, 6) numpy 배열로 반환합니다: x1, y1, x2, y2, conf, cls
+        """
+        window = self._roi_for(frame.shape)
+        self.roi_window = window
+        if window is not None:
+            x0, y0, x1, y1 = window
+            frame = frame[y0:y1, x0:x1]
+
+        if self.detector == 'stub':
+            with self.profiler.stage("inference"):
+                return self._offset_detections(self.model.detect(frame, conf), window)
+
+        kwargs = {'imgsz': self.imgsz} if self.imgsz else {}
+        source = frame
+        if self._accepts_model_input(model_input, window):
+            # 이미 letterbox/정규화된 (1, 3, H, W) 텐서: ultralytics 는 텐서 입력이면 전처리를 건너뜀
+            import torch
+            source, kwargs = torch.from_numpy(model_input.tensor), {}
+        else:
+            model_input = None
+        start = time.perf_counter_ns()
+        # 연관은 SingleBallTracker 가 하므로 트래커 없이 검출만 (track()/ByteTrack 설정 로드 없음)
+        results = self.model.predict(
+            source, 
             conf=conf, 
             verbose=False,
-            persist=True, 
-            tracker='bytetrack.yaml',
-            classes=[32]  # 32번 클래스('sports ball')만 추적
+            classes=[32],  # 32번 클래스('sports ball')만 검출
+            **kwargs
         )
-        
-        annotated_frame = frame.copy()
-        
-        # 2. 공 좌표 찾기 및 계산
-        frame_height, frame_width = frame.shape[:2]
+        end = time.perf_counter_ns()
+
+        # ultralytics가 측정한 preprocess 시간을 쓰고, 나머지(모델 + NMS)는 inference로 기록
+        speed = results[0].speed or {}
+        pre_ms = speed.get('preprocess') or 0.0
+        self.profiler.record_ms("preprocess", pre_ms, end_ns=start + int(pre_ms * 1e6))
+        self.profiler.record_ms("inference", max(0.0, (end - start) / 1e6 - pre_ms), end_ns=end)
+        detections = results[0].boxes.data.cpu().numpy()
+        if model_input is not None:
+            return model_input.to_frame_coords(detections) # 텐서 좌표 -> 원본 프레임 좌표
+        return self._offset_detections(detections, window)
+
+    def _roi_for(self, frame_shape) -> Tuple[int, int, int, int] | None:
+        """ROI 모드에서 직전 프레임 공 위치를 중심으로 한 검출 영역. 공을 놓쳤으면 전체 프레임(None)."""
+        if not self.roi_mode or not self.trajectory_buffer or self.trajectory_buffer[-1][0] is None:
+            return None
+        frame_height, frame_width = frame_shape[:2]
+        size = self.roi_size
+        if size >= frame_width and size >= frame_height:
+            return None
+        ratio_x, ratio_y = self.trajectory_buffer[-1][0]
+        x0 = int(min(max(ratio_x * frame_width - size / 2, 0), max(frame_width - size, 0)))
+        y0 = int(min(max(ratio_y * frame_height - size / 2, 0), max(frame_height - size, 0)))
+        return x0, y0, min(x0 + size, frame_width), min(y0 + size, frame_height)
+
+    @staticmethod
+    def _offset_detections(detections: np.ndarray, window) -> np.ndarray:
+        """ROI 좌표계의 박스를 전체 프레임 좌표로 되돌림"""
+        if window is None or len(detections) == 0:
+            return detections
+        detections = detections.copy()
+        detections[:, [0, 2]] += window[0]
+        detections[:, [1, 3]] += window[1]
+        return detections
+
+    def _locate_ball(self, detections: np.ndarray, frame_shape, frame_idx: int | None = None):
+        """검출 결과에서 공을 하나 골라 이미지 비율/코트 좌표로 계산합니다."""
+        frame_height, frame_width = frame_shape[:2]
         ball_pos_ratio = None
         ball_pos_court = None # New variable for court-transformed ball position
-        
-        if results[0].boxes.data.numel() > 0:
-            # 공이 하나만 있다고 가정하고 첫 번째 공을 사용
-            box_data = results[0].boxes.data[0]
-            x1, y1, x2, y2 = box_data[0:4].tolist()
-            
+
+        with self.profiler.stage("tracking"):
+            ball = self.ball_tracker.update(detections, frame_shape, frame_idx)
+        if ball is not None and self.ball_tracker.reacquired:
+            # 새로 잡은 공은 직전 궤적과 다른 물체일 수 있음: 두 물체 사이로 속도/바운스를 계산하지 않도록 끊음
+            self.trajectory_buffer.clear()
+            self.prev_ball_y_court = None
+            self.is_falling = False
+
+        if ball is not None:
+            x1, y1, x2, y2 = ball[0:4].tolist()
+
             center_x = int((x1 + x2) / 2)
             center_y = int((y1 + y2) / 2)
-            
-            # 프레임에 원 그리기
-            cv2.circle(annotated_frame, (center_x, center_y), 5, (0, 255, 0), -1)
 
             ratio_x = center_x / frame_width
             ratio_y = center_y / frame_height
@@ -204,28 +586,20 @@ class TennisAnalyzerCore:
 
             # Transform ball position to court coordinates
             ball_pos_court = self._transform_point_to_court(ball_pos_ratio, frame_width, frame_height)
-            if ball_pos_court:
-                # For debugging: print transformed court coordinates
-                # print(f"Ball court position: {ball_pos_court[0]:.2f}, {ball_pos_court[1]:.2f}")
-                pass
-        
-        # 3. 공 위치를 핵심 로직으로 전달하여 처리 (궤적 버퍼 업데이트 및 바운스 감지)
-        # Pass both image ratio and court-transformed position
-        # Need FPS for speed calculation, so passing it along
-        fps = self.settings.get('fps', 30) # Get FPS from settings, default to 30
-        self._process_ball_position(ball_pos_ratio, ball_pos_court, fps)
 
-        # Retrieve analysis results to return
-        ball_speed = self.latest_ball_speed if hasattr(self, 'latest_ball_speed') else 0.0
-        ball_trajectory_type = self.latest_ball_trajectory_type if hasattr(self, 'latest_ball_trajectory_type') else "N/A"
+        return ball_pos_ratio, ball_pos_court
 
-        # 4. 반환값: 현재 프레임, 현재 공 위치 (이미지 비율), 누적 히스토리 데이터, 추가 통계
-        return annotated_frame, ball_pos_ratio, {
-            "bounce_history": self.bounce_history, 
-            "ball_pos_court": ball_pos_court,
-            "ball_speed": ball_speed,
-            "ball_trajectory_type": ball_trajectory_type
-        }
+    def _render(self, frame, out, ball_pos_ratio, ball_speed):
+        if self.render_mode == RENDER_NONE:
+            return None
+        if self.render_mode == RENDER_INTO:
+            if out is None:
+                raise ValueError("RENDER_INTO mode requires an `out` buffer")
+            target = out
+        else:
+            target = None # renderer makes the copy
+        return self.renderer.render(frame, ball_pos_ratio, self.bounce_history, ball_speed,
+                                    out=target, court_corners=self.court_corners)
 
     def _process_ball_position(self, pos_image_ratio: Tuple[float, float] | None, pos_court: Tuple[float, float] | None, fps: float):
         """
@@ -236,6 +610,8 @@ class TennisAnalyzerCore:
         """
         # For bounce detection
         BOUNCE_THRESHOLD_Y = 0.01 # A small threshold for vertical movement to register a change
+        # 기준 프레임 간격(1/fps)보다 길게 지났으면 그만큼 이동량도 커지므로 임계값도 같은 비율로
+        BOUNCE_THRESHOLD_Y *= max(1.0, self.settings.get('fps', 30) / fps)
         # Initialize these if they don't exist
         if not hasattr(self, 'prev_ball_y_court'):
             self.prev_ball_y_court = None
@@ -0,0 +1,125 @@
+import numpy as np
+from typing import Dict, Tuple
+
+
+class SingleBallTracker:
+    """
+    검출 결과 중에서 "그 공" 하나를 고르는 가벼운 연관(association) 단계.
+
+    ByteTrack 같은 다중 객체 트래커 대신, 공이 하나라는 가정을 그대로 이용합니다.
+    - 예측: 직전 위치 + 속도 x 경과 프레임 수
+    - 게이팅: 예측 위치에서 gate 반경(속도와 놓친 프레임 수에 따라 커짐) 밖의 후보는 제외
+    - 선택: 신뢰도(conf)와 예측 위치와의 거리(움직임 일관성)를 합친 점수가 가장 높은 후보
+    - 정지 오검출 제거: 같은 자리(격자 칸)에 static_frames 프레임 넘게 연속으로 나온 후보는
+      코트에 놓인 공/로고 등으로 보고 버림
+    좌표는 프레임 크기에 대한 비율(0~1)로 다뤄서 해상도와 ROI에 상관없이 같은 설정을 씁니다.
+    update() 가 이어지는 트랙 없이 새로 고른 후보면 reacquired 가 True (직전 공과 다른 물체일 수 있으므로
+    속도/바운스 계산은 그 프레임부터 다시 시작해야 함).
+    """
+
+    def __init__(self, min_gate: float = 0.06, max_gate: float = 0.35, velocity_gate: float = 1.5,
+                 missing_gate: float = 0.03, max_missing: int = 10, motion_weight: float = 0.5,
+                 velocity_smoothing: float = 0.6, static_frames: int = 8, static_cell: float = 0.01):
+        self.min_gate = min_gate
+        self.max_gate = max_gate
+        self.velocity_gate = velocity_gate # 속도(비율/프레임)에 곱해서 gate 에 더함
+        self.missing_gate = missing_gate # 놓친 프레임마다 gate 에 더함
+        self.max_missing = max_missing # 이만큼 놓치면 트랙을 버리고 가장 확실한 후보로 다시 잡음
+        self.motion_weight = motion_weight
+        self.velocity_smoothing = velocity_smoothing
+        self.static_frames = static_frames
+        self.static_cell = static_cell
+        self.reset()
+
+    def reset(self):
+        self.position = None # np.array([x, y]) 비율 좌표
+        self.velocity = np.zeros(2)
+        self.missing = 0
+        self.reacquired = False
+        self.last_frame_idx = None
+        self._time = 0 # 누적 경과 프레임 (정지 판정용)
+        self._static: Dict[Tuple[int, int], Tuple[int, int]] = {} # 격자 칸 -> (연속 횟수, 마지막 시각)
+
+    def _elapsed(self, frame_idx: int | None) -> int:
+        if frame_idx is None or self.last_frame_idx is None:
+            elapsed = 1
+        elif frame_idx <= self.last_frame_idx:
+            self.reset() # 뒤로 감: 이어지지 않음
+            elapsed = 1
+        else:
+            elapsed = frame_idx - self.last_frame_idx
+        self.last_frame_idx = frame_idx
+        return elapsed
+
+    def update(self, detections: np.ndarray, frame_shape, frame_idx: int | None = None) -> np.ndarray | None:
+        """
+        detections: (N, 6+) x1, y1, x2, y2, [track_id,] conf, cls (프레임 좌표)
+        고른 검출 행을 돌려주고, 공으로 볼 후보가 없으면 None.
+        """
+        elapsed = self._elapsed(frame_idx)
+        self._time += elapsed
+        self.reacquired = False
+        if len(detections) == 0:
+            self._miss(elapsed)
+            return None
+
+        frame_height, frame_width = frame_shape[:2]
+        centers = np.stack([(detections[:, 0] + detections[:, 2]) / (2 * frame_width),
+                            (detections[:, 1] + detections[:, 3]) / (2 * frame_height)], axis=1)
+        conf = detections[:, -2].astype(np.float64)
+
+        moving = ~self._update_static(centers, elapsed)
+        candidates = moving
+        if self.position is not None and self.missing <= self.max_missing:
+            steps = elapsed + self.missing # 마지막으로 공을 본 뒤 지난 프레임 수
+            predicted = self.position + self.velocity * steps
+            # 한 프레임 기준 gate 에 경과 프레임 수를 곱함 (preview 처럼 k 프레임마다 검출하면 그만큼 멀리 감)
+            gate = min(self.max_gate, (self.min_gate + self.velocity_gate * float(np.linalg.norm(self.velocity)))
+                       * elapsed + self.missing_gate * self.missing)
+            dist = np.linalg.norm(centers - predicted, axis=1)
+            in_gate = dist <= gate
+            if not (in_gate & moving).any() and in_gate.any():
+                # 게이트 안에 정지 오검출만 남음: 지금까지 그걸 따라가고 있었으므로 트랙을 버리고 다시 잡음
+                self.position = None
+        if self.position is not None and self.missing <= self.max_missing:
+            candidates = moving & in_gate
+            score = conf - self.motion_weight * dist / gate
+        else:
+            # 트랙 없음: 정지하지 않은 후보 중 신뢰도가 가장 높은 것으로 다시 잡음
+            score = conf
+
+        if not candidates.any():
+            self._miss(elapsed)
+            return None
+
+        best = int(np.argmax(np.where(candidates, score, -np.inf)))
+        center = centers[best]
+        if self.position is not None:
+            measured = (center - self.position) / steps
+            self.velocity = self.velocity_smoothing * measured + (1 - self.velocity_smoothing) * self.velocity
+        else:
+            self.velocity = np.zeros(2)
+            self.reacquired = True
+        self.position = center
+        self.missing = 0
+        return detections[best]
+
+    def _miss(self, elapsed: int):
+        self.missing += elapsed
+        if self.missing > self.max_missing:
+            self.position = None
+            self.velocity = np.zeros(2)
+
+    def _update_static(self, centers: np.ndarray, elapsed: int) -> np.ndarray:
+        """후보마다 같은 칸에 연속으로 나온 횟수를 갱신하고, 정지 오검출이면 True"""
+        cells = np.floor(centers / self.static_cell).astype(np.int64)
+        now = self._time
+        static = np.zeros(len(centers), dtype=bool)
+        for i, (cx, cy) in enumerate(cells.tolist()):
+            count, last = self._static.get((cx, cy), (0, now))
+            count = count + 1 if now - last <= elapsed else 1
+            self._static[(cx, cy)] = (count, now)
+            static[i] = count >= self.static_frames
+        if len(self._static) > 256:
+            self._static = {k: v for k, v in self._static.items() if now - v[1] <= self.max_missing}
+        return static
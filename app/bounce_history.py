@@ -0,0 +1,79 @@
+import os
+import json
+from collections import deque
+from typing import Iterator, List, Tuple
+
+Bounce = Tuple[float, float, str]
+
+
+class BounceHistory:
+    """
+    메모리 상한이 있는 바운스 히스토리 (list 대신 analyzer.bounce_history 로 사용).
+
+    - len() 은 지금까지 쌓인 전체 개수 (새 바운스 감지용으로 계속 증가)
+    - 반복/인덱스/슬라이스는 메모리에 남아 있는 최근 max_in_memory 개만 대상 (오래된 인덱스는 잘려서 반환)
+    - 상한을 넘은 오래된 항목은 spill_path(JSON lines)에 덧붙이고 메모리에서 뺌.
+      spill_path 가 None 이면 그냥 버림 (ResultsCache 에 이미 기록된 경우)
+    """
+
+    def __init__(self, max_in_memory: int = 2000, spill_path: str | None = None):
+        self.max_in_memory = max(1, max_in_memory)
+        self.spill_path = spill_path
+        self._recent = deque()
+        self._spilled = 0 # 메모리에서 빠진 항목 수 (= _recent[0] 의 전체 인덱스)
+
+    def append(self, bounce: Bounce):
+        self._recent.append(tuple(bounce))
+        if len(self._recent) > self.max_in_memory:
+            # 한 번에 절반씩 내보내서 파일 쓰기 횟수를 줄임
+            self._spill(len(self._recent) - self.max_in_memory // 2)
+
+    def extend(self, bounces):
+        for bounce in bounces:
+            self.append(bounce)
+
+    def _spill(self, count: int):
+        spilled = [self._recent.popleft() for _ in range(count)]
+        self._spilled += count
+        if self.spill_path:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(list(b)) + "\n" for b in spilled)
+
+    def spilled(self) -> Iterator[Bounce]:
+        """디스크로 내보낸 오래된 항목들 (spill_path 가 없으면 비어 있음)"""
+        if self.spill_path and os.path.exists(self.spill_path):
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield tuple(json.loads(line))
+
+    def all(self) -> List[Bounce]:
+        return list(self.spilled()) + list(self._recent)
+
+    def clear(self):
+        self._recent.clear()
+        self._spilled = 0
+        self.discard_spill()
+
+    def discard_spill(self):
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._recent)
+
+    def __iter__(self) -> Iterator[Bounce]:
+        return iter(self._recent)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            start = max(start, self._spilled)
+            return [self._recent[i - self._spilled] for i in range(start, stop, step) if i >= self._spilled]
+        if index < 0:
+            index += len(self)
+        if index < self._spilled:
+            raise IndexError("bounce was spilled out of memory")
+        return self._recent[index - self._spilled]
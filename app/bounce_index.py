@@ -0,0 +1,202 @@
+import numpy as np
+from typing import Dict, Any, Iterable, List, Tuple
+
+RESULTS = ("Good", "Bad", "Out", "Net") # result 코드 순서 (모르는 값은 뒤에 추가됨)
+
+
+class BounceIndex:
+    """
+    바운스를 (프레임, 위치, 코트 좌표, 결과, 소스)로 저장하고 영역/시간 질의와 클릭 hit-test 를 빠르게 하는 인덱스.
+
+    - 열(column) 단위 numpy 배열에 모아서 저장 (경기 여러 개를 합친 시즌 단위에서도 파이썬 객체가 없음)
+    - 시간 인덱스: 프레임 순으로 정렬된 순서 → 시간 구간은 searchsorted 두 번
+    - 공간 인덱스: 위치(0~1 비율)를 grid x grid 칸으로 나눈 CSR (칸별로 정렬된 행 번호 + 칸 시작 오프셋)
+      → 영역 질의/최근접 질의는 겹치는 칸의 행만 봄
+    인덱스는 추가 후 첫 질의에서 한 번에 다시 만듦 (추가는 배열 끝에 쓰기만 함).
+    위치 x, y 는 bounce_history 와 같은 좌표 (코트 맵/영상 위 비율), court 는 ball_pos_court (없으면 nan).
+    """
+
+    def __init__(self, grid: int = 32):
+        self.grid = grid
+        self.results: List[str] = list(RESULTS)
+        self._frame = np.empty(0, dtype=np.int64)
+        self._xy = np.empty((0, 2), dtype=np.float32)
+        self._court = np.empty((0, 2), dtype=np.float32)
+        self._result = np.empty(0, dtype=np.int16)
+        self._source = np.empty(0, dtype=np.int32)
+        self._size = 0
+        self._keys = set() # (source, frame) — 같은 바운스를 두 번 넣지 않음 (seek 후 다시 분석된 구간)
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ---- build ------------------------------------------------------------
+
+    def _reserve(self, count: int):
+        needed = self._size + count
+        if needed <= len(self._frame):
+            return
+        capacity = max(needed, 2 * len(self._frame), 256)
+        self._frame = np.resize(self._frame, capacity)
+        self._xy = np.resize(self._xy, (capacity, 2))
+        self._court = np.resize(self._court, (capacity, 2))
+        self._result = np.resize(self._result, capacity)
+        self._source = np.resize(self._source, capacity)
+
+    def _result_code(self, result: str) -> int:
+        try:
+            return self.results.index(result)
+        except ValueError:
+            self.results.append(result)
+            return len(self.results) - 1
+
+    def add(self, frame_idx: int, x: float, y: float, result: str = "Good", court=None, source: int = 0) -> bool:
+        """바운스 하나 추가. 같은 (source, frame)이 이미 있으면 False."""
+        key = (source, int(frame_idx))
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        self._reserve(1)
+        i = self._size
+        self._frame[i] = frame_idx
+        self._xy[i] = (x, y)
+        self._court[i] = court if court is not None else (np.nan, np.nan)
+        self._result[i] = self._result_code(result)
+        self._source[i] = source
+        self._size += 1
+        self._dirty = True
+        return True
+
+    @classmethod
+    def from_records(cls, records: Dict[int, Dict[str, Any]], source: int = 0, grid: int = 32) -> "BounceIndex":
+        """
+        ResultsCache.records 에서 만듦. 바운스 위치는 바운스가 기록된 프레임 직전의 공 위치이므로
+        코트 좌표도 그 앞 레코드 중 가장 가까운 ball_pos_court 를 씀.
+        """
+        index = cls(grid)
+        index.extend_records(records, source)
+        return index
+
+    def extend_records(self, records: Dict[int, Dict[str, Any]], source: int = 0):
+        last_court = None
+        for frame_idx in sorted(records):
+            record = records[frame_idx]
+            bounce = record.get("bounce")
+            if bounce:
+                self.add(frame_idx, bounce[0], bounce[1], bounce[2], last_court, source)
+            if record.get("ball_pos_court"):
+                last_court = record["ball_pos_court"]
+
+    @classmethod
+    def merge(cls, indexes: Iterable["BounceIndex"], grid: int = 32) -> "BounceIndex":
+        """여러 경기의 인덱스를 하나로 (i 번째 인덱스의 source 는 i). 결과 이름 코드는 다시 매김."""
+        merged = cls(grid)
+        for source, index in enumerate(indexes):
+            n = len(index)
+            codes = np.array([merged._result_code(r) for r in index.results], dtype=np.int16)
+            merged._reserve(n)
+            s = slice(merged._size, merged._size + n)
+            merged._frame[s] = index._frame[:n]
+            merged._xy[s] = index._xy[:n]
+            merged._court[s] = index._court[:n]
+            merged._result[s] = codes[index._result[:n]]
+            merged._source[s] = source
+            merged._size += n
+            merged._keys.update((source, f) for f in index._frame[:n].tolist())
+        merged._dirty = True
+        return merged
+
+    def _build(self):
+        if not self._dirty:
+            return
+        n = self._size
+        self._by_time = np.argsort(self._frame[:n], kind="stable")
+        self._sorted_frames = self._frame[:n][self._by_time]
+        cells = self._cells(self._xy[:n])
+        self._by_cell = np.argsort(cells, kind="stable")
+        self._cell_start = np.searchsorted(cells[self._by_cell], np.arange(self.grid * self.grid + 1))
+        self._dirty = False
+
+    def _cells(self, xy: np.ndarray) -> np.ndarray:
+        ij = np.clip((xy * self.grid).astype(np.int64), 0, self.grid - 1)
+        return ij[:, 1] * self.grid + ij[:, 0]
+
+    # ---- query ------------------------------------------------------------
+
+    def _in_region(self, region) -> np.ndarray:
+        """region (x0, y0, x1, y1) 과 겹치는 칸의 행 번호 (아직 정확한 경계 검사 전)"""
+        x0, y0, x1, y1 = region
+        i0, i1 = (np.clip(np.floor(np.array([x0, x1]) * self.grid), 0, self.grid - 1)).astype(int)
+        j0, j1 = (np.clip(np.floor(np.array([y0, y1]) * self.grid), 0, self.grid - 1)).astype(int)
+        parts = []
+        for j in range(j0, j1 + 1):
+            # 한 행(y)의 연속된 칸들은 CSR 에서도 연속 구간
+            start = self._cell_start[j * self.grid + i0]
+            end = self._cell_start[j * self.grid + i1 + 1]
+            parts.append(self._by_cell[start:end])
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def query(self, region: Tuple[float, float, float, float] | None = None,
+              frames: Tuple[int | None, int | None] | None = None,
+              results: Iterable[str] | None = None, source: int | None = None) -> np.ndarray:
+        """
+        조건에 맞는 행 번호를 프레임 순으로 반환.
+        region: (x0, y0, x1, y1) 비율 좌표 (경계 포함), frames: (start, end) 프레임 구간 (None 은 열림),
+        results: 결과 이름들 ("Out" 등), source: merge() 된 인덱스에서 경기 번호.
+        """
+        self._build()
+        # 시간 인덱스와 공간 인덱스 중 후보가 더 적은 쪽에서 시작하고 나머지 조건은 마스크로 거름
+        candidates = []
+        if frames is not None:
+            start, end = frames
+            lo = 0 if start is None else np.searchsorted(self._sorted_frames, start, side="left")
+            hi = self._size if end is None else np.searchsorted(self._sorted_frames, end, side="right")
+            candidates.append(self._by_time[lo:hi])
+        if region is not None:
+            candidates.append(self._in_region(region))
+        rows = min(candidates, key=len) if candidates else self._by_time
+
+        if frames is not None and len(candidates) > 1:
+            f = self._frame[rows]
+            rows = rows[(f >= (-np.inf if start is None else start)) & (f <= (np.inf if end is None else end))]
+        if region is not None:
+            x0, y0, x1, y1 = region
+            xy = self._xy[rows]
+            rows = rows[(xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1)]
+        if results is not None:
+            codes = [self.results.index(r) for r in results if r in self.results]
+            rows = rows[np.isin(self._result[rows], codes)]
+        if source is not None:
+            rows = rows[self._source[rows] == source]
+        return rows[np.argsort(self._frame[rows], kind="stable")]
+
+    def nearest(self, x: float, y: float, max_dist: float,
+                frames: Tuple[int | None, int | None] | None = None, aspect: float = 1.0) -> int | None:
+        """
+        (x, y) 에서 max_dist (비율 좌표, x 기준) 안에 있는 가장 가까운 바운스의 행 번호 (클릭 hit-test 용).
+        aspect = 너비/높이 (화면에서의 거리로 비교하기 위해 y 차이에 곱함).
+        """
+        dy = max_dist / aspect
+        rows = self.query((x - max_dist, y - dy, x + max_dist, y + dy), frames)
+        if len(rows) == 0:
+            return None
+        d = np.hypot(self._xy[rows, 0] - x, (self._xy[rows, 1] - y) * aspect)
+        best = int(np.argmin(d))
+        return int(rows[best]) if d[best] <= max_dist else None
+
+    def row(self, i: int) -> Dict[str, Any]:
+        court = self._court[i]
+        return {
+            "frame": int(self._frame[i]),
+            "x": float(self._xy[i, 0]), "y": float(self._xy[i, 1]),
+            "court": None if np.isnan(court).any() else (float(court[0]), float(court[1])),
+            "result": self.results[self._result[i]],
+            "source": int(self._source[i]),
+        }
+
+    def frames(self, rows: np.ndarray) -> np.ndarray:
+        return self._frame[rows]
+
+    def positions(self, rows: np.ndarray) -> np.ndarray:
+        return self._xy[rows]
@@ -0,0 +1,236 @@
+"""
+Headless entry point (no Qt).
+
+    python -m app.cli export match.mp4 -o match_annotated.mp4 --court-type Singles
+    python -m app.cli analyze day1/*.mp4 --workers 4
+    python -m app.cli analyze match.mp4 --preview-stride 5   (preview 후 랠리 구간만 전체 프레임으로 refine)
+    python -m app.cli export match.mp4 -o rallies.mp4 --rallies-only
+    python -m app.cli analyze day1/*.mp4 --workers 2 --cpus 8 --preset interactive   (재생하면서 배치 분석)
+    python -m app.cli multiview baseline.mp4 side.mp4 --offsets 0,1.25 --rotations 0,90
+    python -m app.cli live rtsp://camera/stream --max-latency-ms 300
+    python -m app.cli live match.mp4 --detector stub --duration 30   (파일을 실시간 속도로 재생)
+"""
+import argparse
+import sys
+import time
+from typing import List
+
+from .export import export_annotated_video
+from .jobs import JobScheduler, DONE
+from .live import LiveCapture, LiveSession
+from .profiling import PROFILER
+from .resources import PRESETS, ResourcePlan, configure_environment, apply_limits
+
+
+def _print_progress(done: int, total: int):
+    if total and (done % 100 == 0 or done == total):
+        print(f"\r{done}/{total} frames ({done * 100 // total}%)", end="", flush=True)
+
+
+def _configure_resources(args) -> ResourcePlan:
+    """이 프로세스에서 추론할 때의 스레드 예산 (torch 는 아직 import 전이어야 OpenMP 풀 크기까지 적용됨)"""
+    plan = ResourcePlan(args.preset, args.cpus, pin=args.pin_cpus)
+    configure_environment(plan)
+    apply_limits(plan)
+    return plan
+
+
+def cmd_export(args) -> int:
+    plan = _configure_resources(args)
+    settings = {'court_type': args.court_type, 'detector': args.detector, 'model_path': args.model_path,
+                'resources': plan.as_dict(), 'rallies_only': args.rallies_only}
+    summary = export_annotated_video(args.video, args.output, settings,
+                                     queue_size=args.queue_size,
+                                     draw_workers=args.draw_workers,
+                                     progress_callback=_print_progress)
+    print()
+    if args.trace:
+        PROFILER.export_chrome_trace(args.trace)
+        print(f"Wrote stage trace to {args.trace}")
+    print(f"Exported {summary['frames_written']} frames to {summary['output_path']} "
+          f"({summary['frames_from_cache']} from cache, {summary['frames_inferred']} inferred)")
+    return 0
+
+
+def _format_eta(seconds) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes // 60:d}:{minutes % 60:02d}:{secs:02d}"
+
+
+def cmd_analyze(args) -> int:
+    settings = {'court_type': args.court_type, 'detector': args.detector, 'model_path': args.model_path,
+                'preview_stride': args.preview_stride, 'refine_rallies_only': not args.refine_all}
+    scheduler = JobScheduler(workers=args.workers, preset=args.preset, cpus=args.cpus, pin=args.pin_cpus)
+    jobs = [scheduler.submit(path, settings) for path in args.videos]
+    try:
+        while scheduler.active_jobs():
+            time.sleep(args.report_interval)
+            for job in jobs:
+                phase = f" ({job.phase})" if job.phase and job.status == "running" else ""
+                print(f"[{job.job_id}] {job.status + phase:<9} {job.progress * 100:5.1f}% "
+                      f"{job.fps:6.1f} fps  ETA {_format_eta(job.eta_seconds)}  {job.video_path}")
+            print(flush=True)
+    except KeyboardInterrupt:
+        # 진행 상황은 결과 캐시에 체크포인트되어 있으므로 다시 실행하면 이어서 분석됨
+        print("Interrupted; progress is checkpointed and will resume on the next run.")
+    finally:
+        scheduler.shutdown()
+
+    failed = [j for j in jobs if j.status != DONE]
+    for job in failed:
+        print(f"[{job.job_id}] {job.status}: {job.video_path} {job.error or ''}")
+    return 1 if failed else 0
+
+
+def _parse_list(text: str, cast, count: int, name: str) -> List:
+    values = [cast(v) for v in text.split(",")] if text else []
+    if len(values) != count:
+        raise SystemExit(f"--{name} needs {count} comma-separated values, got {len(values)}")
+    return values
+
+
+def cmd_multiview(args) -> int:
+    from .multiview import MultiViewAnalysis
+
+    n = len(args.videos)
+    settings = {'court_type': args.court_type, 'detector': args.detector, 'model_path': args.model_path,
+                'preview_stride': args.preview_stride}
+    mirrored = {int(v) for v in args.mirror.split(",") if v}
+    analysis = MultiViewAnalysis(args.videos, settings,
+                                 offsets=_parse_list(args.offsets, float, n, "offsets") if args.offsets else None,
+                                 rotations=_parse_list(args.rotations, int, n, "rotations") if args.rotations else None,
+                                 mirrors=[i in mirrored for i in range(n)],
+                                 reference=args.reference, max_disagreement=args.max_disagreement)
+
+    def report(jobs):
+        for i, job in enumerate(jobs):
+            print(f"[view {i}] {job.status:<9} {job.progress * 100:5.1f}% {job.fps:6.1f} fps  {job.video_path}")
+        print(flush=True)
+
+    try:
+        summary = analysis.run(workers=args.workers, preset=args.preset, cpus=args.cpus, pin=args.pin_cpus,
+                               on_update=report, poll=args.report_interval)
+    except KeyboardInterrupt:
+        print("Interrupted; per-view progress is checkpointed and will resume on the next run.")
+        return 1
+    except RuntimeError as e:
+        print(e)
+        return 1
+    coverage = ", ".join(f"{c * 100:.1f}%" for c in summary["coverage"])
+    print(f"Ball coverage per view: {coverage}; fused: {summary['fused_coverage'] * 100:.1f}%")
+    print(f"Bounces per view: {summary['view_bounces']}; fused: {summary['bounces']}")
+    print(f"Wrote fused track to {summary['results_path']}")
+    return 0
+
+
+def cmd_live(args) -> int:
+    _configure_resources(args)
+    from .analysis_core import TennisAnalyzerCore
+
+    settings = {'court_type': args.court_type, 'detector': args.detector, 'model_path': args.model_path}
+    capture = LiveCapture(args.source, pace=False if args.no_pace else None)
+    analyzer = TennisAnalyzerCore(settings)
+    last_report = [time.perf_counter()]
+
+    def report(stats):
+        now = time.perf_counter()
+        if now - last_report[0] >= args.report_interval:
+            last_report[0] = now
+            s = session.summary()
+            print(f"frame {stats['frame_idx']:>7}  latency {stats['latency_ms']:6.1f} ms  "
+                  f"p50 {s['latency_p50_ms']:6.1f}  p99 {s['latency_p99_ms']:6.1f}  "
+                  f"skipped {s['frames_skipped']}  late {s['frames_late']}", flush=True)
+
+    max_latency = args.max_latency_ms if args.max_latency_ms > 0 else None
+    session = LiveSession(analyzer, capture, max_latency_ms=max_latency, on_stats=report)
+    try:
+        summary = session.run(duration=args.duration)
+    except KeyboardInterrupt:
+        capture.stop()
+        summary = session.summary()
+    print(f"Analyzed {summary['frames_analyzed']}/{summary['frames_captured']} frames "
+          f"({summary['frames_skipped']} skipped as stale, {summary['frames_late']} results too late)")
+    print(f"Glass-to-stats latency: p50 {summary['latency_p50_ms']:.1f} ms, p95 {summary['latency_p95_ms']:.1f} ms, "
+          f"p99 {summary['latency_p99_ms']:.1f} ms, max {summary['latency_max_ms']:.1f} ms")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="tennis-ai", description="Tennis AI headless tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    resources = argparse.ArgumentParser(add_help=False)
+    resources.add_argument("--preset", default="batch", choices=sorted(PRESETS),
+                           help="CPU budget: 'batch' uses every core, 'interactive' leaves cores for playback")
+    resources.add_argument("--cpus", type=int, default=None, help="limit the budget to this many cores")
+    resources.add_argument("--pin-cpus", action="store_true", help="pin inference threads to their share of cores")
+
+    p_export = sub.add_parser("export", parents=[resources], help="Render analysis overlays into a video file")
+    p_export.add_argument("video")
+    p_export.add_argument("-o", "--output", required=True)
+    p_export.add_argument("--court-type", default="Singles", choices=["Singles", "Doubles"])
+    p_export.add_argument("--detector", default="yolo", choices=["yolo", "stub"],
+                          help="detector for frames missing from the results cache (use the one the cache was built with)")
+    p_export.add_argument("--model-path", default="yolov8m.pt")
+    p_export.add_argument("--queue-size", type=int, default=8)
+    p_export.add_argument("--draw-workers", type=int, default=None, help="default: cores not used by inference")
+    p_export.add_argument("--trace", default=None, help="write a Chrome trace (JSON) of stage timings")
+    p_export.add_argument("--rallies-only", action="store_true",
+                          help="export only rally segments found in the stored analysis (skips dead time)")
+    p_export.set_defaults(func=cmd_export)
+
+    p_analyze = sub.add_parser("analyze", parents=[resources], help="Analyze many videos on a pool of worker processes")
+    p_analyze.add_argument("videos", nargs="+")
+    p_analyze.add_argument("--workers", type=int, default=2)
+    p_analyze.add_argument("--court-type", default="Singles", choices=["Singles", "Doubles"])
+    p_analyze.add_argument("--detector", default="yolo", choices=["yolo", "stub"])
+    p_analyze.add_argument("--model-path", default="yolov8m.pt")
+    p_analyze.add_argument("--preview-stride", type=int, default=0,
+                           help="detect every k-th frame first (interpolating between), then refine at full rate")
+    p_analyze.add_argument("--refine-all", action="store_true",
+                           help="refine every frame after the preview, not only rally segments")
+    p_analyze.add_argument("--report-interval", type=float, default=5.0)
+    p_analyze.set_defaults(func=cmd_analyze)
+
+    p_multi = sub.add_parser("multiview", parents=[resources],
+                             help="Analyze time-aligned camera views of one court in parallel and fuse their ball tracks")
+    p_multi.add_argument("videos", nargs="+", help="one video per camera; the first is the reference unless --reference")
+    p_multi.add_argument("--offsets", default="", help="seconds at which each video starts on the shared timeline")
+    p_multi.add_argument("--rotations", default="",
+                         help="clockwise rotation (0/90/180/270) from each view's court frame to the reference view's")
+    p_multi.add_argument("--mirror", default="", help="indices of views whose court frame is mirrored left-right")
+    p_multi.add_argument("--reference", type=int, default=0)
+    p_multi.add_argument("--max-disagreement", type=float, default=0.08,
+                         help="court-space distance above which views are treated as conflicting detections")
+    p_multi.add_argument("--workers", type=int, default=None, help="default: one per view")
+    p_multi.add_argument("--court-type", default="Singles", choices=["Singles", "Doubles"])
+    p_multi.add_argument("--detector", default="yolo", choices=["yolo", "stub"])
+    p_multi.add_argument("--model-path", default="yolov8m.pt")
+    p_multi.add_argument("--preview-stride", type=int, default=0)
+    p_multi.add_argument("--report-interval", type=float, default=5.0)
+    p_multi.set_defaults(func=cmd_multiview)
+
+    p_live = sub.add_parser("live", parents=[resources], help="Analyze a camera/RTSP source (or a file at real-time pace) with bounded latency")
+    p_live.add_argument("source", help="camera index, stream URL, or video file / FIFO path")
+    p_live.add_argument("--court-type", default="Singles", choices=["Singles", "Doubles"])
+    p_live.add_argument("--detector", default="yolo", choices=["yolo", "stub"])
+    p_live.add_argument("--model-path", default="yolov8m.pt")
+    p_live.add_argument("--max-latency-ms", type=float, default=500.0,
+                        help="drop results that arrive later than this after capture (0 = keep all)")
+    p_live.add_argument("--no-pace", action="store_true", help="read files as fast as possible instead of real time")
+    p_live.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    p_live.add_argument("--report-interval", type=float, default=2.0)
+    p_live.set_defaults(func=cmd_live)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import threading
+import cv2
+from typing import Dict, Any, Callable
+
+from .frame_timing import frame_timestamp
+from .pipeline import Pipeline
+from .preprocess import FramePreprocessor
+from .profiling import PROFILER
+from .rallies import rally_index_for
+from .renderer import OverlayRenderer
+from .resources import ResourcePlan
+from .results_cache import ResultsCache, record_from_stats
+
+
+class AnnotatedVideoExporter:
+    """
+    분석 오버레이(공 마커, 바운스 히스토리, 속도)를 그려 넣은 영상을 파일로 내보낸다.
+
+    decode -> analyze -> draw -> encode 단계가 bounded queue로 연결되어 동시에 실행된다.
+    analyze 단계는 ResultsCache에 이미 있는 프레임은 추론 없이 캐시를 쓰고, 없는 프레임만
+    추론해서 캐시에 추가하므로 중단된 내보내기를 다시 실행하면 이어서 진행된다.
+    draw 단계는 ResourcePlan 에서 추론에 쓰지 않는 코어 수만큼 병렬로 돈다 (추론은 트래커 상태 때문에 순차 실행).
+    YOLO 검출기면 캐시에 없는 프레임의 모델 입력(letterbox 텐서)을 별도 preprocess 단계에서 미리 만들어
+    analyze 단계는 추론만 한다.
+    settings['rallies_only'] 면 랠리 구간(app.rallies)의 프레임만 내보낸다: 랠리 밖 프레임은 디코딩하지 않고
+    (grab) 추론/그리기/인코딩도 하지 않음.
+    """
+
+    def __init__(self, video_path: str, output_path: str, settings: Dict[str, Any],
+                 queue_size: int = 8, draw_workers: int | None = None,
+                 progress_callback: Callable[[int, int], None] | None = None,
+                 cancel_event: threading.Event | None = None):
+        self.video_path = video_path
+        self.output_path = output_path
+        self.settings = dict(settings)
+        self.queue_size = queue_size
+        # 기본값: 추론(torch) 스레드가 쓰지 않는 코어 수 — 코어 수만큼 띄우면 추론과 경쟁함
+        self.draw_workers = draw_workers or ResourcePlan.from_settings(self.settings).draw_workers
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+
+        self.renderer = OverlayRenderer(self.settings.get('colors'))
+        self.cache = ResultsCache(video_path)
+        self.analyzer = None  # 캐시에 없는 프레임이 나올 때만 로드
+        self.preprocessor = None
+        if self.settings.get('detector', 'yolo') != 'stub':
+            # 큐에서 기다리는 입력이 덮어써지지 않도록 큐 크기보다 넉넉하게
+            from .analysis_core import DEFAULT_IMGSZ
+            self.preprocessor = FramePreprocessor(self.settings.get('imgsz') or DEFAULT_IMGSZ, slots=queue_size + 4)
+        self.writer = None
+        self.rallies = None  # rallies_only 일 때 run() 에서 로드
+
+        self._timestamps = {}  # frame_idx -> 표시 시각 (decode 단계가 쓰고 analyze 단계가 가져감)
+        self.bounce_history = []  # append-only, draw 단계는 개수만큼 잘라서 사용
+        self.total_frames = 0
+        self.frames_inferred = 0
+        self.frames_written = 0
+
+    # ---- stages ---------------------------------------------------------
+
+    def _decode(self):
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            raise IOError(f"Failed to open video: {self.video_path}")
+        try:
+            frame_idx = 0
+            while True:
+                if self.rallies is not None and not self.rallies.contains(frame_idx):
+                    if not cap.grab():
+                        break
+                    frame_idx += 1
+                    continue
+                with PROFILER.stage("decode"):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                self._timestamps[frame_idx] = frame_timestamp(cap)
+                yield frame_idx, frame
+                frame_idx += 1
+        finally:
+            cap.release()
+
+    def _get_analyzer(self):
+        if self.analyzer is None:
+            from .analysis_core import TennisAnalyzerCore
+            self.analyzer = TennisAnalyzerCore(dict(self.settings))
+        return self.analyzer
+
+    def _preprocess(self, item):
+        frame_idx, frame = item
+        if frame_idx in self.cache:
+            return frame_idx, frame, None
+        model_input, _ = self.preprocessor.process(frame)
+        return frame_idx, frame, model_input
+
+    def _analyze(self, item):
+        frame_idx, frame, model_input = item if len(item) == 3 else (*item, None)
+        timestamp = self._timestamps.pop(frame_idx, None)
+        record = self.cache.get(frame_idx)
+        if record is None:
+            analyzer = self._get_analyzer()
+            if not analyzer.is_continuous(frame_idx):
+                # 캐시된 구간 다음부터 이어서 추론: 직전 결과로 궤적 상태를 다시 채움
+                analyzer.resync(frame_idx, self.cache.records_before(frame_idx, analyzer.trajectory_buffer.maxlen))
+            prev_count = len(analyzer.bounce_history)
+            _, ball_pos_ratio, stats = analyzer.analyze_frame(frame, frame_idx=frame_idx, model_input=model_input,
+                                                              timestamp=timestamp)
+            record = record_from_stats(ball_pos_ratio, stats, prev_count)
+            self.cache.put(frame_idx, record)
+            self.frames_inferred += 1
+
+        if record.get("bounce"):
+            self.bounce_history.append(tuple(record["bounce"]))
+        return frame_idx, frame, record, len(self.bounce_history)
+
+    def _draw(self, item):
+        frame_idx, frame, record, n_bounces = item
+        # 디코딩된 프레임은 이 파이프라인만 쓰므로 제자리에 그린다
+        with PROFILER.stage("render"):
+            self.renderer.render(frame, record.get("ball_pos_ratio"), self.bounce_history[:n_bounces],
+                                 record.get("ball_speed", 0.0), out=frame)
+        return frame_idx, frame
+
+    def _encode(self, item):
+        frame_idx, frame = item
+        if self.writer is None:
+            h, w = frame.shape[:2]
+            fourcc = cv2.VideoWriter_fourcc(*self.settings.get('export_fourcc', 'mp4v'))
+            self.writer = cv2.VideoWriter(self.output_path, fourcc, self.settings.get('fps', 30), (w, h))
+            if not self.writer.isOpened():
+                raise IOError(f"Failed to open video writer: {self.output_path}")
+        self.writer.write(frame)
+        self.frames_written += 1
+        if self.progress_callback:
+            self.progress_callback(frame_idx + 1, self.total_frames)
+
+    # ---- run ------------------------------------------------------------
+
+    def run(self) -> Dict[str, Any]:
+        cap = cv2.VideoCapture(self.video_path)
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if 'fps' not in self.settings:
+            self.settings['fps'] = cap.get(cv2.CAP_PROP_FPS) or 30
+        cap.release()
+        if self.settings.get('rallies_only'):
+            self.rallies = rally_index_for(self.video_path, self.cache.records, self.settings['fps'])
+            if self.rallies is None:
+                print("No analysis results to find rallies in; exporting every frame.")
+            else:
+                print(f"Exporting {len(self.rallies)} rallies ({self.rallies.live_frames()} frames).")
+
+        pipeline = Pipeline(self.queue_size, self.cancel_event).source(self._decode)
+        if self.preprocessor is not None:
+            pipeline.stage("preprocess", self._preprocess)
+        (pipeline.stage("analyze", self._analyze)
+         .stage("draw", self._draw, workers=self.draw_workers)
+         .sink(self._encode))
+        try:
+            pipeline.run()
+        finally:
+            self.cache.close()
+            if self.writer is not None:
+                self.writer.release()
+
+        return {
+            "output_path": self.output_path,
+            "frames_written": self.frames_written,
+            "frames_inferred": self.frames_inferred,
+            "frames_from_cache": self.frames_written - self.frames_inferred,
+        }
+
+
+def export_annotated_video(video_path: str, output_path: str, settings: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+    return AnnotatedVideoExporter(video_path, output_path, settings, **kwargs).run()
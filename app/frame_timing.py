@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+
+def frame_timestamp(cap) -> float | None:
+    """
+    cap.read() 직후 호출: 방금 읽은 프레임의 표시 시각(PTS, 초). 가변 프레임레이트(VFR) 영상은 프레임 간격이
+    1/fps 가 아니므로 속도 계산에 이 값을 씀. 백엔드가 시각을 주지 않으면 (음수/NaN) None.
+    """
+    msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if msec is None or not np.isfinite(msec) or msec < 0:
+        return None
+    return msec / 1000.0
+
+
+class DuplicateFrameDetector:
+    """
+    직전에 분석한 프레임과 (거의) 같은 프레임을 싸게 찾습니다. 폰 녹화 영상은 인코더가 같은 장면을 반복 저장한
+    중복 프레임이 많아서, 추론 낭비와 (공이 멈춘 것처럼 보이는) 속도 튐이 생김.
+
+    프레임을 1/8 로 area 평균 축소한 뒤 채널별 최대 차이를 봅니다. 평균 축소라 압축 노이즈는 거의
+    사라지지만, 작은 공이 움직인 칸은 크게 바뀌므로 공만 움직인 프레임은 중복으로 보지 않음.
+    기준은 마지막으로 중복이 아니었던 프레임이라, 아주 느린 변화도 쌓이면 새 프레임으로 처리됩니다.
+    """
+
+    def __init__(self, max_diff: int = 6, halvings: int = 3):
+        self.max_diff = max_diff
+        self.halvings = halvings # 1/2 축소 횟수 (3 → 1/8)
+        self._reference = None
+
+    def _signature(self, frame: np.ndarray) -> np.ndarray:
+        # 1/8 로 한 번에 줄이는 것보다 1/2 area 축소를 반복하는 쪽이 두 배 가까이 빠름 (결과는 같은 블록 평균)
+        for _ in range(self.halvings):
+            h, w = frame.shape[:2]
+            if h < 2 or w < 2:
+                break
+            frame = cv2.resize(frame, (w // 2, h // 2), interpolation=cv2.INTER_AREA)
+        return frame
+
+    def check(self, frame: np.ndarray, compare: bool = True) -> bool:
+        """
+        compare=True 이고 기준 프레임과 같으면 True (기준은 그대로).
+        아니면 이 프레임을 새 기준으로 삼고 False. (seek 직후처럼 비교하면 안 될 때 compare=False)
+        """
+        signature = self._signature(frame)
+        if compare and self._reference is not None and self._reference.shape == signature.shape:
+            if int(cv2.absdiff(signature, self._reference).max()) <= self.max_diff:
+                return True
+        self._reference = signature
+        return False
+
+    def reset(self):
+        self._reference = None
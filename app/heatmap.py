@@ -0,0 +1,92 @@
+import numpy as np
+from typing import Tuple
+
+
+class BounceHeatmap:
+    """
+    바운스 위치(0~1 비율 좌표)를 격자(bins)로 모은 밀도 맵. 점을 하나씩 그리는 대신 이 격자만 그리므로
+    바운스가 수천 개여도 그리기 비용이 일정합니다.
+
+    - add(): 새 바운스만 np.histogram2d 로 더함 (누적 다시 계산 없음)
+    - 시간 창: set_window(start, end) 는 프레임 구간, set_window(last_frames=N) 은 가장 최근 바운스 기준 N 프레임.
+      창이 바뀌거나 (최근 N 프레임 창이) 밀려날 때만 저장된 좌표 배열로 한 번에 다시 계산
+    - version 은 counts 가 바뀔 때마다 증가 → 그리는 쪽은 version 이 바뀔 때만 이미지를 다시 만듦
+    """
+
+    def __init__(self, bins: Tuple[int, int] = (24, 48)):
+        self.bins = bins # (x 칸 수, y 칸 수)
+        self.counts = np.zeros(bins, dtype=np.float32) # [x, y]
+        self.version = 0
+        self._xy = np.empty((256, 2), dtype=np.float32)
+        self._frames = np.empty(256, dtype=np.int64)
+        self._size = 0
+        self._max_frame = None
+        self._window = (None, None) # 절대 프레임 구간 (start, end), None 은 열림
+        self._last_frames = None
+        self._start = None # 지금 counts 에 적용된 시작 프레임
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _histogram(self, xy: np.ndarray) -> np.ndarray:
+        counts, _, _ = np.histogram2d(xy[:, 0], xy[:, 1], bins=self.bins, range=[[0, 1], [0, 1]])
+        return counts.astype(np.float32)
+
+    def _bounds(self) -> Tuple[float, float]:
+        start, end = self._window
+        if self._last_frames is not None and self._max_frame is not None:
+            start = self._max_frame - self._last_frames
+        return (-np.inf if start is None else start), (np.inf if end is None else end)
+
+    def add(self, xy, frames):
+        """xy: (N, 2) 비율 좌표, frames: (N,) 바운스가 난 프레임 번호"""
+        xy = np.asarray(xy, dtype=np.float32).reshape(-1, 2)
+        frames = np.asarray(frames, dtype=np.int64).reshape(-1)
+        if len(xy) == 0:
+            return
+        needed = self._size + len(xy)
+        if needed > len(self._frames):
+            capacity = max(needed, len(self._frames) * 2)
+            self._xy = np.resize(self._xy, (capacity, 2))
+            self._frames = np.resize(self._frames, capacity)
+        self._xy[self._size:needed] = xy
+        self._frames[self._size:needed] = frames
+        self._size = needed
+        latest = int(frames.max())
+        self._max_frame = latest if self._max_frame is None else max(self._max_frame, latest)
+
+        start, end = self._bounds()
+        if start != self._start:
+            self._rebuild() # 최근 N 프레임 창이 밀려남
+            return
+        inside = (frames >= start) & (frames <= end)
+        if inside.any():
+            self.counts += self._histogram(xy[inside])
+            self.version += 1
+
+    def set_window(self, start: int | None = None, end: int | None = None, last_frames: int | None = None):
+        """보여줄 시간 창. 인자를 모두 생략하면 전체."""
+        self._window = (start, end)
+        self._last_frames = last_frames
+        self._rebuild()
+
+    def clear(self):
+        self._size = 0
+        self._max_frame = None
+        self._rebuild()
+
+    def _rebuild(self):
+        start, end = self._bounds()
+        frames = self._frames[:self._size]
+        inside = (frames >= start) & (frames <= end)
+        self.counts = self._histogram(self._xy[:self._size][inside]) if inside.any() \
+            else np.zeros(self.bins, dtype=np.float32)
+        self._start = start
+        self.version += 1
+
+    def density(self) -> np.ndarray:
+        """0~1 로 정규화한 밀도 [y, x] (이미지 행/열 순서)"""
+        peak = float(self.counts.max())
+        if peak <= 0:
+            return np.zeros(self.counts.T.shape, dtype=np.float32)
+        return np.ascontiguousarray(self.counts.T / peak)
@@ -0,0 +1,204 @@
+import heapq
+import multiprocessing as mp
+import queue
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Tuple
+
+
+class WorkerDied(RuntimeError):
+    """추론 워커 프로세스가 비정상 종료됨"""
+
+
+class SharedFrameRing:
+    """
+    프로세스 간에 프레임을 복사 한 번으로 넘기기 위한 shared_memory 링 버퍼.
+    slots 개의 같은 shape/dtype 프레임 칸으로 나뉘고, 칸 번호만 큐로 주고받는다 (배열 pickling 없음).
+    """
+
+    def __init__(self, frame_shape: Tuple[int, ...], slots: int = 8, dtype=np.uint8, name: str | None = None):
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self.frame_nbytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.frame_nbytes * slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._array = np.ndarray((slots,) + self.frame_shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def view(self, slot: int) -> np.ndarray:
+        return self._array[slot]
+
+    def write(self, slot: int, frame: np.ndarray):
+        np.copyto(self._array[slot], frame)
+
+    def close(self):
+        self._array = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _inference_worker_main(worker_id: int, ring_name: str, frame_shape, slots: int,
+                           settings: Dict[str, Any], tasks, results):
+    from .resources import ResourcePlan, setup_worker_process
+    # torch import 전에: 워커마다 자기 몫의 코어만 쓰도록 (워커 수 x 코어 수 만큼 스레드가 생기지 않게)
+    setup_worker_process(ResourcePlan.from_dict(settings['resources']), worker_id)
+    from .analysis_core import TennisAnalyzerCore
+
+    ring = SharedFrameRing(frame_shape, slots, name=ring_name)
+    analyzer = TennisAnalyzerCore(settings)
+    op_version = -1
+    results.put(("ready", worker_id, None))
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot, frame_idx, version, operating_point, roi_center = task
+            start = time.perf_counter()
+            try:
+                if version != op_version:
+                    op_version = version
+                    analyzer.set_operating_point(**operating_point)
+                # ROI 중심은 부모가 고른 직전 공 위치 (워커는 다른 워커가 처리한 프레임을 모름)
+                analyzer.trajectory_buffer.append((roi_center, None))
+                detections = analyzer._detect_ball(ring.view(slot), 0.25)
+            except Exception as e:
+                # 이 프레임만 검출 없음으로 돌려줌 (seq가 빠지면 부모의 순서 정렬이 멈춤)
+                print(f"Inference worker {worker_id} failed on frame {frame_idx}: {e}")
+                detections = np.zeros((0, 6), dtype=np.float32)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            results.put(("result", worker_id, (seq, slot, frame_idx, detections, elapsed_ms)))
+    finally:
+        ring.close()
+
+
+class ProcessInferencePool:
+    """
+    공 검출 모델 추론을 별도 프로세스들에서 실행한다.
+
+    - 프레임은 SharedFrameRing 칸에 복사해서 넘기고, 작업/결과 큐에는 칸 번호와 검출 박스만 오간다
+    - 워커는 상태 없이 검출 박스(_detect_ball)만 돌려줌. 공 고르기(트래커), 코트 좌표, 궤적/속도/바운스는
+      순서가 중요하므로 호출자가 poll() 결과(submit 순서대로)를 받아 한 곳에서 처리
+      (_locate_ball → update_position). 그래서 워커 수와 상관없이 스레드 안 분석과 같은 결과가 나옴
+    - 워커가 여러 개면 각 워커의 모델이 프레임을 나눠 받는다
+    """
+
+    def __init__(self, settings: Dict[str, Any], frame_shape: Tuple[int, ...], workers: int = 1,
+                 slots: int | None = None, start_timeout: float = 120.0):
+        self.workers = max(1, workers)
+        self.ring = SharedFrameRing(frame_shape, slots or self.workers * 2 + 2)
+        self._ctx = mp.get_context("spawn")
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._free_slots = list(range(self.ring.slots))
+        self._next_seq = 0 # 다음 submit 순번
+        self._next_out = 0 # 다음으로 돌려줄 순번
+        self._reorder = [] # (seq, frame_idx, detections, elapsed_ms)
+        self._tags = {} # seq -> 호출자가 붙인 값 (예: enqueue 시각)
+        self._op_version = 0
+        self._operating_point: Dict[str, Any] = {}
+
+        from .resources import ResourcePlan
+        settings = dict(settings)
+        settings['resources'] = ResourcePlan.from_settings(settings, processes=self.workers).as_dict()
+
+        self._processes = []
+        for worker_id in range(self.workers):
+            p = self._ctx.Process(target=_inference_worker_main,
+                                  args=(worker_id, self.ring.name, self.ring.frame_shape, self.ring.slots,
+                                        settings, self._tasks, self._results),
+                                  name=f"inference-worker-{worker_id}", daemon=True)
+            p.start()
+            self._processes.append(p)
+
+        # 모든 워커가 모델을 로드할 때까지 대기 (첫 프레임 지연이 분석 지연으로 잡히지 않도록)
+        ready = 0
+        deadline = time.monotonic() + start_timeout
+        while ready < self.workers:
+            try:
+                kind, _, _ = self._results.get(timeout=0.5)
+            except queue.Empty:
+                if self.alive() and time.monotonic() < deadline:
+                    continue
+                self.close()
+                raise WorkerDied("Inference workers failed to start")
+            ready += kind == "ready"
+
+    @property
+    def in_flight(self) -> int:
+        return self._next_seq - self._next_out
+
+    def has_free_slot(self) -> bool:
+        return bool(self._free_slots)
+
+    def set_operating_point(self, operating_point: Dict[str, Any]):
+        """다음 작업부터 모든 워커에 적용 (app.quality 동작점)"""
+        self._operating_point = dict(operating_point)
+        self._op_version += 1
+
+    def submit(self, frame_idx: int, frame: np.ndarray, tag=None,
+               roi_center: Tuple[float, float] | None = None) -> bool:
+        """
+        빈 칸이 없으면 False (호출자가 프레임을 버리거나 나중에 다시 시도).
+        `roi_center`: ROI 모드에서 검출 영역의 중심 (직전 공 위치, 비율). None 이면 전체 프레임
+        """
+        if not self._free_slots or frame.shape != self.ring.frame_shape:
+            return False
+        slot = self._free_slots.pop()
+        self.ring.write(slot, frame)
+        seq = self._next_seq
+        self._next_seq += 1
+        self._tags[seq] = tag
+        self._tasks.put((seq, slot, frame_idx, self._op_version, self._operating_point, roi_center))
+        return True
+
+    def alive(self) -> bool:
+        return bool(self._processes) and all(p.is_alive() for p in self._processes)
+
+    def poll(self, timeout: float = 0.0) -> List[Tuple[int, Any, Any, float, Any]]:
+        """
+        도착한 결과를 submit 순서대로: [(frame_idx, detections, inference_ms, tag), ...]
+        detections 는 _detect_ball() 과 같은 (N, 6) 배열 (프레임 좌표).
+        워커 프로세스가 죽었으면 WorkerDied (처리 중이던 프레임은 돌아오지 않음).
+        """
+        if not self.alive():
+            raise WorkerDied("Inference worker process exited")
+        block = timeout > 0
+        while True:
+            try:
+                kind, worker_id, payload = self._results.get(block, timeout) if block else self._results.get_nowait()
+            except queue.Empty:
+                break
+            block = False
+            if kind != "result":
+                continue
+            seq, slot, frame_idx, detections, elapsed_ms = payload
+            self._free_slots.append(slot)
+            heapq.heappush(self._reorder, (seq, frame_idx, detections, elapsed_ms))
+
+        ready = []
+        while self._reorder and self._reorder[0][0] == self._next_out:
+            seq, frame_idx, detections, elapsed_ms = heapq.heappop(self._reorder)
+            ready.append((frame_idx, detections, elapsed_ms, self._tags.pop(seq, None)))
+            self._next_out += 1
+        return ready
+
+    def close(self, timeout: float = 5.0):
+        for p in self._processes:
+            if p.is_alive():
+                self._tasks.put(None)
+        for p in self._processes:
+            p.join(timeout=timeout)
+            if p.is_alive():
+                p.terminate()
+        self._processes = []
+        self.ring.close()
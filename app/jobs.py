@@ -0,0 +1,354 @@
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+import cv2
+from typing import Dict, Any, Callable, List
+
+from .frame_timing import frame_timestamp
+from .rallies import RallyIndex
+from .resources import ResourcePlan, setup_worker_process
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+CANCELLED = "cancelled"
+DONE = "done"
+FAILED = "failed"
+
+FINISHED_STATES = (CANCELLED, DONE, FAILED)
+
+
+class AnalysisJob:
+    """분석 큐에 들어간 영상 하나의 상태 (스케줄러 프로세스 쪽 사본)"""
+
+    def __init__(self, job_id: int, video_path: str, settings: Dict[str, Any]):
+        self.job_id = job_id
+        self.video_path = video_path
+        self.settings = settings
+        self.status = QUEUED
+        self.phase = None # "preview" / "refine" (settings['preview_stride'] 사용 시), 아니면 None
+        self.worker_id = None
+        self.frames_done = 0
+        self.total_frames = 0
+        self.fps = 0.0
+        self.eta_seconds = None
+        self.error = None
+
+    @property
+    def progress(self) -> float:
+        return self.frames_done / self.total_frames if self.total_frames else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id, "video_path": self.video_path, "status": self.status,
+            "phase": self.phase, "worker_id": self.worker_id, "frames_done": self.frames_done,
+            "total_frames": self.total_frames, "progress": self.progress,
+            "fps": self.fps, "eta_seconds": self.eta_seconds, "error": self.error,
+        }
+
+
+# ---- worker process ---------------------------------------------------------
+
+class _JobProgress:
+    """워커 쪽 진행률/fps/ETA 보고 (report_every 초마다 한 번)"""
+
+    def __init__(self, job_id: int, worker_id: int, events, total: int, report_every: float):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.events = events
+        self.total = total
+        self.report_every = report_every
+        self.phase = None
+        self.last_report = 0.0
+        self.restart()
+
+    def restart(self, phase: str | None = None):
+        """pause 후나 단계가 바뀔 때 fps 측정을 다시 시작"""
+        if phase is not None:
+            self.phase = phase
+        self.run_start, self.run_frames = time.monotonic(), 0
+
+    def tick(self, frames_done: int):
+        self.run_frames += 1
+        now = time.monotonic()
+        if now - self.last_report >= self.report_every:
+            self.last_report = now
+            fps = self.run_frames / max(now - self.run_start, 1e-6)
+            eta = (self.total - frames_done) / fps if fps > 0 and self.total else None
+            self.events.put(("progress", self.job_id, self.worker_id,
+                             {"status": RUNNING, "phase": self.phase, "frames_done": frames_done,
+                              "fps": fps, "eta_seconds": eta}))
+
+
+def _run_job(worker_id: int, job_id: int, video_path: str, settings: Dict[str, Any],
+             control, events, analyzers: Dict[str, Any], report_every: float = 0.5):
+    from .analysis_core import TennisAnalyzerCore
+    from .results_cache import ResultsCache, record_from_stats
+    from .preview import PreviewPass
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Failed to open video: {video_path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    settings = dict(settings)
+    settings.setdefault('fps', cap.get(cv2.CAP_PROP_FPS) or 30)
+
+    # 같은 모델 파일은 워커 프로세스당 한 번만 로드해서 작업 간에 재사용
+    model_key = f"{settings.get('detector', 'yolo')}:{settings.get('model_path', 'yolov8m.pt')}"
+    analyzer = analyzers.get(model_key)
+    if analyzer is None:
+        analyzer = TennisAnalyzerCore(settings)
+        analyzers[model_key] = analyzer
+    else:
+        analyzer.reset(settings)
+
+    cache = ResultsCache(video_path)
+    # 체크포인트: 0번부터 연속으로 저장된 마지막 프레임 다음부터 이어서 분석
+    start_idx = cache.contiguous_until() + 1
+    progress = _JobProgress(job_id, worker_id, events, total, report_every)
+
+    def should_stop() -> bool:
+        """pause 면 풀릴 때까지 대기, cancel 이면 True"""
+        state = control.get(job_id, RUNNING)
+        if state == PAUSED:
+            cache.flush()
+            events.put(("progress", job_id, worker_id, {"status": PAUSED}))
+            while control.get(job_id) == PAUSED:
+                time.sleep(0.2)
+            progress.restart()
+            state = control.get(job_id, RUNNING)
+        return state == CANCELLED
+
+    def seek(frame_idx: int):
+        analyzer.bounce_history = cache.bounces_until(frame_idx - 1)
+        analyzer.resync(frame_idx, cache.records_before(frame_idx, analyzer.trajectory_buffer.maxlen))
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+
+    events.put(("started", job_id, worker_id, {"total_frames": total, "frames_done": start_idx}))
+
+    frame_idx = start_idx
+    status = DONE
+    try:
+        # 1. preview: k 프레임마다 검출 + 보간으로 바운스 맵을 먼저 채움
+        preview_stride = settings.get('preview_stride', 0)
+        if preview_stride > 1 and start_idx < total:
+            seek(start_idx)
+            progress.restart("preview")
+
+            def on_preview_frame(next_idx: int) -> bool:
+                progress.tick(next_idx)
+                return not (next_idx % 10 == 0 and should_stop())
+
+            frame_idx = PreviewPass(analyzer, cache, preview_stride).run(cap, start_idx, on_preview_frame)
+            if frame_idx < total and control.get(job_id) == CANCELLED:
+                status = CANCELLED
+
+        # 2. refine: preview 로 채운 구간(또는 아직 분석 안 된 구간)을 전체 프레임으로 다시 분석해서 덮어씀
+        refine_from = cache.first_preview_frame()
+        ranges = [(start_idx if refine_from is None else min(refine_from, start_idx), None)]
+        if status != CANCELLED and refine_from is not None and settings.get('refine_rallies_only', True):
+            # preview 결과로 랠리를 나누고 랠리 안만 다시 분석 (랠리 밖은 preview 결과를 그대로 씀).
+            # 이미 refine 된 앞부분은 건너뛰므로 중단 후 다시 실행해도 이어서 진행됨
+            rallies = RallyIndex.from_records(cache.records, settings['fps'])
+            rallies.save(video_path)
+            ranges = []
+            for start, end in rallies:
+                pending = [i for i in range(start, end + 1) if (cache.get(i) or {}).get("preview")]
+                if pending:
+                    ranges.append((pending[0], end))
+            # 마지막 키프레임 뒤 프레임은 preview 가 보간하지 못했으므로 (공 없음) 랠리 여부와 상관없이 refine
+            last = max(cache.records)
+            tail = [i for i in range(max(0, last - preview_stride + 1), last + 1)
+                    if (cache.get(i) or {}).get("preview")]
+            if tail:
+                if ranges and ranges[-1][1] >= tail[0] - 1:
+                    ranges[-1] = (ranges[-1][0], None)
+                else:
+                    ranges.append((tail[0], None))
+        if status != CANCELLED:
+            progress.restart("refine" if refine_from is not None else None)
+
+        for range_start, range_end in (ranges if status != CANCELLED else []):
+            frame_idx = range_start
+            seek(frame_idx)
+            while range_end is None or frame_idx <= range_end:
+                if frame_idx % 10 == 0 and should_stop():
+                    status = CANCELLED
+                    break
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                prev_count = len(analyzer.bounce_history)
+                _, ball_pos_ratio, stats = analyzer.analyze_frame(frame, frame_idx=frame_idx,
+                                                                  timestamp=frame_timestamp(cap))
+                cache.put(frame_idx, record_from_stats(ball_pos_ratio, stats, prev_count))
+                frame_idx += 1
+                progress.tick(frame_idx)
+            if status == CANCELLED:
+                break
+
+        if status == DONE:
+            if refine_from is not None:
+                cache.compact() # preview 레코드가 덮어써진 줄을 정리
+            # 최종 결과로 랠리 구간을 다시 나눠서 저장 (GUI 랠리 이동, 랠리만 내보내기에서 사용)
+            RallyIndex.from_records(cache.records, settings['fps']).save(video_path)
+    finally:
+        cache.close()
+        cap.release()
+
+    events.put((status, job_id, worker_id, {"frames_done": frame_idx}))
+
+
+def _worker_main(worker_id: int, tasks, events, control, resources: Dict[str, Any]):
+    # 모델을 로드(torch import)하기 전에 이 워커 몫의 스레드 수/affinity 를 적용
+    setup_worker_process(ResourcePlan.from_dict(resources), worker_id)
+    analyzers = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, video_path, settings = task
+        if control.get(job_id) == CANCELLED:
+            events.put((CANCELLED, job_id, worker_id, {}))
+            continue
+        try:
+            _run_job(worker_id, job_id, video_path, settings, control, events, analyzers)
+        except Exception as e:
+            events.put((FAILED, job_id, worker_id, {"error": str(e)}))
+
+
+# ---- scheduler ----------------------------------------------------------------
+
+class JobScheduler:
+    """
+    여러 영상을 큐에 넣고 분석 프로세스 풀에서 병렬로 처리한다.
+
+    - 워커 프로세스마다 모델을 한 번 로드해서 이후 작업에 재사용 (같은 가중치 파일을 공유)
+    - 결과는 영상별 ResultsCache에 계속 기록되므로, 중단된 작업은 다시 넣으면 마지막 프레임부터 이어서 진행
+    - pause/resume/cancel 은 공유 dict 로 워커에 전달
+    - 진행률/fps/ETA 변경 시 on_update(job) 콜백 호출 (스케줄러의 수집 스레드에서 호출됨)
+    - 워커들의 torch/OpenCV 스레드는 하나의 ResourcePlan 에서 나눔 (preset: "batch" 는 모든 코어,
+      GUI 와 같이 돌 때는 "interactive" 로 재생용 코어를 남김)
+    """
+
+    def __init__(self, workers: int = 2, on_update: Callable[[AnalysisJob], None] | None = None,
+                 preset: str = "batch", cpus: int | None = None, pin: bool = False):
+        self.n_workers = max(1, workers)
+        self.resources = ResourcePlan(preset, cpus, self.n_workers, pin)
+        self.on_update = on_update
+        self.jobs: Dict[int, AnalysisJob] = {}
+        self._ids = itertools.count(1)
+        self._ctx = mp.get_context("spawn") # Qt/torch 와 fork 는 같이 쓰면 안전하지 않음
+        self._manager = None
+        self._processes: List = []
+        self._collector = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._processes:
+            return
+        self._manager = self._ctx.Manager()
+        self._control = self._manager.dict()
+        self._tasks = self._ctx.Queue()
+        self._events = self._ctx.Queue()
+        for worker_id in range(self.n_workers):
+            p = self._ctx.Process(target=_worker_main,
+                                  args=(worker_id, self._tasks, self._events, self._control, self.resources.as_dict()),
+                                  name=f"analysis-worker-{worker_id}", daemon=True)
+            p.start()
+            self._processes.append(p)
+        self._running = True
+        self._collector = threading.Thread(target=self._collect_events, name="job-events", daemon=True)
+        self._collector.start()
+
+    def submit(self, video_path: str, settings: Dict[str, Any] | None = None) -> AnalysisJob:
+        self.start()
+        job = AnalysisJob(next(self._ids), video_path, dict(settings or {}))
+        with self._lock:
+            self.jobs[job.job_id] = job
+        self._control[job.job_id] = RUNNING
+        self._tasks.put((job.job_id, video_path, job.settings))
+        self._notify(job)
+        return job
+
+    def pause(self, job_id: int):
+        job = self.jobs.get(job_id)
+        if job and job.status not in FINISHED_STATES:
+            self._control[job_id] = PAUSED
+            if job.status == QUEUED:
+                job.status = PAUSED
+                self._notify(job)
+
+    def resume(self, job_id: int):
+        job = self.jobs.get(job_id)
+        if job and job.status == PAUSED:
+            self._control[job_id] = RUNNING
+            job.status = RUNNING if job.worker_id is not None else QUEUED
+            self._notify(job)
+
+    def cancel(self, job_id: int):
+        job = self.jobs.get(job_id)
+        if job and job.status not in FINISHED_STATES:
+            self._control[job_id] = CANCELLED
+
+    def active_jobs(self) -> List[AnalysisJob]:
+        return [j for j in self.jobs.values() if j.status not in FINISHED_STATES]
+
+    def wait(self, poll: float = 0.2):
+        """모든 작업이 끝날 때까지 블록"""
+        while self.active_jobs():
+            time.sleep(poll)
+
+    def shutdown(self, cancel: bool = True):
+        if not self._processes:
+            return
+        if cancel:
+            for job in self.active_jobs():
+                self._control[job.job_id] = CANCELLED
+        for _ in self._processes:
+            self._tasks.put(None)
+        for p in self._processes:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        self._running = False
+        self._collector.join(timeout=2)
+        self._manager.shutdown()
+        self._processes = []
+
+    # ---- internals --------------------------------------------------------
+
+    def _notify(self, job: AnalysisJob):
+        if self.on_update:
+            self.on_update(job)
+
+    def _collect_events(self):
+        while self._running:
+            try:
+                kind, job_id, worker_id, data = self._events.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            job.worker_id = worker_id
+            if kind == "started":
+                job.status = PAUSED if self._control.get(job_id) == PAUSED else RUNNING
+            elif kind == "progress":
+                job.status = data.pop("status", job.status)
+            else:
+                job.status = kind
+                job.eta_seconds = 0.0 if kind == DONE else None
+            for key, value in data.items():
+                setattr(job, key, value)
+            if job.status == DONE:
+                job.frames_done = max(job.frames_done, job.total_frames)
+            self._notify(job)
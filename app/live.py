@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Callable, Dict, Any, Tuple
+
+from .profiling import PROFILER, RollingHistogram
+
+
+def parse_source(source):
+    """'0', '1' 같은 숫자는 카메라 번호, 나머지는 그대로 (rtsp://..., 파일/FIFO 경로)"""
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+
+class LiveCapture:
+    """
+    카메라/RTSP/파일에서 별도 스레드로 프레임을 계속 읽고, 가장 최근 프레임 하나만 보관합니다.
+
+    소비자(분석)가 느리면 아직 가져가지 않은 프레임은 새 프레임으로 덮어써서 버립니다 (frames_skipped).
+    그래서 read_latest()는 항상 가장 새로운 프레임을 돌려주고, 지연이 쌓이지 않습니다.
+    각 프레임에는 읽은 직후의 time.perf_counter() 값(capture_ts)과 읽은 순번(seq)이 붙습니다.
+    pace=True 면 파일을 fps 속도로 읽어 실제 카메라처럼 재생합니다 (녹화 영상으로 라이브 모드를 시험할 때).
+    """
+
+    def __init__(self, source, pace: bool | None = None, fps: float | None = None):
+        self.source = parse_source(source)
+        if pace is None:
+            # 일반 파일은 디코더가 최대 속도로 읽어버리므로 기본으로 실시간 속도에 맞춤
+            pace = isinstance(self.source, str) and os.path.isfile(self.source)
+        self.pace = pace
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise IOError(f"Failed to open live source: {source}")
+        # 드라이버 쪽 버퍼도 최소로 (지원하는 백엔드에서만 적용됨)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+        self.frames_captured = 0
+        self.frames_skipped = 0 # 소비되기 전에 덮어쓴 프레임 수
+        self._latest = None # (seq, frame, capture_ts)
+        self._consumed_seq = -1
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._ended = False
+        self._thread = threading.Thread(target=self._reader, name="live-capture", daemon=True)
+        self._thread.start()
+
+    @property
+    def ended(self) -> bool:
+        """소스가 끝났거나(파일 끝, 연결 끊김) stop() 됨"""
+        return self._ended
+
+    def _reader(self):
+        start = time.perf_counter()
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                if self.pace:
+                    delay = start + seq / self.fps - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                with PROFILER.stage("decode"):
+                    ret, frame = self.cap.read()
+                if not ret:
+                    break
+                capture_ts = time.perf_counter()
+                with self._cond:
+                    if self._latest is not None and self._latest[0] > self._consumed_seq:
+                        self.frames_skipped += 1
+                    self._latest = (seq, frame, capture_ts)
+                    self.frames_captured += 1
+                    self._cond.notify_all()
+                seq += 1
+        finally:
+            self.cap.release()
+            with self._cond:
+                self._ended = True
+                self._cond.notify_all()
+
+    def read_latest(self, timeout: float = 1.0) -> Tuple[int, np.ndarray, float] | None:
+        """
+        아직 가져가지 않은 가장 새로운 프레임 (seq, frame, capture_ts).
+        timeout 안에 새 프레임이 없거나 소스가 끝났으면 None.
+        """
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while self._latest is None or self._latest[0] <= self._consumed_seq:
+                remaining = deadline - time.perf_counter()
+                if self._ended or remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            self._consumed_seq = self._latest[0]
+            return self._latest
+
+    def peek(self) -> Tuple[int, np.ndarray, float] | None:
+        """가장 최근 프레임을 소비하지 않고 확인 (화면 표시용 — 분석용 read_latest()와 독립)"""
+        return self._latest
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+
+
+class LiveSession:
+    """
+    LiveCapture의 최신 프레임만 분석해서 stats를 내보내는 실시간 루프.
+
+    - 분석이 끝났을 때 이미 max_latency_ms 보다 오래된 프레임은 결과를 버림 (너무 늦은 판정은 쓸모 없음)
+    - frame_idx 로 캡처 순번을 넘기고 continuous=True 로 분석하므로, 건너뛴 프레임 수만큼
+      실제 경과 시간으로 속도를 계산하고 트래커는 초기화하지 않음
+    - stats 에 capture_ts 와 latency_ms (캡처 → stats 까지, "glass-to-stats")를 붙이고
+      p50/p95/p99 를 집계 (PROFILER 의 "glass_to_stats" 단계에도 기록)
+    """
+
+    def __init__(self, analyzer, capture: LiveCapture, conf: float = 0.25,
+                 max_latency_ms: float | None = 500.0,
+                 on_stats: Callable[[Dict[str, Any]], None] | None = None):
+        self.analyzer = analyzer
+        self.capture = capture
+        self.conf = conf
+        self.max_latency_ms = max_latency_ms
+        self.on_stats = on_stats
+        self.latency = RollingHistogram(2048)
+        self.frames_analyzed = 0
+        self.frames_late = 0 # 분석은 했지만 max_latency_ms 를 넘겨서 버린 결과
+        self.analyzer.settings['fps'] = capture.fps
+
+    def run(self, stop_event: threading.Event | None = None, duration: float | None = None) -> Dict[str, Any]:
+        """소스가 끝나거나 stop_event/duration 이 될 때까지 실행하고 summary()를 반환"""
+        started = time.perf_counter()
+        try:
+            while stop_event is None or not stop_event.is_set():
+                if duration is not None and time.perf_counter() - started >= duration:
+                    break
+                item = self.capture.read_latest(timeout=0.5)
+                if item is None:
+                    if self.capture.ended:
+                        break
+                    continue
+                self.process(*item)
+        finally:
+            self.capture.stop()
+        summary = self.summary()
+        summary["wall_seconds"] = time.perf_counter() - started
+        return summary
+
+    def process(self, seq: int, frame: np.ndarray, capture_ts: float) -> Dict[str, Any] | None:
+        # 카메라 프레임 간격은 일정하지 않으므로 캡처 시각으로 속도를 계산
+        _, _, stats = self.analyzer.analyze_frame(frame, self.conf, frame_idx=seq, continuous=True,
+                                                  timestamp=capture_ts)
+        latency_ms = (time.perf_counter() - capture_ts) * 1000
+        self.frames_analyzed += 1
+        self.latency.add(latency_ms)
+        PROFILER.record_ms("glass_to_stats", latency_ms)
+        if not stats:
+            return None
+        if self.max_latency_ms is not None and latency_ms > self.max_latency_ms:
+            # 궤적/바운스 상태는 이미 반영됐지만 늦은 결과는 내보내지 않음
+            self.frames_late += 1
+            return None
+        stats["capture_ts"] = capture_ts
+        stats["latency_ms"] = latency_ms
+        if self.on_stats is not None:
+            self.on_stats(stats)
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        latency = self.latency.summary()
+        return {
+            "frames_captured": self.capture.frames_captured,
+            "frames_analyzed": self.frames_analyzed,
+            "frames_skipped": self.capture.frames_skipped,
+            "frames_late": self.frames_late,
+            "latency_p50_ms": latency.get("p50_ms", 0.0),
+            "latency_p95_ms": latency.get("p95_ms", 0.0),
+            "latency_p99_ms": latency.get("p99_ms", 0.0),
+            "latency_max_ms": latency.get("max_ms", 0.0),
+        }
@@ -0,0 +1,251 @@
+import os
+import time
+import cv2
+import numpy as np
+from typing import Dict, Any, List, Tuple, Callable
+
+from .jobs import JobScheduler, DONE
+from .results_cache import ResultsCache, cache_dir_for, record_from_stats
+
+FUSED_DIR = "multiview" # 기준 뷰 캐시 폴더 아래에 융합 결과 (results.jsonl) 저장
+
+
+def to_reference_court(court: Tuple[float, float], rotation: int = 0, mirror: bool = False) -> Tuple[float, float]:
+    """
+    뷰의 정규화 코트 좌표 → 기준 뷰의 코트 좌표.
+    코트 검출은 화면에서 본 네 모서리를 (왼쪽 위부터) 코트 모서리로 잡으므로, 다른 쪽에서 찍은 카메라는
+    같은 지점이 회전/반전된 좌표로 나옴. rotation: 시계 방향 90 의 배수, mirror: 좌우 반전 (회전 전에 적용)
+    """
+    x, y = court
+    if mirror:
+        x = 1.0 - x
+    for _ in range((rotation // 90) % 4):
+        x, y = 1.0 - y, x
+    return x, y
+
+
+def estimate_alignment(view_points: List[Tuple[float, float]], ref_points: List[Tuple[float, float]],
+                       threshold: float = 0.03, min_pairs: int = 20) -> np.ndarray | None:
+    """
+    같은 시각 두 뷰의 공 코트 좌표 쌍으로 뷰 코트 좌표 → 기준 코트 좌표 affine (2x3) 을 RANSAC 으로 추정.
+    뷰마다 자동 코트 검출이 다른 선(단식/복식 사이드라인, 센터 라인)을 모서리로 잡으면 코트 좌표가
+    늘어나거나 밀려 있으므로 맞춰야 함. 공이 떠 있는 프레임은 카메라 위치에 따라 바닥 투영 위치가 달라서
+    (시차) 이상치로 빠지고, 바닥 근처 프레임 (바운스 주변, 낮은 공) 으로 맞춰집니다.
+    쌍이 min_pairs 보다 적거나 추정이 실패하면 None.
+    """
+    if len(view_points) < min_pairs:
+        return None
+    M, inliers = cv2.estimateAffine2D(np.float32(view_points), np.float32(ref_points), method=cv2.RANSAC,
+                                      ransacReprojThreshold=threshold, maxIters=2000, confidence=0.99)
+    if M is None or inliers is None or int(inliers.sum()) < min_pairs:
+        return None
+    return M
+
+
+class TrackFuser:
+    """
+    같은 시각의 뷰별 공 코트 좌표를 하나의 궤적으로 합칩니다.
+
+    - 한 뷰에만 있으면 그 값 (가림/화면 밖 구간을 다른 뷰가 채움)
+    - 여러 뷰가 max_disagreement 안에서 일치하면 축별 가중 평균. weights 는 뷰별 (x, y) 가중치:
+      베이스라인 카메라는 좌우(x), 사이드 카메라는 깊이(y)를 더 정확히 봄
+    - 크게 엇갈리면 (한 뷰의 오검출) 직전 궤적에서 예측한 위치에 가장 가까운 뷰와, 그 뷰와 일치하는 뷰만 씀.
+      예측이 없으면 앞 번호 뷰 (기준 뷰를 0 번으로 넘김)
+    """
+
+    def __init__(self, n_views: int, weights: List[Tuple[float, float]] | None = None,
+                 max_disagreement: float = 0.08, max_gap: int = 5):
+        self.weights = np.array(weights if weights is not None else [(1.0, 1.0)] * n_views, dtype=np.float64)
+        self.max_disagreement = max_disagreement
+        self.max_gap = max_gap # 이만큼 프레임 동안 공이 없으면 예측(속도)을 버림
+        self.reset()
+
+    def reset(self):
+        self.position = None
+        self.velocity = np.zeros(2)
+        self.missing = 0
+
+    def fuse(self, points: List[Tuple[float, float] | None], frames_elapsed: int = 1) -> Tuple[Tuple | None, List[int]]:
+        """(융합된 코트 좌표 또는 None, 사용한 뷰 번호 목록)"""
+        views = [i for i, p in enumerate(points) if p is not None]
+        if not views:
+            self.missing += frames_elapsed
+            if self.missing > self.max_gap:
+                self.reset()
+            return None, []
+
+        xy = np.array([points[i] for i in views], dtype=np.float64)
+        if len(views) > 1 and np.linalg.norm(xy.max(axis=0) - xy.min(axis=0)) > self.max_disagreement:
+            if self.position is not None:
+                predicted = self.position + self.velocity * (frames_elapsed + self.missing)
+                anchor = int(np.argmin(np.linalg.norm(xy - predicted, axis=1)))
+            else:
+                anchor = 0
+            agree = np.linalg.norm(xy - xy[anchor], axis=1) <= self.max_disagreement
+            views = [v for v, ok in zip(views, agree) if ok]
+            xy = xy[agree]
+
+        w = self.weights[views]
+        fused = (xy * w).sum(axis=0) / w.sum(axis=0)
+        if self.position is not None:
+            self.velocity = (fused - self.position) / (frames_elapsed + self.missing)
+        self.position = fused
+        self.missing = 0
+        return (float(fused[0]), float(fused[1])), views
+
+
+class MultiViewAnalysis:
+    """
+    같은 코트를 찍은 여러 카메라 영상(베이스라인, 사이드 등)을 동시에 분석하고 공 궤적을 코트 좌표에서 합칩니다.
+
+    1. analyze(): 뷰마다 JobScheduler 작업 하나 → 뷰별 워커 프로세스에서 각자의 분석기/코트 호모그래피로
+       분석 (결과는 뷰별 ResultsCache, 중단 후 다시 실행하면 이어서). 뷰 수만큼 워커를 띄우므로
+       코어가 충분하면 전체 시간은 뷰 하나 분석 시간과 비슷함
+    2. fuse(): 기준 뷰의 프레임마다 같은 시각의 다른 뷰 프레임을 찾아 코트 좌표를 TrackFuser 로 합치고,
+       합친 궤적으로 속도/바운스를 다시 계산 (TennisAnalyzerCore.update_position). 이미지 좌표는 기준 뷰의
+       호모그래피로 역변환하므로 바운스 기록은 기준 영상 위 비율 좌표 (오버레이/코트 맵 그대로 사용)
+
+    offsets: 뷰별로 그 영상의 0초가 공통 시간축에서 몇 초인지 (먼저 녹화를 시작한 카메라가 0).
+    rotations/mirrors: 뷰의 코트 좌표를 기준 뷰 방향으로 돌리는 값 (to_reference_court 참고).
+    auto_align: 위 변환 뒤에 남는 뷰별 코트 검출 차이를 estimate_alignment 로 맞춤.
+    """
+
+    def __init__(self, video_paths: List[str], settings: Dict[str, Any], offsets: List[float] | None = None,
+                 rotations: List[int] | None = None, mirrors: List[bool] | None = None,
+                 weights: List[Tuple[float, float]] | None = None, reference: int = 0,
+                 max_disagreement: float = 0.08, auto_align: bool = True):
+        n = len(video_paths)
+        self.video_paths = list(video_paths)
+        self.settings = dict(settings)
+        self.offsets = list(offsets) if offsets is not None else [0.0] * n
+        self.rotations = list(rotations) if rotations is not None else [0] * n
+        self.mirrors = list(mirrors) if mirrors is not None else [False] * n
+        self.weights = weights
+        self.reference = reference
+        self.max_disagreement = max_disagreement
+        self.auto_align = auto_align
+        self.alignments: List[np.ndarray | None] = [None] * n
+        for name, values in (("offsets", self.offsets), ("rotations", self.rotations), ("mirrors", self.mirrors)):
+            if len(values) != n:
+                raise ValueError(f"{name} has {len(values)} entries for {n} views")
+        self.jobs = []
+
+    def analyze(self, workers: int | None = None, preset: str = "batch", cpus: int | None = None,
+                pin: bool = False, on_update: Callable[[List], None] | None = None, poll: float = 0.5) -> bool:
+        """뷰별 분석을 동시에 실행하고 끝날 때까지 기다림. 모든 뷰가 끝났으면 True."""
+        scheduler = JobScheduler(workers=workers or len(self.video_paths), preset=preset, cpus=cpus, pin=pin)
+        try:
+            self.jobs = [scheduler.submit(path, self.settings) for path in self.video_paths]
+            while scheduler.active_jobs():
+                time.sleep(poll)
+                if on_update is not None:
+                    on_update(self.jobs)
+        finally:
+            scheduler.shutdown()
+        return all(job.status == DONE for job in self.jobs)
+
+    def _reference_analyzer(self, fps: float):
+        """기준 뷰의 코트 호모그래피만 가진 분석기 (검출 모델은 로드하지 않음)"""
+        from .analysis_core import TennisAnalyzerCore
+        analyzer = TennisAnalyzerCore(dict(self.settings, fps=fps), load_model=False)
+        cap = cv2.VideoCapture(self.video_paths[self.reference])
+        try:
+            for _ in range(int(fps)): # 처음 1초 안에서 코트가 잡히는 프레임을 찾음
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                analyzer._update_court(frame)
+                if analyzer.court_lines_detected:
+                    break
+        finally:
+            cap.release()
+        return analyzer
+
+    def fuse(self) -> Dict[str, Any]:
+        """저장된 뷰별 결과를 합쳐서 기준 뷰 캐시 폴더의 multiview/results.jsonl 에 쓰고 요약을 반환"""
+        views = []
+        for path in self.video_paths:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                raise IOError(f"Failed to open video: {path}")
+            views.append({"fps": cap.get(cv2.CAP_PROP_FPS) or 30.0,
+                          "total": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                          "size": (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+                          "records": ResultsCache(path).records})
+            cap.release()
+        ref = views[self.reference]
+        # 기준 뷰를 0 번으로: 엇갈릴 때 예측이 없으면 기준 뷰를 믿음
+        order = [self.reference] + [i for i in range(len(views)) if i != self.reference]
+        weights = [self.weights[i] for i in order] if self.weights is not None else None
+
+        analyzer = self._reference_analyzer(ref["fps"])
+        fuser = TrackFuser(len(views), weights, self.max_disagreement)
+        output = ResultsCache(self.video_paths[self.reference],
+                              cache_dir=os.path.join(cache_dir_for(self.video_paths[self.reference]), FUSED_DIR))
+        output.clear()
+
+        # 기준 뷰 프레임마다 같은 시각의 뷰별 코트 좌표 (기준 방향으로 돌린 값)
+        samples = []
+        for frame_idx in range(ref["total"]):
+            t = self.offsets[self.reference] + frame_idx / ref["fps"]
+            points = []
+            for i, view in enumerate(views):
+                record = view["records"].get(int(round((t - self.offsets[i]) * view["fps"])))
+                court = record.get("ball_pos_court") if record else None
+                points.append(to_reference_court(court, self.rotations[i], self.mirrors[i]) if court is not None else None)
+            samples.append(points)
+        seen = [sum(1 for points in samples if points[i] is not None) for i in range(len(views))]
+
+        if self.auto_align:
+            for i in range(len(views)):
+                if i == self.reference:
+                    continue
+                pairs = [(points[i], points[self.reference]) for points in samples
+                         if points[i] is not None and points[self.reference] is not None]
+                M = estimate_alignment([p for p, _ in pairs], [r for _, r in pairs], self.max_disagreement / 2)
+                self.alignments[i] = M
+                if M is None:
+                    print(f"Multi-view: not enough shared ball sightings to align view {i}; using its court frame as is")
+                    continue
+                for points in samples:
+                    if points[i] is not None:
+                        x, y = points[i]
+                        points[i] = (float(M[0, 0] * x + M[0, 1] * y + M[0, 2]), float(M[1, 0] * x + M[1, 1] * y + M[1, 2]))
+
+        width, height = ref["size"]
+        fused_frames = 0
+        bounce_count = 0
+        try:
+            for frame_idx, points in enumerate(samples):
+                elapsed = analyzer._advance_to(frame_idx)
+                court, used = fuser.fuse([points[i] for i in order], elapsed)
+                ratio = None
+                if court is not None:
+                    fused_frames += 1
+                    if analyzer.H_matrix is not None:
+                        ratio = analyzer._transform_court_to_point(court, width, height)
+                    else:
+                        own = ref["records"].get(frame_idx) or {}
+                        ratio = own.get("ball_pos_ratio")
+                stats = analyzer.update_position(ratio, court, frame_idx, elapsed)
+                output.put(frame_idx, dict(record_from_stats(ratio, stats, bounce_count), views=[order[v] for v in used]))
+                bounce_count = stats["bounce_count"]
+        finally:
+            output.close()
+
+        total = max(1, ref["total"])
+        return {
+            "frames": ref["total"],
+            "coverage": [n / total for n in seen], # 뷰별: 기준 뷰 프레임 중 그 뷰에서 공 코트 좌표가 있던 비율
+            "fused_coverage": fused_frames / total,
+            "bounces": bounce_count,
+            "alignments": [M.tolist() if M is not None else None for M in self.alignments],
+            "view_bounces": [sum(1 for r in v["records"].values() if r.get("bounce")) for v in views],
+            "results_path": output.path,
+        }
+
+    def run(self, **analyze_kwargs) -> Dict[str, Any]:
+        if not self.analyze(**analyze_kwargs):
+            failed = [f"{job.video_path}: {job.status} {job.error or ''}" for job in self.jobs if job.status != DONE]
+            raise RuntimeError("View analysis did not finish: " + "; ".join(failed))
+        return self.fuse()
@@ -0,0 +1,171 @@
+import heapq
+import queue
+import threading
+from typing import Any, Callable, Iterable, List
+
+_END = object()
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class Pipeline:
+    """
+    Source -> Stage -> ... -> Sink 로 이어지는 스레드 파이프라인.
+
+    각 단계 사이에는 크기가 제한된 큐가 있어 빠른 단계가 느린 단계를 무한정 앞서가지 않는다
+    (backpressure). 여러 워커를 쓰는 단계는 출력 순서를 다시 맞춘 뒤 다음 단계로 넘기므로,
+    Sink는 항상 Source 순서대로 항목을 받는다. OpenCV/torch 연산은 GIL을 놓기 때문에
+    디코딩·추론·그리기·인코딩이 실제로 겹쳐서 실행된다.
+    """
+
+    def __init__(self, queue_size: int = 8, cancel_event: threading.Event | None = None):
+        self.queue_size = queue_size
+        self.cancel_event = cancel_event  # 외부에서 취소를 요청하는 이벤트 (선택)
+        self._stop = threading.Event()
+        self._source: Callable[[], Iterable[Any]] | None = None
+        self._stages: List[tuple] = []
+        self._sink: Callable[[Any], None] | None = None
+        self._error: BaseException | None = None
+        self._error_lock = threading.Lock()
+
+    def source(self, fn: Callable[[], Iterable[Any]]):
+        self._source = fn
+        return self
+
+    def stage(self, name: str, fn: Callable[[Any], Any], workers: int = 1):
+        self._stages.append((name, fn, max(1, workers)))
+        return self
+
+    def sink(self, fn: Callable[[Any], None]):
+        self._sink = fn
+        return self
+
+    def cancel(self):
+        self._stop.set()
+
+    def _stopped(self) -> bool:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self._stop.set()
+        return self._stop.is_set()
+
+    # ---- internals ------------------------------------------------------
+
+    def _fail(self, exc: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = exc
+        self._stop.set()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stopped():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stopped():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _run_source(self, out_q: queue.Queue):
+        try:
+            for seq, item in enumerate(self._source()):
+                if not self._put(out_q, (seq, item)):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _END)
+
+    def _run_worker(self, fn, in_q: queue.Queue, out_q: queue.Queue):
+        try:
+            while True:
+                entry = self._get(in_q)
+                if entry is _END:
+                    # 같은 큐를 공유하는 다른 워커들도 종료되도록 다시 넣어준다
+                    self._put(in_q, _END)
+                    break
+                seq, item = entry
+                if not self._put(out_q, (seq, fn(item))):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _END)
+
+    def _run_reorder(self, in_q: queue.Queue, out_q: queue.Queue, n_workers: int):
+        """워커 여러 개의 출력을 seq 순서대로 다시 정렬"""
+        heap, next_seq, ended = [], 0, 0
+        try:
+            while ended < n_workers:
+                entry = self._get(in_q)
+                if entry is _END:
+                    if self._stopped():
+                        return
+                    ended += 1
+                    continue
+                heapq.heappush(heap, entry)
+                while heap and heap[0][0] == next_seq:
+                    if not self._put(out_q, heapq.heappop(heap)):
+                        return
+                    next_seq += 1
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _END)
+
+    def run(self):
+        """
+        파이프라인을 실행하고 모든 항목이 Sink에 도달할 때까지 블록한다.
+        단계에서 난 예외는 그대로 다시 던지고, 외부 취소 시 PipelineCancelled를 던진다.
+        """
+        if self._source is None or self._sink is None:
+            raise ValueError("Pipeline needs a source and a sink")
+
+        threads = []
+        q = queue.Queue(self.queue_size)
+        threads.append(threading.Thread(target=self._run_source, args=(q,), name="source", daemon=True))
+
+        for name, fn, workers in self._stages:
+            out_q = queue.Queue(self.queue_size)
+            if workers == 1:
+                threads.append(threading.Thread(target=self._run_worker, args=(fn, q, out_q),
+                                                name=name, daemon=True))
+            else:
+                unordered = queue.Queue(self.queue_size * workers)
+                for i in range(workers):
+                    threads.append(threading.Thread(target=self._run_worker, args=(fn, q, unordered),
+                                                    name=f"{name}-{i}", daemon=True))
+                threads.append(threading.Thread(target=self._run_reorder, args=(unordered, out_q, workers),
+                                                name=f"{name}-reorder", daemon=True))
+            q = out_q
+
+        for t in threads:
+            t.start()
+
+        try:
+            while True:
+                entry = self._get(q)
+                if entry is _END:
+                    break
+                self._sink(entry[1])
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            cancelled = self._stopped()
+            self._stop.set()
+            for t in threads:
+                t.join()
+
+        if self._error is not None:
+            raise self._error
+        if cancelled:
+            raise PipelineCancelled()
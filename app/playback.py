@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any, List, Tuple
+
+import cv2
+
+from .frame_timing import frame_timestamp
+from .profiling import PROFILER
+
+
+class PresentationClock:
+    """
+    재생 위치(초)를 알려주는 단일 시계. 화면 프레임은 이 시계에 맞춰 표시합니다.
+
+    기본은 monotonic 시간 (time.perf_counter). audio_position (현재 오디오 위치, 초 또는 None)을 주면
+    오디오가 기준: monotonic 으로 내삽하다가 오디오 위치와 max_drift 넘게 벌어지면 오디오 위치로 다시 맞춤.
+    (QMediaPlayer.position() 은 수십 ms 단위로만 바뀌므로 매번 그대로 쓰지 않고 내삽함)
+    """
+
+    def __init__(self, audio_position: Callable[[], float | None] | None = None, max_drift: float = 0.08,
+                 monotonic: Callable[[], float] = time.perf_counter):
+        self.audio_position = audio_position
+        self.max_drift = max_drift
+        self.monotonic = monotonic
+        self.running = False
+        self._anchor_position = 0.0
+        self._anchor_time = monotonic()
+        self.resyncs = 0 # 오디오에 다시 맞춘 횟수
+
+    def start(self):
+        if not self.running:
+            self._anchor_time = self.monotonic()
+            self.running = True
+
+    def pause(self):
+        if self.running:
+            self._anchor_position = self.now()
+            self.running = False
+
+    def seek(self, position: float):
+        self._anchor_position = position
+        self._anchor_time = self.monotonic()
+
+    def now(self) -> float:
+        if not self.running:
+            return self._anchor_position
+        position = self._anchor_position + (self.monotonic() - self._anchor_time)
+        audio = self.audio_position() if self.audio_position is not None else None
+        if audio is not None and abs(audio - position) > self.max_drift:
+            self.seek(audio)
+            self.resyncs += 1
+            position = audio
+        return position
+
+
+class FrameDecoder:
+    """
+    재생용 decode-ahead 스레드: cap 에서 (frame_idx, frame, timestamp) 를 최대 ahead 개까지 미리 읽어 둡니다.
+
+    cap 은 이 스레드만 만짐. seek()/skip_to() 는 요청만 남기고 스레드가 다음 읽기 전에 적용하며,
+    seek 전에 읽기 시작한 프레임은 generation 이 달라서 버려집니다.
+    """
+
+    def __init__(self, cap, ahead: int = 4):
+        self.cap = cap
+        self.ahead = ahead
+        self.ended = False
+        self.frames_skipped = 0 # 디코딩이 늦어서 grab 으로 건너뛴 프레임
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._seek_to = None
+        self._skip_to = None
+        self._generation = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="frame-decoder", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and self._seek_to is None and self._skip_to is None \
+                        and (self.ended or len(self._queue) >= self.ahead):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                seek_to, self._seek_to = self._seek_to, None
+                skip_to, self._skip_to = self._skip_to, None
+                generation = self._generation
+
+            if seek_to is not None:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, seek_to)
+            frame_idx = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+            while skip_to is not None and frame_idx < skip_to and self.cap.grab():
+                frame_idx += 1
+                self.frames_skipped += 1
+            with PROFILER.stage("decode"):
+                ret, frame = self.cap.read()
+            timestamp = frame_timestamp(self.cap) if ret else None
+
+            with self._cond:
+                if generation != self._generation:
+                    continue # 읽는 동안 seek 됨
+                if ret:
+                    self._queue.append((frame_idx, frame, timestamp))
+                else:
+                    self.ended = True
+                self._cond.notify_all()
+
+    def seek(self, frame_idx: int):
+        with self._cond:
+            self._queue.clear()
+            self._seek_to = frame_idx
+            self._skip_to = None
+            self.ended = False
+            self._generation += 1
+            self._cond.notify_all()
+
+    def skip_to(self, frame_idx: int):
+        """디코딩이 재생을 못 따라갈 때: frame_idx 전까지의 프레임은 디코딩하지 않고 넘김"""
+        with self._cond:
+            if not self._queue and self._seek_to is None:
+                self._skip_to = frame_idx
+                self._cond.notify_all()
+
+    def peek(self) -> Tuple[int, Any, float | None] | None:
+        with self._cond:
+            return self._queue[0] if self._queue else None
+
+    def pop(self) -> Tuple[int, Any, float | None] | None:
+        with self._cond:
+            item = self._queue.popleft() if self._queue else None
+            self._cond.notify_all()
+            return item
+
+    def get(self, timeout: float = 1.0) -> Tuple[int, Any, float | None] | None:
+        """다음 프레임을 기다려서 꺼냄 (정지 상태에서 seek 한 위치를 바로 보여줄 때)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or (self.ended and self._seek_to is None), timeout)
+            item = self._queue.popleft() if self._queue else None
+            self._cond.notify_all()
+            return item
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._queue.clear()
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+
+
+class FrameScheduler:
+    """
+    시계가 가리키는 시각에 보여줄 프레임을 고릅니다. 프레임 표시 시각은 timestamp (PTS, 초)가 있으면 그것,
+    없으면 frame_idx / fps. 이미 표시 시각이 지난 프레임 뒤에 다음 프레임도 때가 됐으면 앞 프레임은 버림
+    (늦은 프레임을 차례로 다 보여주면 그만큼 계속 밀리므로).
+
+    디코딩까지 두 프레임 넘게 밀리면 decoder.skip_to() 로 그 사이 프레임은 디코딩도 하지 않음.
+
+    통계: presented, dropped (디코딩했지만 버린 프레임), late (보여줬지만 반 프레임 넘게 늦음), 최대 지연.
+    """
+
+    def __init__(self, fps: float, tolerance: float = 0.002):
+        self.fps = fps or 30.0
+        self.tolerance = tolerance # 타이머 오차: 이만큼 이르면 그냥 보여줌
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.frames_presented = 0
+        self.frames_dropped = 0
+        self.frames_late = 0
+        self.max_late_ms = 0.0
+
+    def due_time(self, frame_idx: int, timestamp: float | None) -> float:
+        return timestamp if timestamp is not None else frame_idx / self.fps
+
+    def take(self, decoder: FrameDecoder, now: float) -> Tuple[Tuple | None, List[Tuple], float]:
+        """
+        (보여줄 프레임 또는 None, 버린 프레임 목록, 다음 프레임까지 남은 초).
+        버린 프레임도 디코딩은 끝났으므로 분석에는 넘길 수 있음.
+        """
+        frame_period = 1.0 / self.fps
+        item = decoder.peek()
+        if item is None:
+            return None, [], frame_period / 4 # 디코더가 아직 못 채움
+        wait = self.due_time(item[0], item[2]) - now
+        if wait > self.tolerance:
+            return None, [], wait
+
+        item = decoder.pop()
+        dropped = []
+        while True:
+            following = decoder.peek()
+            if following is None or self.due_time(following[0], following[2]) - now > self.tolerance:
+                break
+            dropped.append(item)
+            item = decoder.pop()
+        self.frames_dropped += len(dropped)
+        self.frames_presented += 1
+
+        late_ms = (now - self.due_time(item[0], item[2])) * 1000
+        if late_ms > frame_period * 500:
+            self.frames_late += 1
+        self.max_late_ms = max(self.max_late_ms, late_ms)
+        PROFILER.record_ms("present_late", max(0.0, late_ms))
+
+        following = decoder.peek()
+        if following is None and late_ms > 2000 * frame_period:
+            # 디코딩 자체가 밀림: 지금 시각까지의 프레임은 디코딩하지 않고 넘어감
+            decoder.skip_to(item[0] + 1 + int(late_ms / 1000 * self.fps))
+        wait = self.due_time(following[0], following[2]) - now if following is not None else frame_period
+        return item, dropped, max(0.0, wait)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"frames_presented": self.frames_presented, "frames_dropped": self.frames_dropped,
+                "frames_late": self.frames_late, "max_late_ms": self.max_late_ms}
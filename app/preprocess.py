@@ -0,0 +1,131 @@
+import threading
+import cv2
+import numpy as np
+from typing import Tuple
+
+from .profiling import PROFILER
+
+LETTERBOX_FILL = 114 # ultralytics 와 같은 패딩 색
+
+
+def fit_size(frame_shape, target_size: Tuple[int, int]) -> Tuple[int, int]:
+    """frame 비율을 유지하면서 target_size(w, h) 안에 들어가는 (w, h). 확대는 하지 않음."""
+    frame_height, frame_width = frame_shape[:2]
+    scale = min(target_size[0] / frame_width, target_size[1] / frame_height, 1.0)
+    return max(1, int(round(frame_width * scale))), max(1, int(round(frame_height * scale)))
+
+
+class ModelInput:
+    """
+    모델에 바로 넣을 수 있는 입력 하나 (또는 배치)와, 결과 박스를 원본 프레임 좌표로 되돌리는 정보.
+    tensor: (B, 3, H, W) float32, RGB, 0~1, C-contiguous — torch.from_numpy() 로 복사 없이 넘김
+    """
+    __slots__ = ("tensor", "scale", "pad", "frame_shape")
+
+    def __init__(self, tensor: np.ndarray, scale: float, pad: Tuple[int, int], frame_shape):
+        self.tensor = tensor
+        self.scale = scale
+        self.pad = pad # (left, top)
+        self.frame_shape = tuple(frame_shape)
+
+    def to_frame_coords(self, detections: np.ndarray) -> np.ndarray:
+        """모델 입력 좌표의 박스 (N, 4+)를 원본 프레임 좌표로"""
+        if len(detections) == 0:
+            return detections
+        detections = detections.copy()
+        detections[:, [0, 2]] = (detections[:, [0, 2]] - self.pad[0]) / self.scale
+        detections[:, [1, 3]] = (detections[:, [1, 3]] - self.pad[1]) / self.scale
+        frame_height, frame_width = self.frame_shape[:2]
+        detections[:, [0, 2]] = np.clip(detections[:, [0, 2]], 0, frame_width)
+        detections[:, [1, 3]] = np.clip(detections[:, [1, 3]], 0, frame_height)
+        return detections
+
+
+class FramePreprocessor:
+    """
+    디코딩 단계에서 모델 입력을 바로 만드는 전처리기 (letterbox + BGR→RGB + HWC→CHW + /255 를 한 번에).
+
+    ultralytics predictor 가 프레임마다 하던 letterbox/변환/정규화를 디코드 스레드로 옮기고,
+    미리 할당한 연속 버퍼에 써서 프레임마다 새 배열을 만들지 않습니다.
+    - 입력 크기는 ultralytics 의 rect 추론과 같게 긴 변을 imgsz 에 맞추고 짧은 변은 stride 배수로만 패딩
+    - slots 개의 버퍼를 돌려 쓰므로, 파이프라인에서 큐에 대기 중인 입력이 덮어써지지 않게
+      slots 를 (큐 크기 + 처리 중인 개수)보다 크게 잡아야 함
+    - batch > 1 이면 process_batch() 로 (B, 3, H, W) 를 한 번에 채움
+    - display_size 를 주면 같은 디코드 단계에서 표시용으로 줄인 프레임도 같이 만듦
+    """
+
+    def __init__(self, imgsz: int = 640, stride: int = 32, slots: int = 4, batch: int = 1,
+                 display_size: Tuple[int, int] | None = None):
+        self.imgsz = imgsz
+        self.stride = stride
+        self.slots = max(1, slots)
+        self.batch = max(1, batch)
+        self.display_size = display_size
+        self._frame_shape = None
+        self._buffers = [] # slot -> (B, 3, H, W) float32
+        self._resized = None # 리사이즈 중간 버퍼 (nh, nw, 3) uint8
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+    def _layout(self, frame_shape):
+        """원본 크기에 맞춰 scale/패딩/버퍼를 (다시) 계산. 영상 크기가 바뀔 때만 할당."""
+        frame_height, frame_width = frame_shape[:2]
+        scale = min(self.imgsz / frame_height, self.imgsz / frame_width)
+        new_w, new_h = int(round(frame_width * scale)), int(round(frame_height * scale))
+        out_w = int(np.ceil(new_w / self.stride) * self.stride)
+        out_h = int(np.ceil(new_h / self.stride) * self.stride)
+        left, top = (out_w - new_w) // 2, (out_h - new_h) // 2
+
+        self._frame_shape = tuple(frame_shape)
+        self._scale = scale
+        self._pad = (left, top)
+        self._new_size = (new_w, new_h)
+        self._resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self._buffers = []
+        for _ in range(self.slots):
+            buf = np.empty((self.batch, 3, out_h, out_w), dtype=np.float32)
+            buf.fill(LETTERBOX_FILL / 255.0) # 패딩 영역은 한 번만 채움
+            self._buffers.append(buf)
+
+    def _fill(self, buf: np.ndarray, index: int, frame: np.ndarray):
+        cv2.resize(frame, self._new_size, dst=self._resized, interpolation=cv2.INTER_LINEAR)
+        left, top = self._pad
+        new_w, new_h = self._new_size
+        # BGR(HWC) -> RGB(CHW) 와 /255 를 한 번의 곱셈으로 버퍼에 바로 씀
+        np.multiply(self._resized[:, :, ::-1].transpose(2, 0, 1), np.float32(1.0 / 255.0),
+                    out=buf[index, :, top:top + new_h, left:left + new_w], casting='unsafe')
+
+    def _take_slot(self, frame_shape) -> np.ndarray:
+        if self._frame_shape != tuple(frame_shape):
+            self._layout(frame_shape)
+        buf = self._buffers[self._next_slot]
+        self._next_slot = (self._next_slot + 1) % self.slots
+        return buf
+
+    def process(self, frame: np.ndarray) -> Tuple[ModelInput, np.ndarray | None]:
+        """프레임 하나 → (ModelInput (1, 3, H, W), 표시용 프레임 또는 None)"""
+        with self._lock, PROFILER.stage("preprocess"):
+            buf = self._take_slot(frame.shape)
+            self._fill(buf, 0, frame)
+            model_input = ModelInput(buf[:1], self._scale, self._pad, frame.shape)
+        return model_input, self._display(frame)
+
+    def process_batch(self, frames) -> ModelInput:
+        """같은 크기의 프레임들(최대 batch 개) → ModelInput (len(frames), 3, H, W)"""
+        if not 0 < len(frames) <= self.batch:
+            raise ValueError(f"Expected 1..{self.batch} frames, got {len(frames)}")
+        with self._lock, PROFILER.stage("preprocess"):
+            buf = self._take_slot(frames[0].shape)
+            for i, frame in enumerate(frames):
+                if frame.shape != frames[0].shape:
+                    raise ValueError("All frames in a batch must have the same shape")
+                self._fill(buf, i, frame)
+            return ModelInput(buf[:len(frames)], self._scale, self._pad, frames[0].shape)
+
+    def _display(self, frame: np.ndarray) -> np.ndarray | None:
+        if self.display_size is None:
+            return None
+        size = fit_size(frame.shape, self.display_size)
+        if size == (frame.shape[1], frame.shape[0]):
+            return frame
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
@@ -0,0 +1,99 @@
+from typing import Callable, List, Tuple
+
+from .results_cache import ResultsCache, record_from_stats
+
+DEFAULT_PREVIEW_STRIDE = 5
+
+
+class PreviewPass:
+    """
+    빠른 1차 분석: k 프레임마다 한 번만 공을 검출하고, 사이 프레임은 두 키프레임 사이의
+    코트 좌표 궤적을 선형 보간해서 채웁니다 (이미지 좌표는 호모그래피 역변환으로 계산).
+
+    건너뛴 프레임은 디코딩하지 않고(grab) 보간된 위치도 _process_ball_position을 그대로 거치므로,
+    바운스 맵과 속도가 전체 분석의 일부 비용으로 먼저 나옵니다.
+    결과는 "preview": true 로 캐시에 기록되고, 이후 전체 프레임 분석(refine)이 같은 프레임을 덮어씁니다.
+    """
+
+    def __init__(self, analyzer, cache: ResultsCache, stride: int = DEFAULT_PREVIEW_STRIDE, conf: float = 0.25):
+        self.analyzer = analyzer
+        self.cache = cache
+        self.stride = max(2, stride)
+        self.conf = conf
+        self.frames_detected = 0
+
+    def run(self, cap, start_idx: int = 0, on_frame: Callable[[int], bool] | None = None) -> int:
+        """
+        cap의 현재 위치(start_idx)부터 끝까지 preview 결과를 캐시에 씁니다.
+        on_frame(next_frame_idx)이 False를 돌려주면 중단. 다음에 처리할 프레임 번호를 반환합니다.
+        """
+        analyzer = self.analyzer
+        analyzer.resync(start_idx, self.cache.records_before(start_idx, analyzer.trajectory_buffer.maxlen))
+
+        frame_idx = start_idx
+        prev_key = None # (frame_idx, ratio, court)
+        gap: List[int] = [] # 다음 키프레임에서 보간할 프레임 번호
+        frame_shape = None
+        while True:
+            is_key = (frame_idx - start_idx) % self.stride == 0
+            if is_key:
+                ret, frame = cap.read()
+            else:
+                ret = cap.grab() # 디코딩 없이 건너뜀
+            if not ret:
+                break
+
+            if is_key:
+                frame_shape = frame.shape
+                if not analyzer.court_lines_detected:
+                    with analyzer.profiler.stage("court_detect"):
+                        analyzer._update_court(frame)
+                detections = analyzer._detect_ball(frame, self.conf)
+                ratio, court = analyzer._locate_ball(detections, frame_shape, frame_idx)
+                if analyzer.ball_tracker.reacquired:
+                    prev_key = None # 다른 물체일 수 있는 직전 키프레임과는 보간하지 않음
+                key = (frame_idx, ratio, court)
+                self._store_segment(prev_key, gap, key, frame_shape)
+                self.frames_detected += 1
+                prev_key, gap = key, []
+            else:
+                gap.append(frame_idx)
+
+            frame_idx += 1
+            if on_frame is not None and on_frame(frame_idx) is False:
+                return frame_idx - len(gap)
+
+        # 마지막 키프레임 뒤에 남은 프레임은 보간할 끝점이 없음 (공 없음으로 기록, refine에서 채움)
+        for idx in gap:
+            self._store(idx, None, None)
+        self.cache.flush()
+        return frame_idx
+
+    def _store_segment(self, prev_key, gap: List[int], key, frame_shape):
+        for idx in gap:
+            ratio, court = self._interpolate(prev_key, key, idx, frame_shape)
+            self._store(idx, ratio, court)
+        self._store(key[0], key[1], key[2])
+
+    def _interpolate(self, start, end, frame_idx: int, frame_shape) -> Tuple:
+        """두 키프레임 사이 frame_idx의 (ratio, court). 한쪽이라도 공이 없으면 (None, None)"""
+        if start is None or start[1] is None or end[1] is None:
+            return None, None
+        t = (frame_idx - start[0]) / (end[0] - start[0])
+
+        if start[2] is not None and end[2] is not None:
+            court = (start[2][0] + t * (end[2][0] - start[2][0]),
+                     start[2][1] + t * (end[2][1] - start[2][1]))
+            frame_height, frame_width = frame_shape[:2]
+            return self.analyzer._transform_court_to_point(court, frame_width, frame_height), court
+
+        # 코트가 아직 검출되지 않았으면 이미지 좌표로만 보간
+        ratio = (start[1][0] + t * (end[1][0] - start[1][0]),
+                 start[1][1] + t * (end[1][1] - start[1][1]))
+        return ratio, None
+
+    def _store(self, frame_idx: int, ratio, court):
+        analyzer = self.analyzer
+        prev_count = len(analyzer.bounce_history)
+        stats = analyzer.update_position(ratio, court, frame_idx, analyzer._advance_to(frame_idx))
+        self.cache.put(frame_idx, dict(record_from_stats(ratio, stats, prev_count), preview=True))
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Dict
+
+# 파이프라인 단계 이름 (표시 순서)
+STAGE_NAMES = ["decode", "court_detect", "preprocess", "inference", "tracking",
+               "post_process", "render", "display", "glass_to_stats"]
+
+
+class RollingHistogram:
+    """최근 N개 측정값(ms)을 고정 크기 링 버퍼에 보관하고 백분위수를 계산"""
+
+    def __init__(self, size: int = 512):
+        self.values = np.zeros(size, dtype=np.float64)
+        self.size = size
+        self.count = 0  # 누적 측정 횟수 (링 버퍼 크기보다 클 수 있음)
+
+    def add(self, value_ms: float):
+        self.values[self.count % self.size] = value_ms
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        window = self.values[:min(self.count, self.size)]
+        if len(window) == 0:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(window, [50, 95, 99])
+        return {
+            "count": self.count,
+            "last_ms": float(self.values[(self.count - 1) % self.size]),
+            "mean_ms": float(window.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(window.max()),
+        }
+
+
+class _StageScope:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record_ns(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullScope:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class Profiler:
+    """
+    단계별 monotonic 타이머.
+
+        with PROFILER.stage("inference"):
+            ...
+
+    단계마다 RollingHistogram 으로 집계하고(stats 의 'timings'), 최근 이벤트는 링 버퍼에 남겨
+    Chrome trace 형식(chrome://tracing, Perfetto)으로 내보낼 수 있다.
+    """
+
+    def __init__(self, window: int = 512, max_trace_events: int = 100_000, enabled: bool = True):
+        self.enabled = enabled
+        self.window = window
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.events = deque(maxlen=max_trace_events)  # (name, start_ns, dur_ns, thread_id)
+        self._lock = threading.Lock()
+        self._summary_cache = None
+        self._summary_time = 0.0
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _StageScope(self, name)
+
+    def record_ns(self, name: str, start_ns: int, dur_ns: int):
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(name, RollingHistogram(self.window))
+        hist.add(dur_ns / 1e6)
+        self.events.append((name, start_ns, dur_ns, threading.get_ident()))
+
+    def record_ms(self, name: str, dur_ms: float, end_ns: int | None = None):
+        """외부에서 측정된 시간(예: ultralytics results.speed)을 기록"""
+        if not self.enabled:
+            return
+        dur_ns = int(dur_ms * 1e6)
+        end_ns = end_ns if end_ns is not None else time.perf_counter_ns()
+        self.record_ns(name, end_ns - dur_ns, dur_ns)
+
+    def summary(self, max_age: float = 0.5) -> Dict[str, Dict[str, float]]:
+        """
+        단계별 집계. 매 프레임 호출돼도 백분위수 계산은 max_age 초에 한 번만 한다.
+        """
+        now = time.monotonic()
+        if self._summary_cache is None or now - self._summary_time >= max_age:
+            # 다른 스레드가 새 단계를 추가하거나 reset() 이 dict 를 바꿔도 안전하도록 스냅샷을 떠서 계산
+            with self._lock:
+                histograms = dict(self.histograms)
+            names = sorted(histograms, key=lambda n: STAGE_NAMES.index(n) if n in STAGE_NAMES else len(STAGE_NAMES))
+            self._summary_cache = {name: histograms[name].summary() for name in names}
+            self._summary_time = now
+        return self._summary_cache
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.events.clear()
+            self._summary_cache = None
+
+    def export_chrome_trace(self, path: str) -> int:
+        """기록된 이벤트를 Chrome trace JSON으로 저장하고 이벤트 수를 반환"""
+        pid = os.getpid()
+        events = [{
+            "name": name, "cat": "tennis_ai", "ph": "X",
+            "ts": start_ns / 1000.0, "dur": dur_ns / 1000.0,
+            "pid": pid, "tid": tid,
+        } for name, start_ns, dur_ns, tid in list(self.events)]
+        thread_names = {t.ident: t.name for t in threading.enumerate()}
+        for tid in {e["tid"] for e in events}:
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": thread_names.get(tid, str(tid))}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+# 프로세스 전체에서 공유하는 기본 프로파일러 (분석기, 디코더, 렌더러가 같이 씀)
+PROFILER = Profiler()
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import cv2
+import numpy as np
+from typing import Callable, Dict, Any
+
+from .pipeline import PipelineCancelled
+from .results_cache import cache_dir_for, video_signature
+
+PROXY_NAME = "proxy.avi"
+THUMBS_NAME = "thumbs.jpg"
+PROXY_META_NAME = "proxy.json"
+THUMB_COLUMNS = 32 # 썸네일 시트의 한 줄 칸 수 (JPEG 은 한 변이 65535 px 까지라 한 줄로 이어 붙이지 않음)
+
+_build_locks: Dict[str, threading.Lock] = {} # 같은 영상의 프록시를 두 위젯이 동시에 만들지 않도록
+_build_locks_guard = threading.Lock()
+
+
+class ProxyMedia:
+    """
+    스크러빙용 저해상도 프록시와 타임라인 썸네일 스트립 (분석 캐시 폴더 <video>.tennis_ai/ 에 저장).
+
+    - proxy.avi: 원본과 프레임 번호가 1:1 인 MJPEG (모든 프레임이 키프레임) → 어느 프레임으로 seek 해도
+      앞 키프레임부터 디코딩할 필요가 없음
+    - thumbs.jpg: thumb_every 프레임마다 하나씩 찍은 썸네일을 THUMB_COLUMNS 칸씩 줄 지어 붙인 시트 한 장
+    - proxy.json: 원본 서명(크기/수정 시각)과 썸네일 배치. 빌드가 끝났을 때만 쓰므로, 이 파일이 원본과
+      맞으면 프록시/썸네일이 완성된 것
+    재생과 분석은 계속 원본을 씁니다 (프록시는 슬라이더를 끄는 동안만).
+    """
+
+    def __init__(self, video_path: str, cache_dir: str | None = None):
+        self.video_path = video_path
+        self.cache_dir = cache_dir or cache_dir_for(video_path)
+        self.proxy_path = os.path.join(self.cache_dir, PROXY_NAME)
+        self.thumbs_path = os.path.join(self.cache_dir, THUMBS_NAME)
+        self.meta_path = os.path.join(self.cache_dir, PROXY_META_NAME)
+        self.meta: Dict[str, Any] | None = None
+        self._cap = None
+        self._strip = None
+
+    @property
+    def ready(self) -> bool:
+        if self.meta is None:
+            try:
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return False
+            if meta.get("video") != video_signature(self.video_path) or not os.path.exists(self.proxy_path):
+                return False
+            self.meta = meta
+        return True
+
+    def read(self, frame_idx: int) -> np.ndarray | None:
+        """프록시에서 frame_idx 프레임 (저해상도). 준비 전이거나 실패하면 None."""
+        if not self.ready:
+            return None
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.proxy_path)
+        self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        ret, frame = self._cap.read()
+        return frame if ret else None
+
+    def thumbnail(self, frame_idx: int) -> np.ndarray | None:
+        """frame_idx 에 가장 가까운 (앞쪽) 썸네일"""
+        if not self.ready:
+            return None
+        if self._strip is None:
+            self._strip = cv2.imread(self.thumbs_path)
+            if self._strip is None:
+                return None
+        width, height = self.meta["thumb_size"]
+        i = min(max(0, frame_idx) // self.meta["thumb_every"], self.meta["thumb_count"] - 1)
+        row, col = divmod(i, THUMB_COLUMNS)
+        return self._strip[row * height:(row + 1) * height, col * width:(col + 1) * width]
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        self._strip = None
+
+
+def build_proxy(video_path: str, height: int = 360, thumb_seconds: float = 5.0, thumb_height: int = 72,
+                progress_callback: Callable[[int, int], None] | None = None,
+                cancel_event: threading.Event | None = None) -> ProxyMedia:
+    """
+    원본을 처음부터 한 번 순서대로 디코딩하면서 (seek 없음) 프록시와 썸네일 스트립을 만듦.
+    이미 원본에 맞는 프록시가 있으면 바로 반환. 임시 파일에 쓰고 끝나면 이름을 바꾸므로
+    중간에 취소되면 (PipelineCancelled) 이전 상태 그대로입니다.
+    """
+    media = ProxyMedia(video_path)
+    with _build_locks_guard:
+        lock = _build_locks.setdefault(media.cache_dir, threading.Lock())
+    while not lock.acquire(timeout=0.2):
+        if cancel_event is not None and cancel_event.is_set():
+            raise PipelineCancelled()
+    try:
+        if media.ready: # 기다리는 동안 다른 스레드가 만들었을 수 있음
+            return media
+        return _build(media, height, thumb_seconds, thumb_height, progress_callback, cancel_event)
+    finally:
+        lock.release()
+
+
+def _build(media: ProxyMedia, height, thumb_seconds, thumb_height, progress_callback, cancel_event) -> ProxyMedia:
+    video_path = media.video_path
+    os.makedirs(media.cache_dir, exist_ok=True)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Failed to open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    src_w, src_h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    scale = min(1.0, height / max(1, src_h))
+    size = (max(2, int(round(src_w * scale / 2)) * 2), max(2, int(round(src_h * scale / 2)) * 2))
+    thumb_size = (max(1, int(round(src_w * thumb_height / max(1, src_h)))), thumb_height)
+    thumb_every = max(1, int(round(fps * thumb_seconds)))
+
+    tmp_proxy = f"{media.proxy_path}.{os.getpid()}.tmp.avi"
+    writer = cv2.VideoWriter(tmp_proxy, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    thumbs = []
+    frame_idx = 0
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PipelineCancelled()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            writer.write(small)
+            if frame_idx % thumb_every == 0:
+                thumbs.append(cv2.resize(small, thumb_size, interpolation=cv2.INTER_AREA))
+            frame_idx += 1
+            if progress_callback is not None and frame_idx % 100 == 0:
+                progress_callback(frame_idx, total)
+    except BaseException:
+        writer.release()
+        if os.path.exists(tmp_proxy):
+            os.remove(tmp_proxy)
+        raise
+    finally:
+        cap.release()
+    writer.release()
+
+    if not thumbs:
+        os.remove(tmp_proxy)
+        raise IOError(f"No frames decoded from: {video_path}")
+    os.replace(tmp_proxy, media.proxy_path)
+    rows = -(-len(thumbs) // THUMB_COLUMNS)
+    sheet = np.zeros((rows * thumb_size[1], min(len(thumbs), THUMB_COLUMNS) * thumb_size[0], 3), dtype=np.uint8)
+    for i, thumb in enumerate(thumbs):
+        row, col = divmod(i, THUMB_COLUMNS)
+        sheet[row * thumb_size[1]:(row + 1) * thumb_size[1], col * thumb_size[0]:(col + 1) * thumb_size[0]] = thumb
+    cv2.imwrite(media.thumbs_path, sheet, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    meta = {"video": video_signature(video_path), "frames": frame_idx, "size": list(size),
+            "thumb_every": thumb_every, "thumb_size": list(thumb_size), "thumb_count": len(thumbs)}
+    with open(media.meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    if progress_callback is not None:
+        progress_callback(frame_idx, total)
+    return media
@@ -0,0 +1,141 @@
+import os
+import re
+from typing import Dict, Any, List
+
+# 품질이 높은 순서의 동작점(operating point) 사다리.
+# model: YOLO 변형 (n/s/m), imgsz: 모델 입력 크기, stride: k 프레임마다 한 번 분석, roi: 공 주변만 검출
+QUALITY_LADDER: List[Dict[str, Any]] = [
+    {"model": "m", "imgsz": 640, "stride": 1, "roi": False},
+    {"model": "s", "imgsz": 640, "stride": 1, "roi": False},
+    {"model": "s", "imgsz": 480, "stride": 1, "roi": False},
+    {"model": "n", "imgsz": 480, "stride": 1, "roi": False},
+    {"model": "n", "imgsz": 480, "stride": 2, "roi": False},
+    {"model": "n", "imgsz": 320, "stride": 2, "roi": True},
+    {"model": "n", "imgsz": 320, "stride": 3, "roi": True},
+]
+
+_VARIANT_RE = re.compile(r'^(yolo\w*?)([nsmlx])(\.\w+)$')
+
+
+def model_variant(model_path: str) -> str | None:
+    """'yolov8m.pt' -> 'm' (YOLO 크기 변형 규칙을 따르지 않는 가중치 파일이면 None)"""
+    match = _VARIANT_RE.match(os.path.basename(model_path))
+    return match.group(2) if match else None
+
+
+def variant_model_path(model_path: str, variant: str) -> str:
+    """같은 폴더/계열에서 크기 변형만 바꾼 가중치 경로: ('weights/yolov8m.pt', 'n') -> 'weights/yolov8n.pt'"""
+    directory, name = os.path.split(model_path)
+    match = _VARIANT_RE.match(name)
+    if not match:
+        return model_path
+    return os.path.join(directory, match.group(1) + variant + match.group(3))
+
+
+def available_ladder(model_path: str, ladder: List[Dict[str, Any]] | None = None) -> List[Dict[str, Any]]:
+    """
+    디스크에 가중치가 있는 크기 변형만 쓰는 사다리. 파일이 없는 변형 단계는 지금 모델로 바꿈
+    (입력 크기/stride/ROI 는 그대로 낮춤) — 없는 가중치를 재생 도중에 YOLO() 가 내려받으면서 멈추지 않도록.
+    바꾼 결과 바로 앞 단계와 같아진 단계는 뺌.
+    """
+    current = model_variant(model_path)
+    result = []
+    for point in ladder or QUALITY_LADDER:
+        if current is not None and point["model"] != current \
+                and not os.path.exists(variant_model_path(model_path, point["model"])):
+            point = dict(point, model=current)
+        if not result or result[-1] != point:
+            result.append(point)
+    return result
+
+
+def start_level_for(model_path: str, ladder: List[Dict[str, Any]] | None = None) -> int:
+    """설정된 모델에 해당하는 가장 높은 품질 단계 (그보다 큰 모델로는 올라가지 않음)"""
+    variant = model_variant(model_path)
+    for level, point in enumerate(ladder or QUALITY_LADDER):
+        if point["model"] == variant:
+            return level
+    return 0
+
+
+class QualityController:
+    """
+    실시간 재생 중 분석 지연을 목표치 안에 유지하도록 동작점을 조절하는 컨트롤러.
+
+    매 분석 프레임마다 observe()로 처리 시간, 큐 대기까지 포함한 지연, 큐 깊이를 받는다.
+    - 처리 시간이 프레임 예산(stride / fps)을 넘거나, 큐가 쌓이거나, 지연이 목표를 넘는 상태가
+      degrade_after 번 이어지면 한 단계 내린다.
+    - 여유가 upgrade_after 번 이어지면 한 단계 올린다 (단계를 바꾼 직후 cooldown 동안은 판단 보류).
+      start_level 보다 높은 품질로는 올라가지 않는다.
+    """
+
+    def __init__(self, fps: float, target_latency_ms: float = 150.0, start_level: int = 0,
+                 degrade_after: int = 5, upgrade_after: int = 60, cooldown: int = 15,
+                 ladder: List[Dict[str, Any]] | None = None, smoothing: float = 0.2):
+        self.fps = fps or 30
+        self.target_latency_ms = target_latency_ms
+        self.ladder = ladder or QUALITY_LADDER
+        self.level = max(0, min(start_level, len(self.ladder) - 1))
+        self.best_level = self.level
+        self.degrade_after = degrade_after
+        self.upgrade_after = upgrade_after
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+
+        self.processing_ms = None # EWMA
+        self.latency_ms = None # EWMA (큐 대기 + 처리)
+        self.queue_depth = 0
+        self._over = 0
+        self._under = 0
+        self._cooldown_left = 0
+
+    @property
+    def operating_point(self) -> Dict[str, Any]:
+        return self.ladder[self.level]
+
+    @property
+    def stride(self) -> int:
+        return self.operating_point["stride"]
+
+    def frame_budget_ms(self) -> float:
+        return 1000.0 * self.stride / self.fps
+
+    def _ewma(self, current, value):
+        return value if current is None else current + self.smoothing * (value - current)
+
+    def observe(self, processing_ms: float, latency_ms: float, queue_depth: int) -> bool:
+        """측정값을 반영하고, 동작점이 바뀌었으면 True"""
+        self.processing_ms = self._ewma(self.processing_ms, processing_ms)
+        self.latency_ms = self._ewma(self.latency_ms, latency_ms)
+        self.queue_depth = queue_depth
+
+        if self._cooldown_left > 0:
+            self._cooldown_left -= 1
+            return False
+
+        load = self.processing_ms / self.frame_budget_ms()
+        overloaded = load > 1.0 or queue_depth >= 2 or self.latency_ms > self.target_latency_ms
+        headroom = load < 0.5 and queue_depth == 0 and self.latency_ms < 0.5 * self.target_latency_ms
+
+        self._over = self._over + 1 if overloaded else 0
+        self._under = self._under + 1 if headroom else 0
+
+        if self._over >= self.degrade_after and self.level < len(self.ladder) - 1:
+            return self._set_level(self.level + 1)
+        if self._under >= self.upgrade_after and self.level > self.best_level:
+            return self._set_level(self.level - 1)
+        return False
+
+    def _set_level(self, level: int) -> bool:
+        self.level = level
+        self._over = self._under = 0
+        self._cooldown_left = self.cooldown
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.operating_point,
+                    level=self.level,
+                    processing_ms=self.processing_ms or 0.0,
+                    latency_ms=self.latency_ms or 0.0,
+                    queue_depth=self.queue_depth,
+                    target_latency_ms=self.target_latency_ms)
@@ -0,0 +1,155 @@
+import json
+import os
+import numpy as np
+from typing import Dict, Any, Iterator, List, Tuple
+
+from .results_cache import cache_dir_for, video_signature
+
+RALLIES_NAME = "rallies.json"
+
+
+class RallySegmenter:
+    """
+    프레임별 공 검출/속도(update_position() 의 stats)로 랠리(실제 플레이) 구간을 나눕니다.
+
+    - 공이 보이고 min_speed (정규화 코트 좌표/초, 1 = 코트 길이) 이상으로 움직이는 프레임을 "플레이 중"
+      프레임으로 봄 (선수가 공을 들고 걸어가거나 검출이 제자리에서 흔들리는 프레임은 빠짐).
+      코트 좌표가 없는 프레임(코트 미검출)은 속도를 믿을 수 없으므로 공이 보이기만 하면 플레이 중
+    - 플레이 중 프레임 사이가 max_gap_seconds 이하로 끊기면 (검출 누락, 네트/선수에 가림) 같은 랠리
+    - min_rally_seconds 보다 짧은 구간은 버리고, 앞뒤로 pad_seconds 만큼 넓힘 (서브 토스, 마지막 바운스 뒤)
+    프레임 순서대로 update() 를 부르면 끝난 랠리가 segments 에 바로 추가되므로 분석하면서 쓸 수 있습니다.
+    """
+
+    def __init__(self, fps: float = 30.0, min_speed: float = 0.15, max_gap_seconds: float = 1.5,
+                 min_rally_seconds: float = 1.0, pad_seconds: Tuple[float, float] = (0.5, 1.0)):
+        self.fps = fps or 30.0
+        self.min_speed = min_speed
+        self.max_gap = int(round(max_gap_seconds * self.fps))
+        self.min_length = int(round(min_rally_seconds * self.fps))
+        self.pad = (int(round(pad_seconds[0] * self.fps)), int(round(pad_seconds[1] * self.fps)))
+        self.segments: List[Tuple[int, int]] = []
+        self._start = None # 열린 랠리의 첫 플레이 프레임
+        self._last_live = None
+
+    def update(self, frame_idx: int, ball_pos, ball_speed: float = 0.0, on_court: bool = True):
+        live = ball_pos is not None and (ball_speed >= self.min_speed or not on_court)
+        if self._last_live is not None and frame_idx - self._last_live > self.max_gap:
+            self._close()
+        if live:
+            if self._start is None:
+                self._start = frame_idx
+            self._last_live = frame_idx
+
+    def _close(self):
+        if self._start is not None and self._last_live - self._start + 1 >= self.min_length:
+            start = max(0, self._start - self.pad[0])
+            end = self._last_live + self.pad[1]
+            if self.segments and start <= self.segments[-1][1] + 1:
+                start = self.segments[-1][0] # 넓힌 구간이 앞 랠리와 겹치면 합침
+                self.segments.pop()
+            self.segments.append((start, end))
+        self._start = None
+        self._last_live = None
+
+    def finish(self, last_frame: int | None = None) -> List[Tuple[int, int]]:
+        """마지막 랠리를 닫고 전체 구간 목록을 반환 (last_frame 이 있으면 끝을 거기로 자름)"""
+        self._close()
+        if last_frame is not None and self.segments:
+            self.segments = [(s, min(e, last_frame)) for s, e in self.segments if s <= last_frame]
+        return self.segments
+
+
+class RallyIndex:
+    """
+    랠리 구간 [start, end] (프레임 번호, 양 끝 포함) 목록. 정렬된 시작/끝 배열이라 포함 여부와
+    다음/이전 랠리 찾기는 searchsorted 한 번입니다.
+    영상별로 분석 캐시 폴더의 rallies.json 에 저장 (원본 서명이 다르면 무효).
+    """
+
+    def __init__(self, segments: List[Tuple[int, int]] | None = None, fps: float = 30.0, frames_seen: int = 0):
+        segments = sorted(segments or [])
+        self.starts = np.array([s for s, _ in segments], dtype=np.int64)
+        self.ends = np.array([e for _, e in segments], dtype=np.int64)
+        self.fps = fps
+        self.frames_seen = frames_seen # 이 인덱스를 만들 때 본 분석 프레임 수 (캐시가 늘면 다시 만듦)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.starts.tolist(), self.ends.tolist())
+
+    def segment_at(self, frame_idx: int) -> Tuple[int, int] | None:
+        i = int(np.searchsorted(self.starts, frame_idx, side="right")) - 1
+        if i >= 0 and frame_idx <= self.ends[i]:
+            return int(self.starts[i]), int(self.ends[i])
+        return None
+
+    def contains(self, frame_idx: int) -> bool:
+        return self.segment_at(frame_idx) is not None
+
+    def next_start(self, frame_idx: int) -> int | None:
+        """frame_idx 뒤에 시작하는 첫 랠리의 시작 프레임"""
+        i = int(np.searchsorted(self.starts, frame_idx, side="right"))
+        return int(self.starts[i]) if i < len(self.starts) else None
+
+    def prev_start(self, frame_idx: int, slack: int = 0) -> int | None:
+        """
+        frame_idx - slack 보다 앞에서 시작한 마지막 랠리의 시작 프레임.
+        slack 을 주면 랠리 시작 직후에 누른 "이전 랠리"가 같은 랠리 처음으로 되돌아가지 않고 앞 랠리로 감.
+        """
+        i = int(np.searchsorted(self.starts, frame_idx - slack, side="left")) - 1
+        return int(self.starts[i]) if i >= 0 else None
+
+    def live_frames(self) -> int:
+        return int((self.ends - self.starts + 1).sum())
+
+    # ---- build / persist --------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records: Dict[int, Dict[str, Any]], fps: float = 30.0, **params) -> "RallyIndex":
+        """ResultsCache.records 로 만듦 (params 는 RallySegmenter 인자)"""
+        segmenter = RallySegmenter(fps, **params)
+        last = None
+        for frame_idx in sorted(records):
+            record = records[frame_idx]
+            segmenter.update(frame_idx, record.get("ball_pos_ratio"), record.get("ball_speed", 0.0),
+                             record.get("ball_pos_court") is not None)
+            last = frame_idx
+        return cls(segmenter.finish(last), fps, len(records))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"fps": self.fps, "frames_seen": self.frames_seen, "segments": [list(s) for s in self]}
+
+    def save(self, video_path: str):
+        cache_dir = cache_dir_for(video_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, RALLIES_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(dict(self.to_dict(), video=video_signature(video_path)), f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, video_path: str) -> "RallyIndex | None":
+        """저장된 인덱스 (없거나 원본이 바뀌었으면 None)"""
+        try:
+            with open(os.path.join(cache_dir_for(video_path), RALLIES_NAME), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("video") != video_signature(video_path):
+            return None
+        return cls([tuple(s) for s in data["segments"]], data.get("fps", 30.0), data.get("frames_seen", 0))
+
+
+def rally_index_for(video_path: str, records: Dict[int, Dict[str, Any]] | None = None,
+                    fps: float = 30.0) -> RallyIndex | None:
+    """
+    저장된 랠리 인덱스를 돌려주되, 그 뒤로 분석 결과(records)가 늘었으면 다시 만들어 저장.
+    저장된 것도 없고 분석 결과도 없으면 None.
+    """
+    index = RallyIndex.load(video_path)
+    if records and (index is None or len(records) > index.frames_seen):
+        index = RallyIndex.from_records(records, fps)
+        index.save(video_path)
+    return index
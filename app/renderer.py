@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+from typing import List, Tuple, Dict
+
+
+def hex_to_bgr(color: str) -> Tuple[int, int, int]:
+    """'#4CAF50' -> (80, 175, 76)"""
+    color = color.lstrip('#')
+    r, g, b = int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16)
+    return (b, g, r)
+
+
+class OverlayRenderer:
+    """
+    공 위치, 누적 바운스 히스토리, 속도를 프레임 위에 그리는 렌더러 (OpenCV).
+    분석 결과(구조화된 데이터)만 받아서 그리므로 추론 없이 캐시에서 다시 그릴 수 있다.
+    """
+    DEFAULT_COLORS = {"Good": "#4CAF50", "Bad": "#FF9800", "Out": "#F44336", "Ball": "#FFFF00"}
+
+    def __init__(self, colors: Dict[str, str] | None = None, show_court_corners: bool = False):
+        self.show_court_corners = show_court_corners
+        merged = dict(self.DEFAULT_COLORS)
+        merged.update(colors or {})
+        self.colors = {k: hex_to_bgr(v) for k, v in merged.items()}
+
+    def render(self, frame: np.ndarray, ball_pos_ratio: Tuple[float, float] | None,
+               bounce_history: List[Tuple[float, float, str]], ball_speed: float = 0.0,
+               out: np.ndarray | None = None, court_corners=None) -> np.ndarray:
+        """
+        `out`이 주어지면 그 버퍼에 그리고(out is frame이면 제자리), 없으면 복사본에 그린다.
+        """
+        if out is None:
+            out = frame.copy()
+        elif out is not frame:
+            np.copyto(out, frame)
+
+        h, w = out.shape[:2]
+
+        if self.show_court_corners and court_corners is not None:
+            # 자동 검출된 코트 꼭짓점 (디버그용)
+            for x, y in court_corners:
+                cv2.circle(out, (int(x), int(y)), 10, (0, 0, 255), -1)
+
+        for bounce_x, bounce_y, result_type in bounce_history:
+            color = self.colors.get(result_type, (128, 128, 128))
+            cv2.circle(out, (int(bounce_x * w), int(bounce_y * h)), 6, color, -1, cv2.LINE_AA)
+
+        if ball_pos_ratio is not None:
+            center = (int(ball_pos_ratio[0] * w), int(ball_pos_ratio[1] * h))
+            cv2.circle(out, center, 8, self.colors["Ball"], 2, cv2.LINE_AA)
+
+        cv2.putText(out, f"Speed: {ball_speed:.2f}", (20, 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2, cv2.LINE_AA)
+        return out
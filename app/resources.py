@@ -0,0 +1,159 @@
+import os
+import sys
+from typing import Dict, Any, List
+
+# 프리셋: reserve_cores 는 추론이 쓰지 않고 남겨 두는 코어 (Qt, 디코딩, 화면 표시용)
+PRESETS = {
+    # GUI 재생과 분석을 같이: 재생이 끊기지 않도록 코어 몇 개를 남기고, OpenCV 스레드도 줄임
+    "interactive": {"reserve_cores": 2, "cv2_threads": 2},
+    # 배치 분석 (CLI/작업 큐만): 모든 코어를 추론 프로세스들이 나눠 씀. 병렬성은 프로세스 단위라
+    # 프로세스마다 OpenCV 스레드는 하나
+    "batch": {"reserve_cores": 0, "cv2_threads": 1},
+}
+DEFAULT_PRESET = "interactive"
+
+
+def available_cores() -> List[int]:
+    """이 프로세스가 쓸 수 있는 CPU 번호 (affinity/cgroup 제한 반영)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class ResourcePlan:
+    """
+    추론(torch), OpenCV, 디코딩/UI, 워커 프로세스가 코어를 어떻게 나눠 쓸지 하나의 예산에서 계산합니다.
+
+    torch 의 intra-op 스레드 기본값은 "코어 수"라서, 추론 프로세스가 여러 개이거나 GUI/디코더와 같이 돌면
+    코어 수보다 훨씬 많은 스레드가 경쟁합니다 (oversubscription). 여기서는
+    - 추론용 코어 = 전체 - reserve_cores, 이를 추론 프로세스 수로 나눈 만큼이 프로세스당 torch 스레드
+    - torch inter-op 스레드는 1 (프레임 하나씩 추론하므로 연산자 간 병렬성은 거의 없음)
+    - OpenCV 내부 스레드 풀은 프리셋 값으로 제한
+    pin=True 면 추론 스레드/프로세스를 추론용 코어에 고정하고 나머지 코어를 UI/디코딩에 남깁니다.
+    설정 dict 로 주고받을 수 있어서(as_dict/from_dict) 워커 프로세스에도 그대로 넘깁니다.
+    """
+
+    def __init__(self, preset: str = DEFAULT_PRESET, cores: int | None = None, processes: int = 1,
+                 pin: bool = False, cpus: List[int] | None = None):
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown resource preset: {preset}")
+        self.preset = preset
+        self.cpus = list(cpus) if cpus is not None else available_cores()
+        if cores is not None:
+            self.cpus = self.cpus[:max(1, cores)]
+        self.processes = max(1, processes)
+        self.pin = pin
+
+        options = PRESETS[preset]
+        n = len(self.cpus)
+        self.reserve_cores = min(options["reserve_cores"], max(0, n - 1))
+        self.inference_cores = n - self.reserve_cores
+        self.torch_threads = max(1, self.inference_cores // self.processes)
+        self.torch_interop_threads = 1
+        self.cv2_threads = max(1, min(options["cv2_threads"], n))
+        # 내보내기 그리기 워커: 추론 스레드가 쓰지 않는 코어 (최소 1)
+        self.draw_workers = max(min(2, n), n - self.torch_threads)
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any], processes: int = 1) -> "ResourcePlan":
+        """settings['resources'] (as_dict 결과) 또는 'resource_preset' 으로 계획을 만듦"""
+        data = settings.get('resources')
+        if data:
+            return cls.from_dict(data)
+        return cls(settings.get('resource_preset', DEFAULT_PRESET), settings.get('cpu_budget'),
+                   processes, settings.get('pin_cpus', False))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"preset": self.preset, "cpus": self.cpus, "processes": self.processes, "pin": self.pin}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResourcePlan":
+        return cls(data.get("preset", DEFAULT_PRESET), processes=data.get("processes", 1),
+                   pin=data.get("pin", False), cpus=data.get("cpus"))
+
+    def cpus_for(self, stage: str, worker_id: int = 0) -> List[int]:
+        """
+        stage 가 쓸 CPU 번호. "inference" 는 예약 코어를 뺀 나머지를 프로세스 수로 나눈 구간,
+        "ui"/"decode" 는 예약 코어 (없으면 전체).
+        """
+        inference = self.cpus[self.reserve_cores:]
+        if stage == "inference":
+            if self.processes <= 1:
+                return inference
+            start = (worker_id % self.processes) * self.torch_threads
+            return inference[start:start + self.torch_threads] or inference
+        return self.cpus[:self.reserve_cores] or self.cpus
+
+    def for_worker(self, worker_id: int) -> "ResourcePlan":
+        """워커 프로세스 하나의 계획: 자기 몫의 코어만 가진 단일 프로세스 계획"""
+        if self.processes <= 1:
+            return self
+        return ResourcePlan(self.preset, processes=1, pin=self.pin,
+                            cpus=self.cpus_for("inference", worker_id))._without_reserve()
+
+    def _without_reserve(self) -> "ResourcePlan":
+        # 워커 프로세스의 코어는 이미 추론용 몫이므로 다시 예약하지 않음
+        self.reserve_cores = 0
+        self.inference_cores = len(self.cpus)
+        self.torch_threads = max(1, self.inference_cores)
+        return self
+
+    def __repr__(self) -> str:
+        return (f"ResourcePlan({self.preset}, cpus={len(self.cpus)}, processes={self.processes}, "
+                f"torch={self.torch_threads}x{self.torch_interop_threads}, cv2={self.cv2_threads}, "
+                f"reserve={self.reserve_cores}, pin={self.pin})")
+
+
+def configure_environment(plan: ResourcePlan):
+    """
+    torch/numpy 를 import 하기 전에 불러야 하는 설정 (OpenMP/MKL 스레드 풀은 import 시점에 크기가 정해짐).
+    이미 환경 변수로 지정돼 있으면 그 값을 존중합니다.
+    """
+    threads = str(plan.torch_threads)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(var, threads)
+    if sys.platform in ("win32", "darwin"):
+        # conda 의 MKL 과 pip torch 가 각자 libiomp 를 들고 오는 환경에서는 두 번째 로드 시 프로세스가 죽음.
+        # 스레드 수는 위에서 맞췄으므로 중복 런타임만 허용 (환경 변수를 FALSE 로 지정하면 끌 수 있음)
+        os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
+
+
+def apply_limits(plan: ResourcePlan):
+    """이미 import 된 라이브러리에 스레드 수를 적용 (torch 는 import 돼 있을 때만 — stub 검출기는 torch 없이 동작)"""
+    import cv2
+    cv2.setNumThreads(plan.cv2_threads)
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(plan.torch_threads)
+        try:
+            torch.set_num_interop_threads(plan.torch_interop_threads)
+        except RuntimeError:
+            pass # inter-op 풀은 첫 병렬 작업 이후에는 바꿀 수 없음
+
+
+def pin_current_thread(cpus: List[int]) -> bool:
+    """
+    호출한 스레드를 cpus 에 고정 (Linux: 스레드 단위). 다른 OS 에서는 psutil 이 있으면 프로세스 단위로 고정하므로
+    워커 프로세스 시작 시에만 부르세요. 고정했으면 True.
+    """
+    if not cpus:
+        return False
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+        return True
+    try:
+        import psutil
+    except ImportError:
+        return False
+    psutil.Process().cpu_affinity(cpus)
+    return True
+
+
+def setup_worker_process(plan: ResourcePlan, worker_id: int = 0) -> ResourcePlan:
+    """spawn 된 추론 워커 프로세스 시작 시: 자기 몫의 계획으로 환경/스레드/affinity 설정"""
+    worker_plan = plan.for_worker(worker_id)
+    configure_environment(worker_plan)
+    apply_limits(worker_plan)
+    if worker_plan.pin:
+        pin_current_thread(worker_plan.cpus_for("inference"))
+    return worker_plan
@@ -0,0 +1,263 @@
+import os
+import json
+from typing import Dict, Any, List, Tuple
+
+from .bounce_index import BounceIndex
+
+try:
+    import fcntl
+
+    def _try_lock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+except ImportError: # Windows
+    import msvcrt
+
+    def _try_lock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def cache_dir_for(video_path: str) -> str:
+    """비디오 파일 옆에 두는 분석 캐시 폴더 경로 (<video>.tennis_ai/)"""
+    return os.path.abspath(video_path) + ".tennis_ai"
+
+
+def video_signature(video_path: str) -> Dict[str, Any]:
+    """캐시가 가리키는 원본이 바뀌었는지 확인하는 서명 (크기, 수정 시각)"""
+    try:
+        st = os.stat(video_path)
+        return {"size": st.st_size, "mtime": int(st.st_mtime)}
+    except OSError:
+        return {}
+
+
+class ResultsCache:
+    """
+    Frame-indexed analysis results for one video, stored as JSON lines.
+
+    Each line is one analyzed frame:
+        {"frame": 12, "ball_pos_ratio": [x, y] | null, "ball_pos_court": [x, y] | null,
+         "ball_speed": 0.0, "bounce": [x, y, "Good"] | null}
+    Records written by the strided preview pass (app.preview) also carry "preview": true
+    until a full-rate pass overwrites them.
+    The file is append-only so an interrupted pass can resume from the last stored frame
+    and later passes (export, re-render) can skip inference entirely.
+
+    Only one writer per video at a time: the first put() takes an exclusive lock on
+    writer.lock (GUI analysis, export and queued jobs can all open the same video).
+    If another thread or process holds it, this instance turns read-only and keeps
+    new results in memory only.
+    """
+    FILE_NAME = "results.jsonl"
+    META_NAME = "meta.json"
+    LOCK_NAME = "writer.lock"
+
+    def __init__(self, video_path: str, cache_dir: str | None = None):
+        self.video_path = video_path
+        self.cache_dir = cache_dir or cache_dir_for(video_path)
+        self.path = os.path.join(self.cache_dir, self.FILE_NAME)
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self._file = None
+        self._pending = 0
+        self._lock_file = None
+        self.read_only = False
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if not self._meta_matches():
+            # 비디오가 바뀌었으면 이전 결과는 무효
+            self.clear()
+        self.load()
+
+    # ---- validity -------------------------------------------------------
+
+    def _video_signature(self) -> Dict[str, Any]:
+        return video_signature(self.video_path)
+
+    def _meta_matches(self) -> bool:
+        meta_path = os.path.join(self.cache_dir, self.META_NAME)
+        if not os.path.exists(meta_path):
+            return not os.path.exists(self.path)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f) == self._video_signature()
+        except (OSError, ValueError):
+            return False
+
+    def _write_meta(self):
+        with open(os.path.join(self.cache_dir, self.META_NAME), "w", encoding="utf-8") as f:
+            json.dump(self._video_signature(), f)
+
+    # ---- read -----------------------------------------------------------
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        self.records = {}
+        if not os.path.exists(self.path):
+            return self.records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 중단된 쓰기로 잘린 마지막 줄은 무시
+                    continue
+                self.records[int(record["frame"])] = record
+        return self.records
+
+    def get(self, frame_idx: int) -> Dict[str, Any] | None:
+        return self.records.get(frame_idx)
+
+    def __contains__(self, frame_idx: int) -> bool:
+        return frame_idx in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def contiguous_until(self) -> int:
+        """0번 프레임부터 끊김 없이 저장된 마지막 프레임 번호 (없으면 -1)"""
+        idx = -1
+        while (idx + 1) in self.records:
+            idx += 1
+        return idx
+
+    def records_before(self, frame_idx: int, count: int) -> List[Dict[str, Any]]:
+        """frame_idx 직전의 연속된 레코드들 (오래된 순, 최대 count개) — 분석기 resync용"""
+        records = []
+        idx = frame_idx - 1
+        while idx >= 0 and len(records) < count and idx in self.records:
+            records.append(self.records[idx])
+            idx -= 1
+        records.reverse()
+        return records
+
+    def first_preview_frame(self) -> int | None:
+        """아직 전체 프레임 분석으로 갱신되지 않은 preview 레코드 중 가장 앞 프레임"""
+        preview = [i for i, r in self.records.items() if r.get("preview")]
+        return min(preview) if preview else None
+
+    def all_bounces(self) -> List[Tuple[float, float, str]]:
+        return [tuple(r["bounce"]) for _, r in sorted(self.records.items()) if r.get("bounce")]
+
+    def bounce_index(self, source: int = 0) -> BounceIndex:
+        """저장된 바운스로 만든 BounceIndex (프레임/영역 질의, 클릭 → 프레임 이동)"""
+        return BounceIndex.from_records(self.records, source)
+
+    def bounces_until(self, frame_idx: int) -> List[Tuple[float, float, str]]:
+        """frame_idx까지 누적된 바운스 히스토리"""
+        return [tuple(r["bounce"]) for i, r in sorted(self.records.items())
+                if i <= frame_idx and r.get("bounce")]
+
+    # ---- write ----------------------------------------------------------
+
+    def _acquire_writer_lock(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        if self.read_only:
+            return False
+        f = open(os.path.join(self.cache_dir, self.LOCK_NAME), "a+")
+        try:
+            _try_lock(f)
+        except OSError:
+            f.close()
+            self.read_only = True
+            print(f"Results cache for {self.video_path} is being written elsewhere; "
+                  f"results of this pass are kept in memory only.")
+            return False
+        self._lock_file = f
+        return True
+
+    def _release_writer_lock(self):
+        if self._lock_file is not None:
+            _unlock(self._lock_file)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def put(self, frame_idx: int, record: Dict[str, Any], flush_every: int = 30):
+        record = dict(record, frame=frame_idx)
+        self.records[frame_idx] = record
+        if self._file is None:
+            if not self._acquire_writer_lock():
+                return
+            self._write_meta()
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record) + "\n")
+        self._pending += 1
+        if self._pending >= flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            self._pending = 0
+
+    def compact(self):
+        """덮어쓴 레코드(같은 프레임의 이전 줄)를 정리해서 파일을 다시 씀"""
+        if not self._acquire_writer_lock():
+            return
+        self._close_file() # 잠금은 유지: 다시 쓰는 동안 다른 writer가 끼어들지 않게
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for _, record in sorted(self.records.items()):
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if not self._acquire_writer_lock():
+            return # 다른 writer가 쓰는 중인 파일은 지우지 않음
+        self._close_file()
+        self.records = {}
+        for name in (self.FILE_NAME, self.META_NAME):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._pending = 0
+
+    def close(self):
+        self._close_file()
+        self._release_writer_lock()
+
+
+def record_from_stats(ball_pos_ratio, stats: Dict[str, Any], prev_bounce_count: int) -> Dict[str, Any]:
+    """analyze_frame() 결과를 캐시 레코드로 변환 (이번 프레임에서 새로 생긴 바운스만 기록)"""
+    history = stats.get("bounce_history", ())
+    bounce_count = stats.get("bounce_count", len(history))
+    bounce = list(history[-1]) if history and bounce_count > prev_bounce_count else None
+    court = stats.get("ball_pos_court")
+    return {
+        "ball_pos_ratio": list(ball_pos_ratio) if ball_pos_ratio else None,
+        "ball_pos_court": [float(court[0]), float(court[1])] if court else None,
+        "ball_speed": float(stats.get("ball_speed", 0.0)),
+        "bounce": bounce,
+        "ts": stats.get("timestamp"), # 표시 시각 (초, 모르면 None)
+    }
+
+
+def stats_from_record(record: Dict[str, Any], bounce_history: tuple, bounce_count: int | None = None) -> Dict[str, Any]:
+    """
+    캐시 레코드를 analyze_frame()의 stats 형식으로 되돌림 (추론 없이 결과를 보여줄 때).
+    bounce_history/bounce_count 는 TennisAnalyzerCore.bounce_snapshot() 결과.
+    """
+    ratio = record.get("ball_pos_ratio")
+    court = record.get("ball_pos_court")
+    return {
+        "bounce_history": bounce_history,
+        "bounce_count": len(bounce_history) if bounce_count is None else bounce_count,
+        "ball_pos_ratio": tuple(ratio) if ratio else None,
+        "ball_pos_court": tuple(court) if court else None,
+        "ball_speed": record.get("ball_speed", 0.0),
+        "ball_trajectory_type": "N/A",
+        "frame_idx": record.get("frame"),
+        "from_cache": True,
+        "preview": record.get("preview", False),
+    }
@@ -0,0 +1,278 @@
+"""
+Golden-output 회귀 검사: 분석 결과(공 위치, 바운스, 속도)와 성능(fps, 최대 RSS)을 같이 본다.
+
+합성 클립(benchmarks/synthetic_clip.py, 같은 인자면 항상 같은 영상)과 녹화된 참고 영상을 분석해서
+benchmarks/golden/<case>.json 에 저장된 결과와 허용 오차 안에서 비교한다. 최적화(배치, ROI, stride,
+백엔드 교체 등)가 결과를 조용히 바꾸거나 느려지게 하면 exit 1.
+
+    python -m benchmarks.golden                        # 모든 합성 케이스 검사 (stub 검출기)
+    python -m benchmarks.golden --update               # 현재 결과를 golden 으로 저장
+    python -m benchmarks.golden --clip rally=match.mp4 --detector yolo --update   (녹화 영상 케이스)
+
+stub 검출기는 가중치 없이 색상으로 공을 찾으므로 GPU/모델 다운로드 없이 돈다.
+fps/메모리 비교는 golden 을 만든 머신과 플랫폼/코어 수가 같을 때만 실패로 치고, 다르면 경고만 한다.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+from typing import Dict, Any, List, Tuple
+
+from app.analysis_core import TennisAnalyzerCore
+from benchmarks.run_benchmarks import git_revision, peak_rss_mb
+from benchmarks.synthetic_clip import SyntheticClip
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# 합성 케이스: SyntheticClip 인자
+SYNTHETIC_CASES = {
+    "basic": {"frames": 300},
+    "pan": {"frames": 300, "pan": True},
+    # 자동 코트 검출은 사이드라인이 수직에서 10도 안쪽일 때만 되므로 원근은 그 한도 안에서 (0.12 부터 실패)
+    "broadcast": {"frames": 300, "perspective": 0.1, "noise": 4.0, "seed": 1},
+    "decoys": {"frames": 300, "decoys": 3, "seed": 2},
+}
+
+TOLERANCES = {
+    "position": 0.005, # 프레임별 공 위치 차이 (화면 비율)
+    "presence": 0.01, # 검출 여부가 달라진 프레임 비율
+    "speed_abs": 0.05, # stats["ball_speed"] 단위
+    "speed_rel": 0.05,
+    "speed_frames": 0.01, # 속도 허용 오차를 넘은 프레임 비율
+    "bounce_frames": 2, # 같은 바운스로 볼 프레임 차이
+    "bounce_position": 0.01,
+    "truth_error": 0.002, # 정답 대비 중앙값 오차가 golden 보다 이만큼 커지면 실패 (합성 케이스만)
+    # 속도가 정답 공 최고 속도의 이 배수를 넘으면 실패 (다른 물체로 넘어간 프레임 사이의 속도 등).
+    # 떠 있는 공은 바닥 투영이 더 많이 움직이고 검출된 코트 사각형이 정답 코트보다 작아서 정상이어도 2~3배
+    "speed_truth_factor": 4.0,
+    "fps_drop": 0.15,
+    "memory_growth": 0.20,
+}
+
+
+def _machine() -> Dict[str, Any]:
+    return {"platform": platform.platform(), "cpu_count": os.cpu_count(), "opencv": cv2.__version__}
+
+
+def analyze_clip(clip_path: str, settings: Dict[str, Any], conf: float = 0.25) -> Dict[str, Any]:
+    """클립 전체를 순서대로 분석해서 프레임별 위치/속도, 바운스 목록, fps/메모리를 돌려줌"""
+    cap = cv2.VideoCapture(clip_path)
+    if not cap.isOpened():
+        raise IOError(f"Failed to open video: {clip_path}")
+    settings = dict(settings, fps=cap.get(cv2.CAP_PROP_FPS) or 30.0)
+    analyzer = TennisAnalyzerCore(settings)
+
+    positions, speeds, bounces = [], [], []
+    court_detected = False
+    bounce_count = 0
+    frame_idx = 0
+    latencies = []
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            start = time.perf_counter()
+            _, ratio, stats = analyzer.analyze_frame(frame, conf, frame_idx=frame_idx, continuous=True)
+            latencies.append(time.perf_counter() - start)
+            positions.append([round(float(ratio[0]), 6), round(float(ratio[1]), 6)] if ratio else None)
+            speeds.append(round(float(stats.get("ball_speed", 0.0)), 3))
+            if stats.get("bounce_count", 0) > bounce_count:
+                x, y, result = stats["bounce_history"][-1]
+                bounces.append([frame_idx, round(float(x), 6), round(float(y), 6), result])
+            bounce_count = stats.get("bounce_count", bounce_count)
+            court_detected = court_detected or analyzer.court_lines_detected
+            frame_idx += 1
+    finally:
+        cap.release()
+        analyzer.release()
+
+    return {
+        "positions": positions,
+        "speeds": speeds,
+        "bounces": bounces,
+        "court_detected": court_detected,
+        # 중앙값 지연으로 fps 를 계산 (코트 검출 재시도 같은 가끔 튀는 프레임과 다른 프로세스 영향을 덜 받음)
+        "perf": {"fps": 1.0 / float(np.median(latencies)) if latencies else 0.0, "peak_rss_mb": peak_rss_mb()},
+    }
+
+
+def truth_max_speed(truth: List[Dict[str, Any]], fps: float) -> float:
+    """정답 공의 최고 속도 (정규화 코트 좌표/초, stats["ball_speed"] 와 같은 단위)"""
+    court = np.array([t["ball_court"] for t in truth], dtype=np.float64)
+    if len(court) < 2:
+        return 0.0
+    return float(np.hypot(*np.diff(court, axis=0).T).max() * fps)
+
+
+def sanity_problems(result: Dict[str, Any], tol: Dict[str, float]) -> List[str]:
+    """golden 으로 둘 수 없는 결과: 코트도 바운스도 없음 (정확도를 지키지 못함), 정답보다 훨씬 빠른 속도"""
+    problems = []
+    if not result.get("court_detected") and not result["bounces"]:
+        problems.append("court never detected and no bounces (the case guards no accuracy)")
+    max_speed = result.get("truth", {}).get("max_speed")
+    if max_speed and result["speeds"]:
+        worst = int(np.argmax(result["speeds"]))
+        if result["speeds"][worst] > tol["speed_truth_factor"] * max_speed:
+            problems.append(f"speed {result['speeds'][worst]:.3f} at frame {worst} is above "
+                            f"{tol['speed_truth_factor']:g}x the true max ball speed {max_speed:.3f}")
+    return problems
+
+
+def truth_error(positions: List, truth: List[Dict[str, Any]]) -> Dict[str, float]:
+    """합성 클립 정답과 비교: 정답 공이 화면에 있는 프레임 중 검출 비율, 위치 오차 중앙값"""
+    errors, visible = [], 0
+    for pos, t in zip(positions, truth):
+        x, y = t["ball_ratio"]
+        if not (0 <= x <= 1 and 0 <= y <= 1):
+            continue
+        visible += 1
+        if pos is not None:
+            errors.append(float(np.hypot(pos[0] - x, pos[1] - y)))
+    return {"detection_rate": len(errors) / visible if visible else 0.0,
+            "median_error": float(np.median(errors)) if errors else 0.0}
+
+
+def compare(result: Dict[str, Any], golden: Dict[str, Any], tol: Dict[str, float]) -> Tuple[List[str], List[str]]:
+    """(실패 목록, 경고 목록)"""
+    failures = sanity_problems(result, tol) + [f"golden: {p}" for p in sanity_problems(golden, tol)]
+    warnings = []
+    pos, ref = result["positions"], golden["positions"]
+    if len(pos) != len(ref):
+        failures.append(f"frame count {len(pos)} != golden {len(ref)}")
+    n = min(len(pos), len(ref))
+
+    presence = [i for i in range(n) if (pos[i] is None) != (ref[i] is None)]
+    if n and len(presence) / n > tol["presence"]:
+        failures.append(f"ball presence differs on {len(presence)}/{n} frames (first: {presence[:5]})")
+    both = [i for i in range(n) if pos[i] is not None and ref[i] is not None]
+    if both:
+        diff = np.hypot(*(np.array([pos[i] for i in both]) - np.array([ref[i] for i in both])).T)
+        worst = int(np.argmax(diff))
+        if diff[worst] > tol["position"]:
+            failures.append(f"ball position off by {diff[worst]:.4f} at frame {both[worst]} (tol {tol['position']})")
+
+    speed, ref_speed = np.array(result["speeds"][:n]), np.array(golden["speeds"][:n])
+    bad = np.abs(speed - ref_speed) > np.maximum(tol["speed_abs"], tol["speed_rel"] * np.abs(ref_speed))
+    if n and bad.sum() / n > tol["speed_frames"]:
+        first = np.nonzero(bad)[0][:5].tolist()
+        failures.append(f"speed differs on {int(bad.sum())}/{n} frames (first: {first})")
+
+    got, want = result["bounces"], golden["bounces"]
+    if len(got) != len(want):
+        failures.append(f"{len(got)} bounces != golden {len(want)}")
+    for g, w in zip(got, want):
+        if abs(g[0] - w[0]) > tol["bounce_frames"] or np.hypot(g[1] - w[1], g[2] - w[2]) > tol["bounce_position"] \
+                or g[3] != w[3]:
+            failures.append(f"bounce {g} != golden {w}")
+            break
+
+    if "truth" in result and "truth" in golden:
+        t, gt = result["truth"], golden["truth"]
+        if t["median_error"] > gt["median_error"] + tol["truth_error"]:
+            failures.append(f"median error vs truth {t['median_error']:.4f} > golden {gt['median_error']:.4f}")
+        if t["detection_rate"] < gt["detection_rate"] - tol["presence"]:
+            failures.append(f"detection rate {t['detection_rate']:.3f} < golden {gt['detection_rate']:.3f}")
+
+    perf, ref_perf = result["perf"], golden["perf"]
+    perf_problems = []
+    if ref_perf["fps"] > 0 and perf["fps"] < ref_perf["fps"] * (1 - tol["fps_drop"]):
+        perf_problems.append(f"fps {perf['fps']:.1f} < golden {ref_perf['fps']:.1f}")
+    if ref_perf["peak_rss_mb"] > 0 and perf["peak_rss_mb"] > ref_perf["peak_rss_mb"] * (1 + tol["memory_growth"]):
+        perf_problems.append(f"peak RSS {perf['peak_rss_mb']:.0f} MB > golden {ref_perf['peak_rss_mb']:.0f} MB")
+    same_machine = {k: v for k, v in golden.get("machine", {}).items() if k != "opencv"} == \
+        {k: v for k, v in _machine().items() if k != "opencv"}
+    (failures if same_machine else warnings).extend(perf_problems)
+    return failures, warnings
+
+
+def run_case(name: str, clip_path: str, settings: Dict[str, Any], truth: List | None,
+             fps: float = 30.0) -> Dict[str, Any]:
+    result = analyze_clip(clip_path, settings)
+    if truth is not None:
+        result["truth"] = dict(truth_error(result["positions"], truth), max_speed=truth_max_speed(truth, fps))
+    result["settings"] = settings
+    result["machine"] = _machine()
+    result["git_revision"] = git_revision()
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare analyzer output and speed against stored golden results")
+    parser.add_argument("--cases", default=",".join(SYNTHETIC_CASES), help="synthetic cases to run ('' for none)")
+    parser.add_argument("--clip", action="append", default=[], metavar="NAME=PATH",
+                        help="recorded reference clip (repeatable); golden is benchmarks/golden/NAME.json")
+    parser.add_argument("--detector", default="stub", choices=["stub", "yolo"])
+    parser.add_argument("--model-path", default="yolov8m.pt")
+    parser.add_argument("--golden-dir", default=GOLDEN_DIR)
+    parser.add_argument("--update", action="store_true", help="write current results as the new golden outputs")
+    args = parser.parse_args(argv)
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = set(cases) - set(SYNTHETIC_CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+    clips = []
+    for spec in args.clip:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            parser.error(f"--clip expects NAME=PATH, got {spec}")
+        clips.append((name, path))
+
+    settings = {'detector': args.detector, 'model_path': args.model_path}
+    suffix = "" if args.detector == "stub" else f".{args.detector}"
+    peak_rss_mb() # tracemalloc 대체 경로는 여기서부터 측정 시작
+    os.makedirs(args.golden_dir, exist_ok=True)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = []
+        for name in cases:
+            params = dict(SYNTHETIC_CASES[name])
+            clip = SyntheticClip(n_frames=params.pop("frames"), **params)
+            path = os.path.join(tmp, f"{name}.mp4")
+            meta = clip.write(path)
+            jobs.append((name, path, meta["frames"], meta["fps"]))
+        jobs.extend((name, path, None, 30.0) for name, path in clips)
+
+        for name, path, truth, fps in jobs:
+            golden_path = os.path.join(args.golden_dir, f"{name}{suffix}.json")
+            result = run_case(name, path, settings, truth, fps)
+            perf = result["perf"]
+            line = f"[golden] {name:<10} {perf['fps']:8.1f} fps {perf['peak_rss_mb']:8.1f} MB  " \
+                   f"{len(result['bounces'])} bounces"
+            if args.update:
+                problems = sanity_problems(result, TOLERANCES)
+                if problems:
+                    print(f"{line}  REFUSED golden {golden_path}")
+                    for message in problems:
+                        print(f"    FAIL {message}")
+                    failed = True
+                    continue
+                with open(golden_path, "w", encoding="utf-8") as f:
+                    json.dump(result, f)
+                print(f"{line}  -> wrote {golden_path}")
+                continue
+            if not os.path.exists(golden_path):
+                print(f"{line}  MISSING golden {golden_path} (run with --update)")
+                failed = True
+                continue
+            with open(golden_path, "r", encoding="utf-8") as f:
+                golden = json.load(f)
+            failures, warnings = compare(result, golden, TOLERANCES)
+            print(f"{line}  {'FAIL' if failures else 'ok'}")
+            for message in failures:
+                print(f"    FAIL {message}")
+            for message in warnings:
+                print(f"    warn {message} (golden recorded on another machine)")
+            failed = failed or bool(failures)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+TennisAnalyzerCore 단계별 처리량 벤치마크.
+
+합성 코트 영상(benchmarks/synthetic_clip.py)을 만든 뒤 각 단계를 따로 측정하고,
+fps / p50·p99 지연시간(ms) / 최대 RSS(MB)를 JSON으로 저장한다. 커밋끼리 비교할 때는 --compare.
+
+    python -m benchmarks.run_benchmarks --detector stub -o bench.json
+    python -m benchmarks.run_benchmarks --detector yolo --compare bench.json
+
+stub 검출기는 YOLO 가중치 없이 색상으로 공을 찾으므로 모델이 없는 머신에서도 돈다
+(--stub-latency-ms 로 모델 추론 시간을 흉내낼 수 있음).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+from typing import Callable, Dict, Any, Iterator, List
+
+from app.analysis_core import TennisAnalyzerCore
+from benchmarks.synthetic_clip import SyntheticClip
+
+STAGES = ["decode", "court_detect", "inference", "postprocess", "display", "end_to_end"]
+DISPLAY_SIZE = (1280, 720)
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource # Unix 전용
+    except ImportError:
+        return _peak_memory_fallback_mb()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 byte 단위
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _peak_memory_fallback_mb() -> float:
+    """Windows 등: psutil이 있으면 최대 working set, 없으면 tracemalloc 최대치 (Python 할당만)"""
+    try:
+        import psutil
+    except ImportError:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start() # 첫 호출 이후의 할당부터 잡힘
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+
+
+def summarize(name: str, latencies: List[float]) -> Dict[str, Any]:
+    lat = np.array(latencies) * 1000.0
+    total = float(lat.sum()) / 1000.0
+    return {
+        "stage": name,
+        "frames": len(latencies),
+        "fps": len(latencies) / total if total > 0 else 0.0,
+        "p50_ms": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+        "p99_ms": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+        "mean_ms": float(lat.mean()) if len(lat) else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+class BenchmarkRunner:
+    def __init__(self, clip_path: str, settings: Dict[str, Any], warmup: int = 5):
+        self.clip_path = clip_path
+        self.settings = settings
+        self.warmup = warmup
+
+    def _frames(self) -> Iterator[np.ndarray]:
+        cap = cv2.VideoCapture(self.clip_path)
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+        finally:
+            cap.release()
+
+    def _new_analyzer(self) -> TennisAnalyzerCore:
+        return TennisAnalyzerCore(dict(self.settings))
+
+    def _timed(self, name: str, frames: Iterator, fn: Callable) -> Dict[str, Any]:
+        latencies = []
+        for i, item in enumerate(frames):
+            start = time.perf_counter()
+            fn(item)
+            elapsed = time.perf_counter() - start
+            if i >= self.warmup:
+                latencies.append(elapsed)
+        return summarize(name, latencies)
+
+    # ---- stages -----------------------------------------------------------
+
+    def bench_decode(self):
+        cap = cv2.VideoCapture(self.clip_path)
+        latencies, i = [], 0
+        while True:
+            start = time.perf_counter()
+            ret, _ = cap.read()
+            elapsed = time.perf_counter() - start
+            if not ret:
+                break
+            if i >= self.warmup:
+                latencies.append(elapsed)
+            i += 1
+        cap.release()
+        return summarize("decode", latencies)
+
+    def bench_court_detect(self):
+        analyzer = self._new_analyzer()
+
+        def detect(frame):
+            corners = analyzer._detect_court_lines(frame)
+            if corners:
+                analyzer._calculate_perspective_transform(frame, corners)
+        return self._timed("court_detect", self._frames(), detect)
+
+    def bench_inference(self):
+        analyzer = self._new_analyzer()
+        conf = self.settings.get('conf', 0.25)
+        return self._timed("inference", self._frames(), lambda f: analyzer._detect_ball(f, conf))
+
+    def bench_postprocess(self):
+        analyzer = self._new_analyzer()
+        conf = self.settings.get('conf', 0.25)
+        fps = self.settings.get('fps', 30)
+
+        def with_detections():
+            for frame in self._frames():
+                if not analyzer.court_lines_detected:
+                    analyzer._update_court(frame)
+                yield frame.shape, analyzer._detect_ball(frame, conf)
+
+        def post(item):
+            shape, detections = item
+            ratio, court = analyzer._locate_ball(detections, shape)
+            analyzer._process_ball_position(ratio, court, fps)
+        return self._timed("postprocess", with_detections(), post)
+
+    def bench_display(self):
+        # VideoWidget.next_frame 의 BGR->RGB 변환 + 화면 크기 스케일링에 해당 (Qt 없이 OpenCV로 측정)
+        def convert(frame):
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            h, w = rgb.shape[:2]
+            scale = min(DISPLAY_SIZE[0] / w, DISPLAY_SIZE[1] / h)
+            cv2.resize(rgb, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_LINEAR)
+        return self._timed("display", self._frames(), convert)
+
+    def bench_end_to_end(self):
+        analyzer = self._new_analyzer()
+        return self._timed("end_to_end", self._frames(), analyzer.analyze_frame)
+
+    def run(self, stages: List[str]) -> Dict[str, Any]:
+        results = {}
+        for stage in stages:
+            print(f"[bench] {stage} ...", flush=True)
+            results[stage] = getattr(self, f"bench_{stage}")()
+        return results
+
+
+# ---- reporting --------------------------------------------------------------
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: Dict[str, Any], baseline: Dict[str, Any] | None = None):
+    print(f"{'stage':<14}{'fps':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>10}{'vs base':>10}")
+    for name, r in results.items():
+        delta = ""
+        if baseline and name in baseline and baseline[name]["fps"] > 0:
+            delta = f"{(r['fps'] / baseline[name]['fps'] - 1) * 100:+.1f}%"
+        print(f"{name:<14}{r['fps']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['peak_rss_mb']:>10.1f}{delta:>10}")
+
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    regressed = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and base["fps"] > 0 and r["fps"] < base["fps"] * (1 - max_regression):
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Per-stage throughput benchmarks for TennisAnalyzerCore")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--pan", action="store_true", help="moving camera (court detection goes stale)")
+    parser.add_argument("--detector", default="stub", choices=["stub", "yolo"])
+    parser.add_argument("--model-path", default="yolov8m.pt")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("-o", "--output", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, help="baseline JSON from a previous run")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="fail (exit 1) if a stage's fps drops more than this fraction vs --compare")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    settings = {'detector': args.detector, 'model_path': args.model_path,
+                'stub_latency_ms': args.stub_latency_ms, 'fps': args.fps}
+    peak_rss_mb() # tracemalloc 대체 경로는 여기서부터 측정 시작
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = SyntheticClip(args.width, args.height, args.fps, args.frames, pan=args.pan)
+        clip_path = os.path.join(tmp, "synthetic.mp4")
+        clip.write(clip_path)
+        results = BenchmarkRunner(clip_path, settings, warmup=args.warmup).run(stages)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "settings": settings,
+            "clip": {"width": args.width, "height": args.height, "fps": args.fps,
+                     "frames": args.frames, "pan": args.pan},
+        },
+        "stages": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["stages"]
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        regressed = find_regressions(results, baseline, args.max_regression)
+        if regressed:
+            print(f"Regressed stages: {', '.join(regressed)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
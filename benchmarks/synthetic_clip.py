@@ -0,0 +1,195 @@
+"""
+결정론적(deterministic) 합성 테니스 영상 생성기.
+
+원근이 적용된 코트 라인, 포물선을 그리며 바운스하는 노란 공, 선택적인 카메라 팬을 그린다.
+같은 인자로 만들면 항상 같은 영상과 같은 정답(ground truth)이 나온다.
+
+    python -m benchmarks.synthetic_clip out.mp4 --frames 300 --pan
+"""
+import argparse
+import json
+import math
+import cv2
+import numpy as np
+from typing import Dict, Any, Iterator, Tuple
+
+# 코트 규격 (m): 복식 폭 x 길이
+COURT_W = 10.97
+COURT_L = 23.77
+SINGLES_MARGIN = 1.37
+SERVICE_FROM_NET = 6.40
+
+SURFACE_BGR = (70, 140, 60)
+OUTSIDE_BGR = (50, 100, 45)
+LINE_BGR = (255, 255, 255)
+BALL_BGR = (0, 255, 255)
+
+
+class SyntheticClip:
+    def __init__(self, width: int = 1280, height: int = 720, fps: float = 30.0, n_frames: int = 300,
+                 pan: bool = False, pan_amplitude_px: float = 40.0, shot_seconds: float = 1.2,
+                 perspective: float = 0.0, noise: float = 0.0, seed: int = 0, decoys: int = 0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.n_frames = n_frames
+        self.pan = pan
+        self.pan_amplitude_px = pan_amplitude_px
+        self.shot_seconds = shot_seconds
+        self.perspective = perspective
+        self.noise = noise
+        self.seed = seed
+        self.decoys = decoys # 코트 바깥쪽에 가만히 놓인 공 개수 (정지 오검출 제거 시험용)
+
+        # 코트(m) -> 이미지 변환. perspective=0 이면 사이드라인이 수직이라 자동 코트 검출이 그대로 동작하고,
+        # 값을 키우면 먼 쪽 베이스라인이 좁아지는 실제 방송 화면에 가까워진다.
+        src = np.float32([[0, 0], [COURT_W, 0], [COURT_W, COURT_L], [0, COURT_L]])
+        inset = width * 0.3 * perspective
+        dst = np.float32([
+            [width * 0.2 + inset, height * 0.14],
+            [width * 0.8 - inset, height * 0.14],
+            [width * 0.8, height * 0.94],
+            [width * 0.2, height * 0.94],
+        ])
+        self.H = cv2.getPerspectiveTransform(src, dst)
+        self._static_court = None
+
+    # ---- geometry ---------------------------------------------------------
+
+    def _pan_offset(self, frame_idx: int) -> float:
+        if not self.pan:
+            return 0.0
+        return self.pan_amplitude_px * math.sin(2 * math.pi * frame_idx / (self.fps * 4))
+
+    def _project(self, x: float, y: float, dx: float = 0.0) -> Tuple[float, float]:
+        p = cv2.perspectiveTransform(np.float32([[[x, y]]]), self.H)[0][0]
+        return float(p[0] + dx), float(p[1])
+
+    def ball_state(self, frame_idx: int) -> Dict[str, Any]:
+        """프레임 시점의 공 위치 (코트 m 좌표, 높이 m)와 바운스 여부"""
+        t = frame_idx / self.fps
+        shot = int(t // self.shot_seconds)
+        u = (t % self.shot_seconds) / self.shot_seconds  # 0..1 within a shot
+
+        # 샷마다 양쪽 베이스라인을 오가고, 좌우 위치는 결정론적으로 바뀜
+        ys = (1.0, COURT_L - 1.0) if shot % 2 == 0 else (COURT_L - 1.0, 1.0)
+        xs = (2.5 + (shot * 3.7) % 6.0, 2.5 + ((shot + 1) * 3.7) % 6.0)
+        x = xs[0] + (xs[1] - xs[0]) * u
+        y = ys[0] + (ys[1] - ys[0]) * u
+
+        # 높이: 0.7 지점에서 바운스하는 두 개의 포물선
+        bounce_u = 0.7
+        if u < bounce_u:
+            s = u / bounce_u
+            z = 1.0 * (1 - s) + 1.5 * 4 * s * (1 - s)
+        else:
+            s = (u - bounce_u) / (1 - bounce_u)
+            z = 1.2 * 4 * s * (1 - s) + 1.0 * s * s
+        z = max(0.0, z)
+
+        prev_u = ((frame_idx - 1) / self.fps % self.shot_seconds) / self.shot_seconds
+        bounced = frame_idx > 0 and prev_u < bounce_u <= u
+        return {"x": x, "y": y, "z": z, "bounce": bounced}
+
+    # ---- rendering --------------------------------------------------------
+
+    def _draw_court(self, img: np.ndarray, dx: float):
+        poly = np.int32([self._project(*p, dx) for p in [(0, 0), (COURT_W, 0), (COURT_W, COURT_L), (0, COURT_L)]])
+        cv2.fillConvexPoly(img, poly, SURFACE_BGR)
+
+        sm, half = SINGLES_MARGIN, COURT_L / 2
+        lines = [
+            ((0, 0), (COURT_W, 0)), ((0, COURT_L), (COURT_W, COURT_L)),
+            ((0, 0), (0, COURT_L)), ((COURT_W, 0), (COURT_W, COURT_L)),
+            ((sm, 0), (sm, COURT_L)), ((COURT_W - sm, 0), (COURT_W - sm, COURT_L)),
+            ((sm, half - SERVICE_FROM_NET), (COURT_W - sm, half - SERVICE_FROM_NET)),
+            ((sm, half + SERVICE_FROM_NET), (COURT_W - sm, half + SERVICE_FROM_NET)),
+            ((COURT_W / 2, half - SERVICE_FROM_NET), (COURT_W / 2, half + SERVICE_FROM_NET)),
+            ((-0.9, half), (COURT_W + 0.9, half)),
+        ]
+        for a, b in lines:
+            pa = tuple(int(round(v)) for v in self._project(*a, dx))
+            pb = tuple(int(round(v)) for v in self._project(*b, dx))
+            cv2.line(img, pa, pb, LINE_BGR, 3)
+
+    def _court_image(self, dx: float) -> np.ndarray:
+        if not self.pan:
+            if self._static_court is None:
+                self._static_court = np.full((self.height, self.width, 3), OUTSIDE_BGR, dtype=np.uint8)
+                self._draw_court(self._static_court, 0.0)
+            return self._static_court.copy()
+        img = np.full((self.height, self.width, 3), OUTSIDE_BGR, dtype=np.uint8)
+        self._draw_court(img, dx)
+        return img
+
+    def frames(self) -> Iterator[Tuple[np.ndarray, Dict[str, Any]]]:
+        """(BGR 프레임, 정답) 을 순서대로 생성"""
+        rng = np.random.default_rng(self.seed)
+        for i in range(self.n_frames):
+            dx = self._pan_offset(i)
+            img = self._court_image(dx)
+
+            state = self.ball_state(i)
+            gx, gy = self._project(state["x"], state["y"], dx)
+            # 높이는 해당 깊이에서 1m 가 차지하는 픽셀 수로 환산해 위로 올림
+            px_per_m = abs(self._project(state["x"] + 1.0, state["y"], dx)[0] - gx)
+            bx, by = gx, gy - state["z"] * px_per_m
+            for j in range(self.decoys):
+                # 양쪽 사이드라인 밖에 번갈아 놓인 공 (카메라 팬을 따라 같이 움직임)
+                side = -0.6 if j % 2 == 0 else COURT_W + 0.6
+                px, py = self._project(side, 3.0 + (j // 2) * 5.0, dx)
+                cv2.circle(img, (int(round(px)), int(round(py))), 7, BALL_BGR, -1)
+            cv2.circle(img, (int(round(bx)), int(round(by))), 6, BALL_BGR, -1)
+
+            if self.noise > 0:
+                img = np.clip(img.astype(np.int16) + rng.normal(0, self.noise, img.shape).astype(np.int16),
+                              0, 255).astype(np.uint8)
+
+            truth = {
+                "frame": i,
+                "ball_px": [bx, by],
+                "ball_ratio": [bx / self.width, by / self.height],
+                "ball_court": [state["x"] / COURT_W, state["y"] / COURT_L],
+                "height_m": state["z"],
+                "bounce": state["bounce"],
+            }
+            yield img, truth
+
+    def write(self, path: str, truth_path: str | None = None) -> Dict[str, Any]:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), self.fps, (self.width, self.height))
+        truth = []
+        for img, t in self.frames():
+            writer.write(img)
+            truth.append(t)
+        writer.release()
+
+        meta = {"width": self.width, "height": self.height, "fps": self.fps, "n_frames": self.n_frames,
+                "pan": self.pan, "decoys": self.decoys, "perspective": self.perspective, "noise": self.noise, "seed": self.seed, "frames": truth}
+        if truth_path:
+            with open(truth_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        return meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic tennis clip")
+    parser.add_argument("output")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--pan", action="store_true")
+    parser.add_argument("--perspective", type=float, default=0.0, help="0 = top-down, 0.3 = broadcast-like")
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decoys", type=int, default=0, help="stationary balls lying beside the court")
+    parser.add_argument("--truth", default=None, help="write ground truth JSON here")
+    args = parser.parse_args(argv)
+
+    clip = SyntheticClip(args.width, args.height, args.fps, args.frames, pan=args.pan,
+                         perspective=args.perspective, noise=args.noise, seed=args.seed, decoys=args.decoys)
+    clip.write(args.output, args.truth)
+
+
+if __name__ == "__main__":
+    main()
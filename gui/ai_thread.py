@@ -1,45 +1,370 @@
 import cv2
+import gc
+import os
+import tempfile
+import time
+import threading
+from collections import deque
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtGui import QImage
 from app.analysis_core import TennisAnalyzerCore 
+from app.results_cache import ResultsCache, record_from_stats, stats_from_record
+from app.quality import QualityController, available_ladder, start_level_for
+from app.rallies import RallyIndex, RallySegmenter
+from app.bounce_history import BounceHistory
+from app.inference_pool import ProcessInferencePool, WorkerDied
+from app.resources import ResourcePlan, pin_current_thread
 
 class AIWorker(QThread):
     # Signals
     analysis_stats_signal = pyqtSignal(dict) # Comprehensive stats signal
-    finished_signal = pyqtSignal()
+    rallies_signal = pyqtSignal(object) # app.rallies.RallyIndex: 분석 중 랠리가 하나 끝날 때마다 다시 만든 인덱스
 
-    def __init__(self, settings):
+    def __init__(self, settings, video_path=None, max_pending=4, cancel_event=None):
         super().__init__()
-        self.running = True
-        self.analyzer = TennisAnalyzerCore(settings)
+        # 취소 토큰: set() 되면 대기 중인 프레임을 버리고 run()이 끝남 (외부에서 공유 가능)
+        self.cancel_event = cancel_event or threading.Event()
+        self._connections = [] # (signal, slot) — shutdown()에서 반드시 끊음
+        self._shut_down = False
+
+        # inference_processes > 0: 모델 추론은 별도 프로세스(공유 메모리로 프레임 전달)에서 하고,
+        # 이 스레드는 코트 검출과 순서대로 공 고르기/궤적/바운스만 처리 → 무거운 설정에서도 GUI가 GIL을 뺏기지 않음
+        self.process_workers = settings.get('inference_processes', 0)
+        self.pool = None # 첫 프레임에서 shape을 알고 나서 생성
+        self.analyzer = TennisAnalyzerCore(settings, load_model=not self.process_workers)
         self.fps = settings.get('fps', 30)
 
+        # 분석 대기 프레임 (frame_idx, frame, timestamp, enqueued_at, segment). 분석이 밀리면 가장 오래된 프레임부터 버림
+        self.pending = deque(maxlen=max_pending)
+        self.frame_ready = threading.Event()
+        self.frames_dropped = 0
+        # segment: seek 할 때마다 바뀌는 번호. 큐에서 버려진 프레임 때문에 생긴 간격은 seek이 아니므로
+        # 같은 segment 안에서는 실제 경과 프레임 수로 이어서 분석함
+        self._segment = 0
+        self._last_enqueued_idx = None # GUI 스레드 전용
+        self._last_segment = None # 분석 스레드 전용: 직전에 추론한 프레임의 segment (캐시 적중 후엔 None)
+
+        # 실시간 품질 조절: 지연/큐 깊이를 보고 stride, 입력 크기, ROI, 모델 크기를 바꿈
+        self.quality = None
+        if settings.get('adaptive_quality', True):
+            # 가중치가 디스크에 있는 모델 크기로만 내림 (stub 검출기는 모델을 바꾸지 않으므로 전체 사다리)
+            ladder = available_ladder(self.analyzer.model_path) if self.analyzer.detector != 'stub' else None
+            self.quality = QualityController(self.fps,
+                                             target_latency_ms=settings.get('target_latency_ms', 150.0),
+                                             start_level=start_level_for(self.analyzer.model_path, ladder),
+                                             ladder=ladder)
+            self._apply_operating_point()
+
+        # 프레임 번호별 결과 저장소: 이미 분석한 구간은 다시 추론하지 않음 (seek/scrub)
+        self.results_cache = ResultsCache(video_path) if video_path else None
+
+        # 바운스 히스토리는 최근 N개만 메모리에 유지. 캐시가 있으면 이미 디스크에 있으므로 그냥 버리고,
+        # 없으면 임시 파일로 내보냄
+        spill_path = None
+        if self.results_cache is None:
+            spill_path = os.path.join(tempfile.gettempdir(), f"tennis_ai_bounces_{os.getpid()}_{id(self)}.jsonl")
+        self.analyzer.bounce_history = BounceHistory(settings.get('bounce_history_cap', 2000), spill_path)
+        # 캐시가 있으면 히스토리는 "이 프레임까지의 저장된 바운스" (재생 위치 기준, 분석 스레드 전용).
+        # 처음과 seek 후에는 _sync_bounces() 가 bounces_until 로 다시 만듦
+        self._bounces_until = None
+        # 추론한 프레임으로 랠리가 끝나는 시점을 찾음 (분석 스레드 전용, 뒤로 seek 하면 새로 시작)
+        self._rally_segmenter = None
+        self._rally_frame = None
+
+    @property
+    def running(self) -> bool:
+        return not self.cancel_event.is_set()
+
+    def connect_source(self, frame_signal):
+        """프레임 시그널(frame_idx, frame)을 분석 큐에 연결. 연결은 shutdown()에서 끊김."""
+        frame_signal.connect(self.enqueue_frame)
+        self._connections.append((frame_signal, self.enqueue_frame))
+
+    def connect_stats(self, slot):
+        self.analysis_stats_signal.connect(slot)
+        self._connections.append((self.analysis_stats_signal, slot))
+
+    def connect_rallies(self, slot):
+        self.rallies_signal.connect(slot)
+        self._connections.append((self.rallies_signal, slot))
+
     def run(self):
-        # The thread's event loop will be managed by Qt.
-        # We just need to keep the thread alive.
+        # 큐에 쌓인 프레임을 이 스레드에서 분석 (GUI 스레드는 enqueue_frame 만 호출)
+        plan = ResourcePlan.from_settings(self.analyzer.settings)
+        if plan.pin and not self.process_workers:
+            # 이 스레드(와 여기서 처음 만들어지는 torch 스레드들)를 추론용 코어에 고정 → 예약 코어는 Qt/디코딩 몫
+            pin_current_thread(plan.cpus_for("inference"))
         while self.running:
-            self.msleep(100) # Sleep to avoid busy-waiting
-    
+            if self.process_workers:
+                self._pump_pool()
+                continue
+
+            self.frame_ready.clear()
+            try:
+                frame_idx, frame, timestamp, enqueued_at, segment = self.pending.popleft()
+            except IndexError:
+                self.frame_ready.wait(0.1)
+                continue
+
+            start = time.perf_counter()
+            inferred = self.process_frame(frame_idx, frame, self._continues(segment), timestamp)
+            if inferred and self.quality is not None:
+                now = time.perf_counter()
+                if self.quality.observe((now - start) * 1000, (now - enqueued_at) * 1000, len(self.pending)):
+                    self._apply_operating_point()
+
+        self.pending.clear() # 취소됨: 대기 중인 프레임 참조를 놓음
+        self._stop_pool()
+
+    def _stop_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def _continues(self, segment) -> bool:
+        """이 프레임이 직전에 추론한 프레임과 같은 구간(seek 없음)인지. 분석 스레드에서만 호출."""
+        continuous = segment == self._last_segment
+        self._last_segment = segment
+        return continuous
+
+    def _pump_pool(self):
+        """프로세스 워커 모드: 대기 프레임을 공유 메모리 링으로 넘기고, 도착한 결과를 순서대로 반영"""
+        self.frame_ready.clear()
+        while self.pending and (self.pool is None or self.pool.has_free_slot()):
+            item = self.pending.popleft()
+            frame_idx, frame, timestamp, enqueued_at, segment = item
+            if self._emit_cached(frame_idx):
+                continue
+            if self.pool is None and not self._start_pool(frame.shape):
+                self.pending.appendleft(item) # 스레드 안 분석으로 전환됨
+                return
+            analyzer = self.analyzer
+            if not analyzer.court_lines_detected:
+                with analyzer.profiler.stage("court_detect"):
+                    analyzer._update_court(frame)
+            continuous = self._continues(segment)
+            # ROI 중심: 지금까지 고른 마지막 공 위치 (처리 중인 프레임만큼 늦지만 ROI 가 그만큼 넉넉함)
+            roi_center = analyzer.trajectory_buffer[-1][0] if continuous and analyzer.trajectory_buffer else None
+            if not self.pool.submit(frame_idx, frame, tag=(enqueued_at, continuous, timestamp),
+                                    roi_center=roi_center):
+                self.frames_dropped += 1 # 링과 다른 크기의 프레임
+
+        try:
+            results = self.pool.poll(timeout=0.005) if self.pool is not None and self.pool.in_flight else []
+        except WorkerDied as e:
+            # 처리 중이던 프레임은 버리고 이 스레드에서 직접 분석
+            self._fall_back_to_thread(str(e))
+            return
+        for frame_idx, detections, inference_ms, (enqueued_at, continuous, timestamp) in results:
+            if not self.running:
+                break
+            self.analyzer.profiler.record_ms("inference", inference_ms)
+            if self._finish_remote(frame_idx, detections, continuous, timestamp) and self.quality is not None:
+                latency_ms = (time.perf_counter() - enqueued_at) * 1000
+                backlog = len(self.pending) + max(0, self.pool.in_flight - self.process_workers)
+                # 워커 N개가 나눠 처리하므로 프레임당 처리 비용은 1/N
+                if self.quality.observe(inference_ms / self.process_workers, latency_ms, backlog):
+                    self._apply_operating_point()
+
+        if not results and not self.pending:
+            self.frame_ready.wait(0.005 if self.pool is not None and self.pool.in_flight else 0.1)
+
+    def _start_pool(self, frame_shape) -> bool:
+        try:
+            self.pool = ProcessInferencePool(self.analyzer.settings, frame_shape, workers=self.process_workers)
+        except Exception as e:
+            self._fall_back_to_thread(f"Inference worker processes failed ({e})")
+            return False
+        if self.quality is not None:
+            self.pool.set_operating_point(self.quality.operating_point)
+        return True
+
+    def _fall_back_to_thread(self, reason: str):
+        print(f"{reason}. Falling back to in-thread analysis.")
+        self._stop_pool()
+        self.process_workers = 0
+        self._last_segment = None # 처리 중이던 프레임은 사라졌으므로 다음 프레임에서 다시 맞춤
+        try:
+            self.analyzer._load_model()
+        except Exception as e:
+            print(f"Failed to load the model in-thread ({e}). Analysis stopped.")
+            self.cancel()
+
+    def cancel(self):
+        """취소 토큰을 set 하고 run()을 깨움 (블록하지 않음)"""
+        self.cancel_event.set()
+        self.frame_ready.set()
+
     def stop(self):
-        self.running = False
-        self.quit()
-        self.wait()
+        """취소 후 스레드가 끝날 때까지 대기. 여러 번 불러도 안전."""
+        self.cancel()
+        if self.isRunning():
+            self.wait()
+        if self.results_cache is not None:
+            self.results_cache.close()
+
+    def shutdown(self):
+        """
+        시그널 연결을 모두 끊고 스레드를 멈춘 뒤 모델/트래커/캐시/히스토리를 해제합니다.
+        MainWindow가 워커를 교체하거나 닫을 때 호출. 여러 번 불러도 안전.
+        """
+        if self._shut_down:
+            return
+        self._shut_down = True
+        for signal, slot in self._connections:
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass # 이미 끊겼거나 상대 객체가 사라짐
+        self._connections = []
+        self.stop()
+        self.analyzer.bounce_history.clear()
+        self.analyzer.release()
+        self.results_cache = None
+        self.quality = None
+        gc.collect()
 
-    def process_frame(self, frame):
+    def enqueue_frame(self, frame_idx, frame, timestamp=None):
+        """VideoWidget.frame_to_process_signal 에 연결 (GUI 스레드에서 호출됨, 큐에 넣기만 함)"""
         if not self.running:
             return
+        self._track_seek(frame_idx)
+        stride = self.quality.stride if self.quality is not None else 1
+        if stride > 1 and frame_idx % stride and (self.results_cache is None or frame_idx not in self.results_cache):
+            return # 이번 동작점에서는 분석하지 않는 프레임
+        if len(self.pending) == self.pending.maxlen:
+            self.frames_dropped += 1
+        self.pending.append((frame_idx, frame, timestamp, time.perf_counter(), self._segment))
+        self.frame_ready.set()
+
+    def _track_seek(self, frame_idx):
+        """재생 위치가 바로 다음 프레임이 아니면(seek) 새 segment를 시작"""
+        last = self._last_enqueued_idx
+        if last is None or not 0 < frame_idx - last <= self.analyzer.max_frame_gap:
+            self._segment += 1
+        self._last_enqueued_idx = frame_idx
+
+    def _apply_operating_point(self):
+        point = self.quality.operating_point
+        print(f"Quality level {self.quality.level}: {point}")
+        try:
+            self.analyzer.set_operating_point(**point)
+        except Exception as e:
+            # 새 모델 로드 실패: 분석기는 이전 모델 그대로 계속 분석
+            print(f"Failed to apply quality level {self.quality.level} ({e}). Keeping the current model.")
+        if self.pool is not None:
+            self.pool.set_operating_point(point)
+
+    def process_frame(self, frame_idx, frame, continuous: bool = False, timestamp=None) -> bool:
+        """프레임 하나를 처리하고 stats를 내보냄. 실제로 추론했으면 True (캐시 적중이면 False)"""
+        if not self.running:
+            return False
 
         try:
+            if self._emit_cached(frame_idx):
+                return False
+            continuous = self._resync_if_needed(frame_idx, continuous)
+            self._sync_bounces(frame_idx - 1)
+
             self.analyzer.settings['fps'] = self.fps 
-            annotated_frame, ball_pos_ratio, stats = self.analyzer.analyze_frame(frame)
-            
-            # Emit comprehensive stats
-            self.analysis_stats_signal.emit(stats)
+            prev_bounce_count = len(self.analyzer.bounce_history)
+            annotated_frame, ball_pos_ratio, stats = self.analyzer.analyze_frame(frame, frame_idx=frame_idx,
+                                                                                 continuous=continuous,
+                                                                                 timestamp=timestamp)
+            self._publish(frame_idx, ball_pos_ratio, stats, prev_bounce_count)
+            return True
             
         except Exception as e:
             print(f"Processing Error in Thread: {e}")
             import traceback
             traceback.print_exc()
+            return False
+
+    def _finish_remote(self, frame_idx, detections, continuous: bool = False, timestamp=None) -> bool:
+        """
+        워커 프로세스의 검출 박스에서 (이 스레드의 트래커로, 프레임 순서대로) 공을 고르고 궤적/바운스 로직에
+        반영한 뒤 stats를 내보냄.
+        (중복 프레임 건너뛰기는 스레드 안 분석에서만: 워커는 이미 프레임을 받아 추론한 뒤라 아낄 게 없음)
+        """
+        try:
+            analyzer = self.analyzer
+            continuous = self._resync_if_needed(frame_idx, continuous)
+            self._sync_bounces(frame_idx - 1)
+            analyzer.settings['fps'] = self.fps
+            prev_bounce_count = len(analyzer.bounce_history)
+            frames_elapsed = analyzer._advance_to(frame_idx, continuous)
+            with analyzer.profiler.stage("post_process"):
+                ball_pos_ratio, ball_pos_court = analyzer._locate_ball(detections, self.pool.ring.frame_shape, frame_idx)
+                stats = analyzer.update_position(ball_pos_ratio, ball_pos_court, frame_idx, frames_elapsed, timestamp)
+            self._publish(frame_idx, ball_pos_ratio, stats, prev_bounce_count)
+            return True
+        except Exception as e:
+            print(f"Processing Error in Thread: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    def _emit_cached(self, frame_idx) -> bool:
+        cache = self.results_cache
+        record = cache.get(frame_idx) if cache is not None else None
+        if record is None:
+            return False
+        # 이미 분석된 프레임: 저장된 결과를 그대로 사용. 다음 추론 프레임은 캐시로 궤적을 다시 맞춤
+        self._last_segment = None
+        self._sync_bounces(frame_idx)
+        self.analysis_stats_signal.emit(stats_from_record(record, *self.analyzer.bounce_snapshot()))
+        return True
+
+    def _resync_if_needed(self, frame_idx, continuous: bool) -> bool:
+        """
+        seek/캐시 적중 후 처음 분석하는 프레임이면 직전 구간의 저장 결과로 궤적 상태를 이어 붙임.
+        이어서 분석해도 되면 True (analyze_frame의 continuous로 넘김)
+        """
+        cache = self.results_cache
+        if continuous or cache is None:
+            return continuous
+        self.analyzer.resync(frame_idx, cache.records_before(frame_idx, self.analyzer.trajectory_buffer.maxlen))
+        return True
+
+    def _sync_bounces(self, frame_idx):
+        """
+        바운스 히스토리를 저장된 결과의 frame_idx 까지로 맞춤 (재생 중 아직 나오지 않은 바운스는 빼고 순서 유지).
+        직전 위치에서 조금 앞으로 간 것이면 그 사이 레코드만 덧붙이고, seek(뒤로/멀리)이면 bounces_until 로 다시 만듦.
+        """
+        cache = self.results_cache
+        if cache is None or frame_idx == self._bounces_until:
+            return
+        history = self.analyzer.bounce_history
+        until = self._bounces_until
+        if until is not None and 0 < frame_idx - until <= 64:
+            for i in range(until + 1, frame_idx + 1):
+                bounce = (cache.get(i) or {}).get("bounce")
+                if bounce:
+                    history.append(tuple(bounce))
+        else:
+            history.clear()
+            history.extend(cache.bounces_until(frame_idx))
+        self._bounces_until = frame_idx
+
+    def _update_rallies(self, frame_idx, stats):
+        """랠리 하나가 끝나면 저장된 결과 전체로 랠리 인덱스를 다시 만들어 내보냄 (캐시가 있을 때만)"""
+        segmenter = self._rally_segmenter
+        if segmenter is None or frame_idx <= self._rally_frame:
+            segmenter = self._rally_segmenter = RallySegmenter(self.fps)
+        self._rally_frame = frame_idx
+        last = segmenter.segments[-1] if segmenter.segments else None
+        segmenter.update(frame_idx, stats.get("ball_pos_ratio"), stats.get("ball_speed", 0.0),
+                         stats.get("ball_pos_court") is not None)
+        if segmenter.segments and segmenter.segments[-1] != last:
+            self.rallies_signal.emit(RallyIndex.from_records(self.results_cache.records, self.fps))
+
+    def _publish(self, frame_idx, ball_pos_ratio, stats, prev_bounce_count):
+        if self.results_cache is not None:
+            self.results_cache.put(frame_idx, record_from_stats(ball_pos_ratio, stats, prev_bounce_count))
+            self._bounces_until = frame_idx # 이 프레임의 바운스는 분석기가 이미 히스토리에 추가함
+            self._update_rallies(frame_idx, stats)
+        if self.quality is not None:
+            stats["quality"] = dict(self.quality.stats(), frames_dropped=self.frames_dropped)
 
-    def __del__(self):
-        self.stop()
\ No newline at end of file
+        # Emit comprehensive stats
+        self.analysis_stats_signal.emit(stats)
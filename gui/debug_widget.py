@@ -1,30 +1,174 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, 
-                             QTextEdit)
-from PyQt6.QtCore import Qt
+import time
+from collections import deque
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFormLayout,
+                             QPlainTextEdit, QPushButton, QFileDialog, QSpinBox)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont
+from app.profiling import PROFILER
 
 class DebugWidget(QWidget):
-    def __init__(self):
+    """
+    분석 stats를 보여주는 디버그 창.
+
+    update_log()는 최신 stats를 저장만 하고, 실제 화면 갱신은 QTimer로 UI 주기(기본 5Hz)에 맞춰
+    한 번에 처리합니다. 값이 바뀐 필드의 QLabel만 갱신하고, 히스토리 같은 큰 필드는 개수/요약만
+    표시합니다. 바운스·공 검출 손실 같은 이벤트는 링 버퍼 스크롤 로그에 쌓입니다.
+    """
+    DEFAULT_UI_HZ = 5
+    EVENT_LOG_SIZE = 500 # 이벤트 로그에 남길 최대 줄 수
+
+    def __init__(self, ui_hz: int = DEFAULT_UI_HZ):
         super().__init__()
         self.setWindowTitle("Debug Information")
-        self.setGeometry(100, 100, 400, 300)
-        
+        self.setGeometry(100, 100, 420, 520)
+
+        self._latest_stats = None # 아직 화면에 반영되지 않은 최신 stats
+        self._field_labels = {} # key -> QLabel
+        self._field_texts = {} # key -> 마지막으로 표시한 문자열
+        self._timings_text = ""
+        self._pending_events = deque(maxlen=self.EVENT_LOG_SIZE)
+        self._last_bounce_count = 0
+        self._ball_was_detected = None
+
         layout = QVBoxLayout(self)
-        
-        self.log_text_edit = QTextEdit()
-        self.log_text_edit.setReadOnly(True)
-        
+
+        # 1. 필드별 라벨 (변경된 것만 갱신)
         layout.addWidget(QLabel("Debug Log:"))
-        layout.addWidget(self.log_text_edit)
-        
+        self.fields_layout = QFormLayout()
+        layout.addLayout(self.fields_layout)
+
+        # 2. 단계별 타이밍
+        self.timings_label = QLabel()
+        self.timings_label.setFont(QFont("Monospace"))
+        self.timings_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.timings_label)
+
+        # 3. 이벤트 로그 (링 버퍼)
+        layout.addWidget(QLabel("Events:"))
+        self.event_log = QPlainTextEdit()
+        self.event_log.setReadOnly(True)
+        self.event_log.setMaximumBlockCount(self.EVENT_LOG_SIZE)
+        layout.addWidget(self.event_log)
+
+        buttons = QHBoxLayout()
+        btn_export_trace = QPushButton("Export Trace...")
+        btn_export_trace.clicked.connect(self.export_trace)
+        btn_reset_timings = QPushButton("Reset Timings")
+        btn_reset_timings.clicked.connect(PROFILER.reset)
+        self.spin_ui_hz = QSpinBox()
+        self.spin_ui_hz.setRange(1, 30)
+        self.spin_ui_hz.setSuffix(" Hz")
+        self.spin_ui_hz.setValue(ui_hz)
+        self.spin_ui_hz.valueChanged.connect(self.set_update_rate)
+        buttons.addWidget(btn_export_trace)
+        buttons.addWidget(btn_reset_timings)
+        buttons.addStretch()
+        buttons.addWidget(QLabel("UI rate:"))
+        buttons.addWidget(self.spin_ui_hz)
+        layout.addLayout(buttons)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.flush)
+        self.set_update_rate(ui_hz)
+
+    def set_update_rate(self, hz: int):
+        self.refresh_timer.start(int(1000 / max(1, hz)))
+
     def update_log(self, stats: dict):
-        log_text = ""
+        """분석 스레드에서 stats가 올 때마다 호출됨. 이벤트만 감지하고 화면 갱신은 flush()에서."""
+        self._latest_stats = stats
+        self._collect_events(stats)
+
+    def _collect_events(self, stats: dict):
+        stamp = time.strftime("%H:%M:%S")
+
+        # bounce_history 는 최근 항목만 담은 tuple, bounce_count 는 전체 개수
+        bounce_history = stats.get("bounce_history") or ()
+        bounce_count = stats.get("bounce_count", len(bounce_history))
+        if bounce_count > self._last_bounce_count:
+            new_bounces = bounce_history[-min(bounce_count - self._last_bounce_count, len(bounce_history)):] if bounce_history else ()
+            self._last_bounce_count = bounce_count - len(new_bounces)
+            for x, y, result in new_bounces:
+                self._pending_events.append(f"[{stamp}] Bounce #{self._last_bounce_count + 1} ({x:.3f}, {y:.3f}) {result}")
+                self._last_bounce_count += 1
+        elif bounce_count < self._last_bounce_count:
+            self._last_bounce_count = bounce_count # 새 분석 시작
+
+        if "ball_pos_ratio" in stats:
+            detected = stats["ball_pos_ratio"] is not None
+            if self._ball_was_detected is not None and detected != self._ball_was_detected:
+                self._pending_events.append(f"[{stamp}] Ball {'reacquired' if detected else 'lost'}")
+            self._ball_was_detected = detected
+
+    def flush(self):
+        """UI 주기마다 호출: 바뀐 필드만 갱신하고 쌓인 이벤트를 로그에 추가"""
+        if self._pending_events:
+            self.event_log.appendPlainText("\n".join(self._pending_events))
+            self._pending_events.clear()
+
+        stats = self._latest_stats
+        if stats is None or not self.isVisible():
+            return
+        self._latest_stats = None
+
         for key, value in stats.items():
-            if isinstance(value, float):
-                log_text += f"{key}: {value:.2f}\n"
-            else:
-                log_text += f"{key}: {value}\n"
-        
-        self.log_text_edit.setPlainText(log_text)
+            if key == "timings":
+                continue
+            text = self._format_value(value)
+            if self._field_texts.get(key) == text:
+                continue
+            label = self._field_labels.get(key)
+            if label is None:
+                label = QLabel()
+                self._field_labels[key] = label
+                self.fields_layout.addRow(f"{key}:", label)
+            label.setText(text)
+            self._field_texts[key] = text
+
+        timings_text = self._format_timings(stats.get("timings"))
+        if timings_text != self._timings_text:
+            self.timings_label.setText(timings_text)
+            self._timings_text = timings_text
+
+    @staticmethod
+    def _format_value(value) -> str:
+        if isinstance(value, float) or hasattr(value, 'dtype'):
+            return f"{value:.2f}"
+        if isinstance(value, (list, tuple, deque)):
+            # 히스토리 같은 큰 필드는 전체를 문자열로 만들지 않고 개수 + 마지막 항목만
+            if len(value) > 4:
+                return f"{len(value)} items (last: {value[-1]})"
+            return "(" + ", ".join(f"{v:.3f}" if isinstance(v, float) or hasattr(v, 'dtype') else str(v)
+                                   for v in value) + ")"
+        if isinstance(value, dict):
+            # 작은 dict(예: quality 동작점)는 한 줄로 풀어서 표시
+            if len(value) > 10:
+                return f"{len(value)} keys"
+            return " ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in value.items())
+        return str(value)
+
+    @staticmethod
+    def _format_timings(timings) -> str:
+        if not timings:
+            return ""
+        text = "timings (ms)      last    p50    p99\n"
+        for stage, t in timings.items():
+            if t.get("count"):
+                text += f"  {stage:<14}{t['last_ms']:>6.1f} {t['p50_ms']:>6.1f} {t['p99_ms']:>6.1f}\n"
+        return text.rstrip()
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Stage Trace", "tennis_ai_trace.json", "Chrome Trace (*.json)")
+        if path:
+            PROFILER.export_chrome_trace(path)
 
     def clear_log(self):
-        self.log_text_edit.clear()
+        for label in self._field_labels.values():
+            label.clear()
+        self._field_texts = {}
+        self._timings_text = ""
+        self.timings_label.clear()
+        self.event_log.clear()
+        self._pending_events.clear()
+        self._last_bounce_count = 0
+        self._ball_was_detected = None
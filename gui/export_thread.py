@@ -0,0 +1,34 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from app.export import export_annotated_video
+from app.pipeline import PipelineCancelled
+
+class ExportWorker(QThread):
+    # Signals
+    progress_signal = pyqtSignal(int, int) # (done, total)
+    export_finished_signal = pyqtSignal(dict) # summary
+    export_failed_signal = pyqtSignal(str)
+
+    def __init__(self, video_path, output_path, settings):
+        super().__init__()
+        self.video_path = video_path
+        self.output_path = output_path
+        self.settings = settings
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            summary = export_annotated_video(self.video_path, self.output_path, self.settings,
+                                             progress_callback=self.progress_signal.emit,
+                                             cancel_event=self.cancel_event)
+            self.export_finished_signal.emit(summary)
+        except PipelineCancelled:
+            self.export_failed_signal.emit("Export cancelled.")
+        except Exception as e:
+            print(f"Export Error in Thread: {e}")
+            import traceback
+            traceback.print_exc()
+            self.export_failed_signal.emit(str(e))
+
+    def cancel(self):
+        self.cancel_event.set()
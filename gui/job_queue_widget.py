@@ -0,0 +1,114 @@
+import os
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QTableWidget, QTableWidgetItem, QProgressBar, QSpinBox,
+                             QFileDialog, QHeaderView, QAbstractItemView)
+from PyQt6.QtCore import QObject, pyqtSignal
+from app.jobs import JobScheduler, AnalysisJob
+
+class _JobUpdateBridge(QObject):
+    """스케줄러 수집 스레드의 콜백을 GUI 스레드로 넘기기 위한 시그널 브리지"""
+    job_updated = pyqtSignal(object)
+
+class JobQueueWidget(QWidget):
+    """여러 영상을 분석 큐에 넣고 작업별 진행률/fps/ETA를 보여주는 화면"""
+    COLUMNS = ["Video", "Status", "Progress", "FPS", "ETA"]
+
+    def __init__(self, settings_provider=None):
+        super().__init__()
+        self.settings_provider = settings_provider # 큐에 넣을 때 사용할 분석 설정을 돌려주는 함수
+        self.scheduler = None
+        self.rows = {} # job_id -> row
+        self.bridge = _JobUpdateBridge()
+        self.bridge.job_updated.connect(self.update_job_row)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        toolbar = QHBoxLayout()
+        btn_add = QPushButton("➕ Add Videos")
+        btn_add.clicked.connect(self.add_videos)
+        self.btn_pause = QPushButton("⏸ Pause")
+        self.btn_pause.clicked.connect(lambda: self._for_selected("pause"))
+        self.btn_resume = QPushButton("▶ Resume")
+        self.btn_resume.clicked.connect(lambda: self._for_selected("resume"))
+        self.btn_cancel = QPushButton("✖ Cancel")
+        self.btn_cancel.clicked.connect(lambda: self._for_selected("cancel"))
+
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(1, max(1, os.cpu_count() or 1))
+        self.spin_workers.setValue(min(2, self.spin_workers.maximum()))
+
+        toolbar.addWidget(btn_add)
+        toolbar.addWidget(self.btn_pause)
+        toolbar.addWidget(self.btn_resume)
+        toolbar.addWidget(self.btn_cancel)
+        toolbar.addStretch()
+        toolbar.addWidget(QLabel("Workers:"))
+        toolbar.addWidget(self.spin_workers)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+
+        layout.addLayout(toolbar)
+        layout.addWidget(self.table)
+
+    def _ensure_scheduler(self):
+        if self.scheduler is None:
+            # 워커 수는 첫 작업을 넣을 때 고정됨. GUI 재생과 같이 돌므로 재생용 코어를 남기는 예산으로
+            self.scheduler = JobScheduler(workers=self.spin_workers.value(), on_update=self.bridge.job_updated.emit,
+                                          preset="interactive")
+            self.spin_workers.setEnabled(False)
+        return self.scheduler
+
+    def add_videos(self):
+        files, _ = QFileDialog.getOpenFileNames(self, "Add Videos to Queue", "", "Video Files (*.mp4 *.avi *.mov *.mkv)")
+        for path in files:
+            self.add_job(path, self.settings_provider() if self.settings_provider else {})
+
+    def add_job(self, video_path: str, settings: dict):
+        return self._ensure_scheduler().submit(video_path, settings)
+
+    def _for_selected(self, method_name: str):
+        """선택된 작업마다 scheduler.<method_name>(job_id) 호출 (스케줄러가 아직 없으면 무시)"""
+        if self.scheduler is None:
+            return
+        action = getattr(self.scheduler, method_name)
+        selected_rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for job_id, row in self.rows.items():
+            if row in selected_rows:
+                action(job_id)
+
+    def update_job_row(self, job: AnalysisJob):
+        row = self.rows.get(job.job_id)
+        if row is None:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self.rows[job.job_id] = row
+            self.table.setItem(row, 0, QTableWidgetItem(os.path.basename(job.video_path)))
+            self.table.item(row, 0).setToolTip(job.video_path)
+            bar = QProgressBar()
+            bar.setRange(0, 1000)
+            self.table.setCellWidget(row, 2, bar)
+
+        status = job.status if not job.phase or job.status != "running" else f"{job.status} ({job.phase})"
+        if job.error:
+            status = f"{status}: {job.error}"
+        self.table.setItem(row, 1, QTableWidgetItem(status))
+        self.table.cellWidget(row, 2).setValue(int(job.progress * 1000))
+        self.table.setItem(row, 3, QTableWidgetItem(f"{job.fps:.1f}"))
+        self.table.setItem(row, 4, QTableWidgetItem(self._format_eta(job.eta_seconds)))
+
+    @staticmethod
+    def _format_eta(seconds) -> str:
+        if seconds is None:
+            return "-"
+        minutes, secs = divmod(int(seconds), 60)
+        return f"{minutes // 60:d}:{minutes % 60:02d}:{secs:02d}"
+
+    def shutdown(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
@@ -0,0 +1,40 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from app.analysis_core import TennisAnalyzerCore
+from app.live import LiveCapture, LiveSession
+
+class LiveWorker(QThread):
+    """
+    라이브 소스(카메라/RTSP)를 LiveSession으로 분석하는 스레드.
+    프레임 표시는 VideoWidget.load_stream()이 같은 LiveCapture를 peek 해서 따로 하므로,
+    분석이 느려도 화면은 끊기지 않고 분석은 항상 가장 새 프레임만 봅니다.
+    """
+    analysis_stats_signal = pyqtSignal(dict)
+    live_finished_signal = pyqtSignal(dict) # LiveSession.summary()
+
+    def __init__(self, capture: LiveCapture, settings, max_latency_ms: float | None = 500.0):
+        super().__init__()
+        self.capture = capture
+        self.settings = dict(settings, fps=capture.fps)
+        self.max_latency_ms = max_latency_ms
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            analyzer = TennisAnalyzerCore(self.settings)
+            session = LiveSession(analyzer, self.capture, max_latency_ms=self.max_latency_ms,
+                                  on_stats=self.analysis_stats_signal.emit)
+            summary = session.run(stop_event=self.cancel_event)
+            analyzer.release()
+        except Exception as e:
+            print(f"Live Analysis Error in Thread: {e}")
+            import traceback
+            traceback.print_exc()
+            self.capture.stop()
+            summary = {}
+        self.live_finished_signal.emit(summary)
+
+    def stop(self):
+        self.cancel_event.set()
+        if self.isRunning():
+            self.wait()
@@ -1,10 +1,18 @@
+import os
 from PyQt6.QtWidgets import (QMainWindow, QStackedWidget, QWidget, QVBoxLayout, 
-                             QHBoxLayout, QPushButton, QLabel, QSizePolicy, QCheckBox)
+                             QHBoxLayout, QPushButton, QLabel, QSizePolicy, QCheckBox,
+                             QFileDialog, QProgressDialog, QMessageBox)
 from PyQt6.QtCore import Qt, pyqtSignal
 from .setup_widget import SetupWidget
 from .video_widget import VideoWidget
 from .ai_thread import AIWorker # Import AIWorker
 from .debug_widget import DebugWidget # Import DebugWidget
+from .export_thread import ExportWorker
+from .job_queue_widget import JobQueueWidget
+from .live_thread import LiveWorker
+from app.bounce_index import BounceIndex
+from app.live import LiveCapture
+from app.rallies import rally_index_for
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -13,6 +21,10 @@ class MainWindow(QMainWindow):
         self.resize(1400, 850)
         
         self.ai_thread = None # Initialize AI thread
+        self.live_thread = None
+        self.export_thread = None
+        self.current_video_path = None
+        self.current_settings = {}
         self.debug_widget = DebugWidget() # Create debug widget
         
         # 메인 위젯
@@ -35,9 +47,13 @@ class MainWindow(QMainWindow):
         self.result_page = self.create_result_page()
         self.setup_page = SetupWidget(self)
         self.setup_page.analyze_video_signal.connect(self.start_analysis) # Connect setup_page signal
+        self.job_queue_page = JobQueueWidget(settings_provider=self.setup_page.current_settings)
+        self.setup_page.queue_video_signal.connect(self.queue_analysis)
+        self.setup_page.live_stream_signal.connect(self.start_live_analysis)
         
         self.stack.addWidget(self.setup_page)   # Index 0: Configuration
         self.stack.addWidget(self.result_page)  # Index 1: Result
+        self.stack.addWidget(self.job_queue_page)  # Index 2: Batch job queue
         
         main_layout.addWidget(self.stack)
 
@@ -54,8 +70,10 @@ class MainWindow(QMainWindow):
         
         self.btn_tab_config = QPushButton("1. Configuration")
         self.btn_tab_result = QPushButton("2. Analysis Result")
+        self.btn_tab_queue = QPushButton("3. Job Queue")
+        self.tab_buttons = [self.btn_tab_config, self.btn_tab_result, self.btn_tab_queue]
         
-        for btn in [self.btn_tab_config, self.btn_tab_result]:
+        for btn in self.tab_buttons:
             btn.setFixedSize(200, 40)
             btn.setCheckable(True)
             btn.setStyleSheet("""
@@ -68,6 +86,7 @@ class MainWindow(QMainWindow):
         
         self.btn_tab_config.clicked.connect(lambda: self.switch_tab(0))
         self.btn_tab_result.clicked.connect(lambda: self.switch_tab(1))
+        self.btn_tab_queue.clicked.connect(lambda: self.switch_tab(2))
 
         self.chk_show_debug = QCheckBox("Show Debug")
         self.chk_show_debug.setStyleSheet("color: white;")
@@ -77,6 +96,7 @@ class MainWindow(QMainWindow):
         layout.addStretch()
         layout.addWidget(self.btn_tab_config)
         layout.addWidget(self.btn_tab_result)
+        layout.addWidget(self.btn_tab_queue)
         layout.addWidget(self.chk_show_debug)
         layout.addStretch()
 
@@ -100,6 +120,7 @@ class MainWindow(QMainWindow):
         
         btn_save = QPushButton("💾 Save Project")
         btn_save.setStyleSheet("background-color: #4CAF50; color: white; padding: 8px 16px; font-weight: bold;")
+        btn_save.clicked.connect(self.save_project)
         
         toolbar.addWidget(btn_discard)
         toolbar.addWidget(btn_save)
@@ -124,37 +145,133 @@ class MainWindow(QMainWindow):
         # Get FPS from VideoWidget after loading video
         video_fps = self.result_video.fps
         settings['fps'] = video_fps # Add FPS to settings for analyzer
+        self.current_video_path = video_path
+        self.current_settings = dict(settings)
 
-        if self.ai_thread and self.ai_thread.isRunning():
-            self.ai_thread.stop()
+        # 이전 워커는 시그널을 끊고 모델까지 해제한 뒤 교체
+        self.teardown_ai_thread()
+        self.teardown_live_thread()
 
-        self.ai_thread = AIWorker(settings)
-        self.ai_thread.analysis_stats_signal.connect(self.result_video.update_analysis_data)
-        self.ai_thread.analysis_stats_signal.connect(self.debug_widget.update_log) # Connect to debug widget
-        self.ai_thread.finished_signal.connect(self.ai_analysis_finished)
+        self.ai_thread = AIWorker(settings, video_path)
+        cache = self.ai_thread.results_cache
+        self.result_video.set_bounce_index(cache.bounce_index() if cache is not None else BounceIndex())
+        self.result_video.set_rally_index(rally_index_for(video_path, cache.records if cache is not None else None,
+                                                          video_fps))
+        self.ai_thread.connect_stats(self.result_video.update_analysis_data)
+        self.ai_thread.connect_stats(self.debug_widget.update_log) # Connect to debug widget
+        self.ai_thread.connect_rallies(self.result_video.set_rally_index)
         
-        # Connect VideoWidget's frame signal to AIWorker's processing slot
-        self.result_video.frame_to_process_signal.connect(self.ai_thread.process_frame)
+        # Connect VideoWidget's frame signal to AIWorker's frame queue
+        self.ai_thread.connect_source(self.result_video.frame_to_process_signal)
         
         self.ai_thread.start()
         self.result_video.play_video() # Start video playback
         
         self.result_video.display_text("Analyzing video...") # Update message
 
-    def ai_analysis_finished(self):
-        """AI 분석 스레드가 완료될 때 호출됩니다."""
-        print("AI Analysis Finished.")
-        self.ai_thread = None # Clear thread reference
-        self.result_video.display_text("Analysis Complete.") # Update message
+    def start_live_analysis(self, source: str, settings: dict):
+        """카메라/스트림을 실시간 분석: 항상 가장 새 프레임만 분석하고 늦은 결과는 버림"""
+        self.teardown_ai_thread()
+        self.teardown_live_thread()
+        try:
+            capture = LiveCapture(source)
+        except IOError as e:
+            QMessageBox.warning(self, "Live Stream", str(e))
+            return
+
+        self.switch_to_result_tab()
+        self.current_video_path = None # 라이브 결과는 캐시/내보내기 대상이 아님
+        self.current_settings = dict(settings)
+        self.result_video.load_stream(capture)
+
+        self.live_thread = LiveWorker(capture, settings)
+        self.live_thread.analysis_stats_signal.connect(self.result_video.update_analysis_data)
+        self.live_thread.analysis_stats_signal.connect(self.debug_widget.update_log)
+        self.live_thread.live_finished_signal.connect(self.live_analysis_finished)
+        self.live_thread.start()
+
+    def teardown_live_thread(self):
+        worker, self.live_thread = self.live_thread, None
+        if worker is None:
+            return
+        try:
+            worker.live_finished_signal.disconnect(self.live_analysis_finished)
+        except TypeError:
+            pass
+        worker.stop()
+        self.result_video.stop_stream()
+        worker.deleteLater()
+
+    def live_analysis_finished(self, summary: dict):
+        if summary:
+            print(f"Live analysis finished: {summary['frames_analyzed']}/{summary['frames_captured']} frames, "
+                  f"latency p50 {summary['latency_p50_ms']:.1f} ms / p99 {summary['latency_p99_ms']:.1f} ms")
+        self.live_thread = None
+
+    def teardown_ai_thread(self):
+        """현재 AI 워커를 정리합니다: 시그널 해제, 취소, 스레드 종료 대기, 모델/캐시 해제."""
+        worker, self.ai_thread = self.ai_thread, None
+        if worker is None:
+            return
+        worker.shutdown()
+        worker.deleteLater()
+
+    def save_project(self):
+        """분석 오버레이가 그려진 영상을 파일로 내보냅니다 (결과 캐시가 있으면 재추론 없이)."""
+        if not self.current_video_path:
+            QMessageBox.warning(self, "Warning", "Please run an analysis first!")
+            return
+        if self.export_thread and self.export_thread.isRunning():
+            return
+
+        default_path = os.path.splitext(self.current_video_path)[0] + "_annotated.mp4"
+        output_path, _ = QFileDialog.getSaveFileName(self, "Save Annotated Video", default_path, "Video Files (*.mp4)")
+        if not output_path:
+            return
+
+        self.export_progress = QProgressDialog("Exporting annotated video...", "Cancel", 0, 100, self)
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.setAutoClose(False)
+
+        self.export_thread = ExportWorker(self.current_video_path, output_path, dict(self.current_settings))
+        self.export_thread.progress_signal.connect(self.update_export_progress)
+        self.export_thread.export_finished_signal.connect(self.export_finished)
+        self.export_thread.export_failed_signal.connect(self.export_failed)
+        self.export_progress.canceled.connect(self.export_thread.cancel)
+        self.export_thread.start()
+
+    def update_export_progress(self, done, total):
+        if total > 0:
+            self.export_progress.setValue(min(100, done * 100 // total))
+
+    def export_finished(self, summary: dict):
+        self.export_progress.close()
+        QMessageBox.information(self, "Export Complete",
+                                f"Saved {summary['frames_written']} frames to\n{summary['output_path']}")
+
+    def export_failed(self, message: str):
+        self.export_progress.close()
+        QMessageBox.warning(self, "Export Failed", message)
+
+    def queue_analysis(self, video_path: str, settings: dict):
+        """현재 분석을 멈추지 않고 영상을 배치 작업 큐에 추가합니다."""
+        self.job_queue_page.add_job(video_path, settings)
+        self.switch_tab(2)
 
     def switch_tab(self, index):
         self.stack.setCurrentIndex(index)
-        if index == 0:
-            self.btn_tab_config.setChecked(True)
-            self.btn_tab_result.setChecked(False)
-        else:
-            self.btn_tab_config.setChecked(False)
-            self.btn_tab_result.setChecked(True)
+        for i, btn in enumerate(self.tab_buttons):
+            btn.setChecked(i == index)
+
+    def closeEvent(self, event):
+        self.teardown_ai_thread()
+        self.teardown_live_thread()
+        self.job_queue_page.shutdown()
+        self.result_video.stop_proxy()
+        self.setup_page.preview_player.stop_proxy()
+        self.result_video.close_video()
+        self.setup_page.preview_player.close_video()
+        super().closeEvent(event)
 
     def switch_to_result_tab(self):
         self.switch_tab(1)
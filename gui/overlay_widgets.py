@@ -1,81 +1,210 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QGraphicsOpacityEffect, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QGraphicsOpacityEffect,
                              QFrame, QHBoxLayout)
-from PyQt6.QtCore import Qt, QPoint, QRect
-from PyQt6.QtGui import QPainter, QColor, QPen, QBrush
+from PyQt6.QtCore import Qt, QPoint, QRect, QRectF, pyqtSignal
+from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QPixmap, QImage
+import numpy as np
+from app.bounce_index import BounceIndex
+from app.heatmap import BounceHeatmap
+
+RECENT_BOUNCES = 12 # 히트맵 위에 결과 색으로 따로 찍는 최근 바운스 수
+
+
+def _heat_lut() -> np.ndarray:
+    """밀도(0~255) -> RGBA. 0 은 투명, 낮으면 반투명 노랑, 높을수록 불투명 빨강"""
+    t = np.linspace(0.0, 1.0, 256, dtype=np.float32)
+    lut = np.empty((256, 4), dtype=np.uint8)
+    lut[:, 0] = 255
+    lut[:, 1] = (230 * (1 - t)).astype(np.uint8)
+    lut[:, 2] = 0
+    lut[:, 3] = (40 + 180 * np.sqrt(t)).astype(np.uint8)
+    lut[0, 3] = 0
+    return lut
+
 
 # ==========================================================
 # [Core Component] 테니스 코트를 직접 그리는 위젯
 # ==========================================================
 class CourtMapWidget(QWidget):
+    """
+    코트 미니맵. 매 paintEvent 마다 모든 라인/바운스를 새로 그리지 않도록
+    - 코트 라인은 (크기, 코트 종류)별로 QPixmap 에 한 번만 그려서 재사용
+    - 바운스는 BounceHeatmap(np.histogram2d 격자)에 모으고, 격자가 바뀔 때만 작은 이미지로 다시 만듦
+    - 공이 움직일 때는 이전/현재 공 위치 주변만 다시 그림
+    그래서 바운스 수와 상관없이 다시 그리는 비용이 일정합니다.
+    바운스는 BounceIndex 에도 프레임 번호와 함께 넣어서, 클릭하면 가장 가까운 바운스의 프레임을 bounce_clicked 로 알림.
+    """
+    bounce_clicked = pyqtSignal(int) # frame_idx
+    HIT_RADIUS_PX = 10
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setStyleSheet("background-color: #333333; border-radius: 5px;") 
-        
+        self.setStyleSheet("background-color: #333333; border-radius: 5px;")
+
         self.colors = {
             "Good": QColor("#4CAF50"), "Bad": QColor("#FF9800"),
             "Out": QColor("#F44336"), "Ball": QColor("#FFFF00")
         }
-        self.ball_pos = None 
-        self.bounce_history = [] 
+        self.ball_pos = None
+        self.court_type = "Singles"
+        self.heatmap = BounceHeatmap()
+        self.bounce_index = BounceIndex()
+        self._window = None # 시간 창 (start, end) — hit-test 도 히트맵과 같은 바운스만 대상
+        self.recent_bounces = [] # 최근 RECENT_BOUNCES 개 (x, y, result)
+        self._bounces_seen = 0 # 지금까지 받은 바운스 수 (bounce_count 와 비교해서 새 것만 추가)
+        self._court_cache = {} # (w, h, court_type) -> QPixmap
+        self._heat_image = None
+        self._heat_version = -1
+        self._lut = _heat_lut()
 
     def set_shot_color(self, shot_type, color):
         self.colors[shot_type] = color
         self.update()
 
-    def update_ball_position(self, x_ratio, y_ratio):
-        self.ball_pos = (x_ratio, y_ratio)
+    def set_court_type(self, court_type: str):
+        if court_type != self.court_type:
+            self.court_type = court_type
+            self.update()
+
+    def set_time_window(self, start=None, end=None, last_frames=None):
+        """히트맵에 보일 바운스의 프레임 구간 (BounceHeatmap.set_window). 인자를 모두 생략하면 전체."""
+        self.heatmap.set_window(start, end, last_frames)
+        self._window = None if last_frames is not None or (start is None and end is None) else (start, end)
         self.update()
 
-    def update_bounce_history(self, history: list):
-        """AI Core에서 보낸 누적 바운스 히스토리 데이터를 받음"""
-        self.bounce_history = history
+    def set_bounce_index(self, index: BounceIndex):
+        """이미 분석된 바운스 (ResultsCache.bounce_index())로 히트맵과 hit-test 를 시작"""
+        self.bounce_index = index
+        self.heatmap.clear()
+        rows = index.query()
+        self.heatmap.add(index.positions(rows), index.frames(rows))
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and len(self.bounce_index) and self.width() > 0:
+            x = event.position().x() / self.width()
+            y = event.position().y() / self.height()
+            row = self.bounce_index.nearest(x, y, self.HIT_RADIUS_PX / self.width(), self._window,
+                                            aspect=self.width() / max(1, self.height()))
+            if row is not None:
+                self.bounce_clicked.emit(self.bounce_index.row(row)["frame"])
+                return
+        super().mousePressEvent(event)
+
+    def _ball_rect(self, pos) -> QRect:
+        x, y = int(pos[0] * self.width()), int(pos[1] * self.height())
+        return QRect(x - 8, y - 8, 16, 16)
+
+    def update_ball_position(self, x_ratio, y_ratio):
+        # 공 주변만 무효화: 코트/히트맵은 캐시에서 그 영역만 다시 칠해짐
+        if self.ball_pos is not None:
+            self.update(self._ball_rect(self.ball_pos))
+        self.ball_pos = (x_ratio, y_ratio)
+        self.update(self._ball_rect(self.ball_pos))
+
+    def update_bounce_history(self, history, bounce_count: int | None = None, frame_idx: int | None = None):
+        """
+        AI Core에서 보낸 바운스 히스토리 (stats['bounce_history'], 최근 항목만 담긴 tuple)를 받음.
+        bounce_count(stats['bounce_count'])로 새로 생긴 바운스만 골라 히트맵에 더하고, 그 프레임 번호는
+        frame_idx 로 기록함 (시간 창 필터용). 개수가 줄었으면 (seek/재분석) 처음부터 다시 모음.
+        """
+        total = len(history) if bounce_count is None else bounce_count
+        frame = 0 if frame_idx is None else frame_idx
+        if total < self._bounces_seen:
+            self.heatmap.clear()
+            self._bounces_seen = 0
+        new = min(total - self._bounces_seen, len(history))
+        if new > 0:
+            fresh = list(history[len(history) - new:])
+            self.heatmap.add([b[:2] for b in fresh], [frame] * new)
+            if new == 1 and frame_idx is not None:
+                self.bounce_index.add(frame_idx, *fresh[0])
+            self.recent_bounces = (self.recent_bounces + fresh)[-RECENT_BOUNCES:]
+            self.update()
+        elif total == 0 and self.recent_bounces:
+            self.recent_bounces = []
+            self.update()
+        self._bounces_seen = total
+
+    def _court_pixmap(self) -> QPixmap:
+        key = (self.width(), self.height(), self.court_type)
+        pixmap = self._court_cache.get(key)
+        if pixmap is None:
+            if len(self._court_cache) > 4:
+                self._court_cache.clear() # 크기 조절 중에 쌓인 예전 크기들
+            pixmap = QPixmap(self.width(), self.height())
+            painter = QPainter(pixmap)
+            self._draw_court(painter)
+            painter.end()
+            self._court_cache[key] = pixmap
+        return pixmap
+
+    def _draw_court(self, painter: QPainter):
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.fillRect(self.rect(), QColor("#2b2b2b"))
+        painter.fillRect(QRect(0, 0, self.width(), self.height()), QColor("#2b2b2b"))
 
-        pen = QPen(QColor("white"), 2)
-        painter.setPen(pen)
-        
         w = self.width(); h = self.height()
         mx = w * 0.15; my = h * 0.1
         cw = w - (2 * mx); ch = h - (2 * my)
-        
+        singles_margin = cw * 0.15
+
+        if self.court_type == "Singles":
+            # 단식: 복식 앨리는 아웃 영역이므로 어둡게
+            alley = QColor(0, 0, 0, 70)
+            painter.fillRect(QRectF(mx, my, singles_margin, ch), alley)
+            painter.fillRect(QRectF(w - mx - singles_margin, my, singles_margin, ch), alley)
+
+        pen = QPen(QColor("white"), 2)
+        painter.setPen(pen)
+
         # 코트 라인 그리기 (비율 기반)
         painter.drawRect(int(mx), int(my), int(cw), int(ch)) # 외곽선
-        
-        singles_margin = cw * 0.15
+
         painter.drawLine(int(mx+singles_margin), int(my), int(mx+singles_margin), int(h-my))
         painter.drawLine(int(w-mx-singles_margin), int(my), int(w-mx-singles_margin), int(h-my))
-        
-        service_margin = ch * 0.25 
+
+        service_margin = ch * 0.25
         painter.drawLine(int(mx+singles_margin), int(my+service_margin), int(w-mx-singles_margin), int(my+service_margin))
         painter.drawLine(int(mx+singles_margin), int(h-my-service_margin), int(w-mx-singles_margin), int(h-my-service_margin))
         painter.drawLine(int(w/2), int(my+service_margin), int(w/2), int(h-my-service_margin))
         painter.drawLine(int(mx-5), int(h/2), int(w-mx+5), int(h/2)) # 네트
 
-        # 1. 누적 바운스 히스토리 점 그리기
-        for bounce_x, bounce_y, result_type in self.bounce_history:
-            color = self.colors.get(result_type, QColor("gray"))
-            
-            draw_x = bounce_x * w
-            draw_y = bounce_y * h
-            
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.setBrush(QBrush(color))
-            painter.drawEllipse(QPoint(int(draw_x), int(draw_y)), 4, 4)
+    def _heat_qimage(self) -> QImage | None:
+        """히트맵 격자가 바뀌었을 때만 (bins 크기의) RGBA 이미지를 다시 만듦"""
+        if self._heat_version != self.heatmap.version:
+            self._heat_version = self.heatmap.version
+            density = self.heatmap.density()
+            if density.max() <= 0:
+                self._heat_image = None
+            else:
+                rgba = np.ascontiguousarray(self._lut[(density * 255).astype(np.uint8)])
+                h, w = density.shape
+                self._heat_image = QImage(rgba.data, w, h, 4 * w, QImage.Format.Format_RGBA8888).copy()
+        return self._heat_image
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._court_pixmap())
+
+        # 1. 바운스 밀도 히트맵 (격자 이미지를 위젯 크기로 부드럽게 확대)
+        heat = self._heat_qimage()
+        if heat is not None:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(QRectF(0, 0, self.width(), self.height()), heat)
 
-        # 2. 현재 공 그리기 (노란 점)
+        w = self.width(); h = self.height()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+
+        # 2. 최근 바운스만 결과 색으로 점 찍기
+        for bounce_x, bounce_y, result_type in self.recent_bounces:
+            painter.setBrush(QBrush(self.colors.get(result_type, QColor("gray"))))
+            painter.drawEllipse(QPoint(int(bounce_x * w), int(bounce_y * h)), 4, 4)
+
+        # 3. 현재 공 그리기 (노란 점)
         if self.ball_pos:
             bx, by = self.ball_pos
-            draw_x = bx * w
-            draw_y = by * h
-            
-            painter.setPen(Qt.PenStyle.NoPen)
             painter.setBrush(QBrush(self.colors["Ball"]))
-            painter.drawEllipse(QPoint(int(draw_x), int(draw_y)), 6, 6)
+            painter.drawEllipse(QPoint(int(bx * w), int(by * h)), 6, 6)
 
 # ==========================================================
 # [Interaction Component] 크기 조절/이동이 가능한 껍데기
@@ -205,4 +334,9 @@ class AnalysisOverlay(ResizableDraggableWidget):
         self.court_map.set_shot_color(shot_type, color)
         
     def update_ball_on_map(self, x, y):
-        self.court_map.update_ball_position(x, y)
\ No newline at end of file
+        self.court_map.update_ball_position(x, y)
+
+    def update_bounces_on_map(self, stats: dict):
+        """분석 stats 의 바운스 히스토리를 코트 맵 히트맵에 반영"""
+        self.court_map.update_bounce_history(stats.get('bounce_history', ()), stats.get('bounce_count'),
+                                             stats.get('frame_idx'))
\ No newline at end of file
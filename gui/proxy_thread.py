@@ -0,0 +1,28 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from app.pipeline import PipelineCancelled
+from app.proxy import build_proxy
+
+class ProxyWorker(QThread):
+    """스크러빙용 프록시/썸네일을 백그라운드에서 만듦 (이미 있으면 바로 proxy_ready_signal)"""
+    proxy_ready_signal = pyqtSignal(object) # app.proxy.ProxyMedia
+
+    def __init__(self, video_path):
+        super().__init__()
+        self.video_path = video_path
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            media = build_proxy(self.video_path, cancel_event=self.cancel_event)
+        except PipelineCancelled:
+            return
+        except Exception as e:
+            print(f"Proxy build failed, scrubbing uses the original video: {e}")
+            return
+        self.proxy_ready_signal.emit(media)
+
+    def stop(self):
+        self.cancel_event.set()
+        if self.isRunning():
+            self.wait()
@@ -1,15 +1,19 @@
+import os
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QLabel, QCheckBox, QGroupBox, QFileDialog, QLineEdit, 
                              QSizePolicy, QSlider, QProgressDialog, QMessageBox,
-                             QColorDialog, QComboBox) 
+                             QColorDialog, QComboBox, QSpinBox, QInputDialog)
 from PyQt6.QtCore import Qt, pyqtSlot, pyqtSignal
 from PyQt6.QtGui import QColor, QPixmap, QImage 
 from .video_widget import VideoWidget
 from .overlay_widgets import AnalysisOverlay
+from app.preview import DEFAULT_PREVIEW_STRIDE
 # from .ai_thread import AIWorker # AIWorker is now managed by MainWindow
 
 class SetupWidget(QWidget):
     analyze_video_signal = pyqtSignal(str, dict) # Signal to start analysis in MainWindow
+    queue_video_signal = pyqtSignal(str, dict) # Signal to add the video to the batch job queue
+    live_stream_signal = pyqtSignal(str, dict) # Signal to start live analysis of a camera/stream source
 
     def __init__(self, main_window):
         super().__init__()
@@ -49,6 +53,7 @@ class SetupWidget(QWidget):
         # Overlay Init
         self.analysis_overlay = AnalysisOverlay(self.preview_player.screen)
         self.analysis_overlay.move(50, 50) # This overlay is for setup/preview only
+        self.analysis_overlay.court_map.bounce_clicked.connect(self.preview_player.seek_to_frame)
 
         # [Right] Settings Panel
         right_panel = QVBoxLayout()
@@ -60,6 +65,7 @@ class SetupWidget(QWidget):
         self.combo_court_type.addItems(["Singles (단식)", "Doubles (복식)"])
         layout_court.addWidget(QLabel("Match Type:"))
         layout_court.addWidget(self.combo_court_type)
+        self.combo_court_type.currentTextChanged.connect(self.change_court_type)
         group_court.setLayout(layout_court)
 
         # 2. Opacity Slider & Colors
@@ -91,7 +97,19 @@ class SetupWidget(QWidget):
         self.chk_ball = QCheckBox("Ball Tracking"); self.chk_ball.setChecked(True)
         self.chk_pose = QCheckBox("Pose Estimation")
         self.chk_bounce = QCheckBox("Bounce Map"); self.chk_bounce.setChecked(True)
+        self.chk_preview = QCheckBox("Quick Preview (queued jobs)"); self.chk_preview.setChecked(True)
+        self.chk_preview.setToolTip("Detect every 5th frame first for a fast bounce map, then refine at full rate")
         layout_ai.addWidget(self.chk_ball); layout_ai.addWidget(self.chk_pose); layout_ai.addWidget(self.chk_bounce)
+        layout_ai.addWidget(self.chk_preview)
+
+        # 0 = 분석 스레드에서 직접 추론, N = 별도 프로세스 N개 (GUI와 GIL을 나누지 않음)
+        self.spin_processes = QSpinBox()
+        self.spin_processes.setRange(0, max(1, (os.cpu_count() or 2) - 1))
+        self.spin_processes.setValue(0)
+        self.spin_processes.setSpecialValueText("Off (in-thread)")
+        self.spin_processes.setToolTip("Run detection in separate worker processes (frames passed via shared memory)")
+        layout_ai.addWidget(QLabel("Inference Processes:"))
+        layout_ai.addWidget(self.spin_processes)
         group_ai.setLayout(layout_ai)
 
         # 4. Convert Button
@@ -100,11 +118,24 @@ class SetupWidget(QWidget):
         self.btn_convert.setStyleSheet("background-color: #FF5722; color: white; font-weight: bold; font-size: 16px; border-radius: 8px;")
         self.btn_convert.clicked.connect(self.start_conversion)
 
+        self.btn_queue = QPushButton("ADD TO QUEUE")
+        self.btn_queue.setFixedHeight(36)
+        self.btn_queue.setStyleSheet("background-color: #555; color: white; font-weight: bold; border-radius: 6px;")
+        self.btn_queue.clicked.connect(self.add_to_queue)
+
+        self.btn_live = QPushButton("📡 LIVE STREAM...")
+        self.btn_live.setFixedHeight(36)
+        self.btn_live.setStyleSheet("background-color: #555; color: white; font-weight: bold; border-radius: 6px;")
+        self.btn_live.setToolTip("Analyze a camera index or stream URL (rtsp://...) in real time")
+        self.btn_live.clicked.connect(self.start_live)
+
         # 패널 배치 순서
         right_panel.addWidget(group_court)
         right_panel.addWidget(group_opacity)
         right_panel.addWidget(group_ai)
         right_panel.addStretch()
+        right_panel.addWidget(self.btn_live)
+        right_panel.addWidget(self.btn_queue)
         right_panel.addWidget(self.btn_convert)
 
         main_layout.addWidget(video_container, stretch=3)
@@ -143,19 +174,43 @@ class SetupWidget(QWidget):
         # self.analysis_overlay.set_opacity_value(value) 
         pass
         
-    def start_conversion(self):
-        video_path = self.path_label.text()
-        if not video_path or "Select" in video_path:
-            QMessageBox.warning(self, "Warning", "Please load a video first!")
-            return
+    def change_court_type(self, text):
+        self.analysis_overlay.court_map.set_court_type(text.split(' ')[0])
 
-        # Prepare settings dictionary
-        settings = {
+    def current_settings(self) -> dict:
+        """Prepare settings dictionary"""
+        return {
             'court_type': self.combo_court_type.currentText().split(' ')[0], # Singles or Doubles
             'show_ball': self.chk_ball.isChecked(),
             'show_pose': self.chk_pose.isChecked(),
+            'preview_stride': DEFAULT_PREVIEW_STRIDE if self.chk_preview.isChecked() else 0,
+            'inference_processes': self.spin_processes.value(),
             'colors': {k: v.name() for k, v in self.shot_colors.items()} # Pass color names
         }
+
+    def _selected_video_path(self):
+        video_path = self.path_label.text()
+        if not video_path or "Select" in video_path:
+            QMessageBox.warning(self, "Warning", "Please load a video first!")
+            return None
+        return video_path
+
+    def add_to_queue(self):
+        video_path = self._selected_video_path()
+        if video_path:
+            self.queue_video_signal.emit(video_path, self.current_settings())
+
+    def start_live(self):
+        source, ok = QInputDialog.getText(self, "Live Stream", "Camera index or stream URL:", text="0")
+        if ok and source.strip():
+            self.live_stream_signal.emit(source.strip(), self.current_settings())
+
+    def start_conversion(self):
+        video_path = self._selected_video_path()
+        if not video_path:
+            return
+
+        settings = self.current_settings()
         
         self.analyze_video_signal.emit(video_path, settings) # Emit signal to MainWindow
         # MainWindow will call switch_to_result_tab()
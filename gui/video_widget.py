@@ -13,16 +13,37 @@ from PyQt6.QtCore import Qt, QTimer, QUrl, QEvent, QPointF, pyqtSignal
 from PyQt6.QtGui import QImage, QPixmap, QPainter, QColor, QFont
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from .volume_control import VolumeControlWidget
+from .proxy_thread import ProxyWorker
+from app.bounce_index import BounceIndex
+from app.playback import PresentationClock, FrameDecoder, FrameScheduler
+from app.rallies import RallyIndex
+from app.profiling import PROFILER
+
+HIT_RADIUS_PX = 12 # 바운스 마커 클릭 판정 반경 (화면 픽셀)
 
 class VideoWidget(QWidget):
-    frame_to_process_signal = pyqtSignal(object)
+    frame_to_process_signal = pyqtSignal(int, object, object) # (frame_idx, frame, timestamp 초 또는 None)
 
     def __init__(self):
         super().__init__()
         
         self.cap = None
-        self.timer = QTimer()
+        self.live_capture = None # load_stream() 으로 연 app.live.LiveCapture
+        self._live_seq = -1
+        self.timer = QTimer() # 라이브 소스: 주기적으로 가장 최근 프레임을 확인
         self.timer.timeout.connect(self.next_frame)
+        # 파일 재생: decode-ahead 스레드가 읽어 둔 프레임 중 시계(오디오 위치 또는 monotonic)가 가리키는
+        # 프레임을 보여줌. 타이머 주기를 세는 대신 시계로 표시 시각을 정하므로 ms 반올림이나 GUI 멈춤이
+        # 쌓여서 밀리지 않고, 늦은 프레임은 버림
+        self.play_timer = QTimer()
+        self.play_timer.setSingleShot(True)
+        self.play_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.play_timer.timeout.connect(self._tick)
+        self.decoder = None # app.playback.FrameDecoder (load_video 에서 만듦)
+        self.clock = PresentationClock(self._audio_position)
+        self.scheduler = FrameScheduler(30)
+        self._rebase_clock = False # seek/재생 시작 후 첫 프레임 표시 시각으로 시계를 맞춤
+        self._shown_idx = 0 # 화면에 보이는 프레임
         self.is_playing = False
         self.total_frames = 0
         self.fps = 30
@@ -33,6 +54,15 @@ class VideoWidget(QWidget):
         self.audio_output.setVolume(0.5)
         
         self.bounce_history = []
+        self.bounce_index = BounceIndex() # 클릭한 바운스 마커 → 프레임 이동
+        self._bounces_seen = 0
+        self._frame_size = None # 마지막으로 표시한 프레임 (w, h)
+        self.rally_index = RallyIndex() # 랠리 시작으로 바로 이동 (app.rallies, 분석 결과가 있을 때)
+
+        # 스크러빙: 슬라이더를 끄는 동안은 저해상도 all-intra 프록시를 보여주고 놓으면 원본으로 돌아감
+        self.proxy = None # app.proxy.ProxyMedia (준비되면)
+        self.proxy_worker = None
+        self._scrubbing_proxy = False
         
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         self.init_ui()
@@ -59,12 +89,24 @@ class VideoWidget(QWidget):
         btn_prev.clicked.connect(lambda: self.seek_relative(-10))
         btn_next = QPushButton("+10s")
         btn_next.clicked.connect(lambda: self.seek_relative(10))
+        self.btn_prev_rally = QPushButton("◀ Rally")
+        self.btn_prev_rally.setToolTip("Previous rally (Page Up)")
+        self.btn_prev_rally.clicked.connect(self.prev_rally)
+        self.btn_next_rally = QPushButton("Rally ▶")
+        self.btn_next_rally.setToolTip("Next rally (Page Down)")
+        self.btn_next_rally.clicked.connect(self.next_rally)
 
         self.slider = QSlider(Qt.Orientation.Horizontal)
         self.slider.setRange(0, 0)
         self.slider.sliderPressed.connect(self.pause_video)
-        self.slider.sliderReleased.connect(self.resume_video)
-        self.slider.sliderMoved.connect(self._set_media_player_position)
+        self.slider.sliderReleased.connect(self._end_scrub)
+        self.slider.sliderMoved.connect(self._scrub)
+        # 슬라이더 위에 마우스를 올리면 그 위치의 썸네일을 미리 보여줌
+        self.slider.setMouseTracking(True)
+        self.slider.installEventFilter(self)
+        self.thumb_preview = QLabel(self)
+        self.thumb_preview.setStyleSheet("border: 1px solid white; background-color: black;")
+        self.thumb_preview.hide()
 
         self.volume_control = VolumeControlWidget(self.audio_output)
         
@@ -72,6 +114,8 @@ class VideoWidget(QWidget):
         controls_layout.addWidget(btn_prev)
         controls_layout.addWidget(self.slider)
         controls_layout.addWidget(btn_next)
+        controls_layout.addWidget(self.btn_prev_rally)
+        controls_layout.addWidget(self.btn_next_rally)
         controls_layout.addStretch()
         controls_layout.addWidget(self.volume_control)
 
@@ -87,6 +131,10 @@ class VideoWidget(QWidget):
             self.seek_relative(-2)
         elif event.key() == Qt.Key.Key_Right:
             self.seek_relative(2)
+        elif event.key() == Qt.Key.Key_PageUp:
+            self.prev_rally()
+        elif event.key() == Qt.Key.Key_PageDown:
+            self.next_rally()
         else:
             super().keyPressEvent(event)
 
@@ -94,6 +142,8 @@ class VideoWidget(QWidget):
         self.btn_play.setEnabled(enable)
         self.slider.setEnabled(enable)
         self.volume_control.setEnabled(enable)
+        self.btn_prev_rally.setEnabled(enable and len(self.rally_index) > 0)
+        self.btn_next_rally.setEnabled(enable and len(self.rally_index) > 0)
 
     def display_text(self, text):
         self.screen.setText(f"<span style='color:white; font-size:20px;'>{text}</span>")
@@ -101,7 +151,8 @@ class VideoWidget(QWidget):
     def load_video(self, file_path):
         self.display_text("Loading...")
         
-        if self.cap: self.cap.release()
+        self.stop_stream()
+        self.close_video()
         self.cap = cv2.VideoCapture(file_path)
         if not self.cap.isOpened():
             self.display_text("Failed to Load Video")
@@ -110,56 +161,282 @@ class VideoWidget(QWidget):
         self.fps = self.cap.get(cv2.CAP_PROP_FPS)
         if self.fps == 0: self.fps = 30
         
+        self._start_proxy(file_path)
         self.media_player.setSource(QUrl.fromLocalFile(file_path))
         self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
         self.slider.setRange(0, self.total_frames)
+        # 여기부터 cap 은 디코더 스레드만 사용
+        self.scheduler = FrameScheduler(self.fps)
+        self.decoder = FrameDecoder(self.cap)
         
         self.enable_controls(True)
         self.setFocus()
         self.next_frame()
 
+    def load_stream(self, capture):
+        """
+        라이브 소스 표시 모드. 디코딩은 capture 의 스레드가 하고, 여기서는 가장 최근 프레임만 꺼내 그림.
+        분석은 LiveWorker 가 같은 capture 에서 따로 가져가므로 frame_to_process_signal 은 내보내지 않음.
+        """
+        self.pause_video()
+        self.close_video()
+        self.stop_stream()
+        self.stop_proxy()
+        self.live_capture = capture
+        self._live_seq = -1
+        self.fps = capture.fps
+        self.enable_controls(False) # seek/일시정지 없음
+        self.timer.start(max(1, int(1000 / self.fps / 2))) # 프레임 주기의 절반마다 확인
+        self.setFocus()
+
+    def close_video(self):
+        """디코더 스레드를 멈추고 파일을 닫음 (다른 영상/스트림을 열거나 창을 닫을 때)"""
+        if self.is_playing:
+            self.pause_video()
+        if self.decoder is not None:
+            self.decoder.stop()
+            self.decoder = None
+        if self.cap:
+            self.cap.release()
+        self.cap = None
+
+    def _start_proxy(self, file_path):
+        self.stop_proxy()
+        self.proxy_worker = ProxyWorker(file_path)
+        self.proxy_worker.proxy_ready_signal.connect(self._proxy_ready)
+        self.proxy_worker.start()
+
+    def stop_proxy(self):
+        if self.proxy_worker is not None:
+            self.proxy_worker.proxy_ready_signal.disconnect(self._proxy_ready)
+            self.proxy_worker.stop()
+            self.proxy_worker = None
+        if self.proxy is not None:
+            self.proxy.close()
+            self.proxy = None
+
+    def _proxy_ready(self, media):
+        self.proxy = media
+
+    def _scrub(self, frame_idx):
+        if self.proxy is None:
+            self._set_media_player_position(frame_idx) # 프록시 준비 전: 예전처럼 원본에서 seek
+            return
+        # 프록시 프레임은 분석으로 보내지 않음 (표시만)
+        frame = self.proxy.read(frame_idx)
+        if frame is not None:
+            self._scrubbing_proxy = True
+            with PROFILER.stage("display"):
+                self._display_frame(frame)
+
+    def _end_scrub(self):
+        if self._scrubbing_proxy:
+            self._scrubbing_proxy = False
+            self._set_media_player_position(self.slider.value()) # 놓은 위치에서 원본으로 한 번만 seek
+        self.resume_video()
+
+    def eventFilter(self, obj, event):
+        if obj is self.slider and self.proxy is not None:
+            if event.type() == QEvent.Type.MouseMove:
+                self._show_thumbnail(event.position().x())
+            elif event.type() == QEvent.Type.Leave:
+                self.thumb_preview.hide()
+        return super().eventFilter(obj, event)
+
+    def _show_thumbnail(self, x):
+        if self.slider.width() <= 0 or not self.total_frames:
+            return
+        frame_idx = int(max(0.0, min(1.0, x / self.slider.width())) * self.total_frames)
+        thumb = self.proxy.thumbnail(frame_idx)
+        if thumb is None:
+            return
+        rgb = cv2.cvtColor(thumb, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb.shape
+        self.thumb_preview.setPixmap(QPixmap.fromImage(QImage(rgb.data, w, h, ch * w, QImage.Format.Format_RGB888).copy()))
+        self.thumb_preview.resize(w + 2, h + 2)
+        pos = self.slider.mapTo(self, QPointF(x, 0).toPoint())
+        self.thumb_preview.move(int(max(0, min(self.width() - w - 2, pos.x() - w / 2))), max(0, pos.y() - h - 6))
+        self.thumb_preview.show()
+        self.thumb_preview.raise_()
+
+    def stop_stream(self):
+        if self.live_capture is not None:
+            self.timer.stop()
+            self.live_capture.stop()
+            self.live_capture = None
+
+    def _next_live_frame(self):
+        latest = self.live_capture.peek()
+        if latest is None:
+            if self.live_capture.ended:
+                self.stop_stream()
+                self.display_text("Stream Ended")
+            return
+        seq, frame, _ = latest
+        if seq == self._live_seq:
+            return
+        self._live_seq = seq
+        with PROFILER.stage("display"):
+            self._display_frame(frame)
+
     def next_frame(self):
-        if not self.cap or not self.cap.isOpened(): return
-        
-        ret, frame = self.cap.read()
-        if ret:
-            # Emit the raw frame for background processing
-            self.frame_to_process_signal.emit(frame.copy())
-            
-            # Immediately display the raw frame to ensure real-time playback
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_image.shape
-            qt_image = QImage(rgb_image.data, w, h, ch * w, QImage.Format.Format_RGB888)
-            
-            # Draw bounce history on the QImage before displaying
-            painter = QPainter(qt_image)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            for bounce_x, bounce_y, result_type in self.bounce_history:
-                x_pixel = int(bounce_x * w)
-                y_pixel = int(bounce_y * h)
-                
-                color_map = {'Good': QColor(0, 255, 0), 'Out': QColor(255, 0, 0), 'Net': QColor(255, 255, 0)}
-                color = color_map.get(result_type, QColor("gray"))
-                painter.setBrush(color)
-                painter.setPen(color)
-                painter.drawEllipse(QPointF(x_pixel, y_pixel), 5, 5)
-            painter.end()
-
-            scaled_pixmap = QPixmap.fromImage(qt_image).scaled(
-                self.screen.size(), 
-                Qt.AspectRatioMode.KeepAspectRatio, 
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.screen.setPixmap(scaled_pixmap)
-
-            if not self.slider.isSliderDown():
-                self.slider.setValue(int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)))
-        else:
+        """다음 프레임 하나를 바로 보여줌 (라이브면 가장 최근 프레임). 재생 중 표시는 _tick 이 함"""
+        if self.live_capture is not None:
+            self._next_live_frame()
+            return
+        if self.decoder is None: return
+
+        item = self.decoder.get()
+        if item is None:
             self.pause_video()
+            return
+        self.clock.seek(self.scheduler.due_time(item[0], item[2]))
+        self._present(item)
+
+    def _tick(self):
+        if not self.is_playing or self.decoder is None:
+            return
+        if self._rebase_clock:
+            first = self.decoder.peek()
+            if first is not None:
+                # seek/재생 시작 직후: 첫 프레임 표시 시각부터 (VFR 영상은 frame_idx / fps 와 다름)
+                self.clock.seek(self.scheduler.due_time(first[0], first[2]))
+                self._rebase_clock = False
+        item, dropped, wait = self.scheduler.take(self.decoder, self.clock.now())
+        if item is not None:
+            self._present(item, dropped)
+        elif self.decoder.ended and self.decoder.peek() is None:
+            self.pause_video()
+            return
+        self.play_timer.start(max(1, min(int(wait * 1000), int(1000 / self.fps))))
+
+    def _present(self, item, dropped=()):
+        # 프레임 번호를 같이 넘겨서 분석기가 seek(불연속)를 알아채고 저장된 결과를 재사용할 수 있게 함.
+        # 늦어서 표시를 건너뛴 프레임도 디코딩은 끝났으므로 분석에는 넘김.
+        # cap.read() allocates a new array each call and the analyzer treats it as read-only,
+        # so no defensive copy is needed here.
+        for frame_idx, frame, timestamp in dropped:
+            self.frame_to_process_signal.emit(frame_idx, frame, timestamp)
+        frame_idx, frame, timestamp = item
+        self.frame_to_process_signal.emit(frame_idx, frame, timestamp)
+
+        with PROFILER.stage("display"):
+            self._display_frame(frame)
+        self._shown_idx = frame_idx
+        if not self.slider.isSliderDown():
+            self.slider.setValue(frame_idx)
+
+    def _audio_position(self):
+        """오디오가 실제로 재생 중일 때만 오디오 위치(초)를 기준 시계로 씀"""
+        if not self.media_player.hasAudio() \
+                or self.media_player.playbackState() != QMediaPlayer.PlaybackState.PlayingState:
+            return None
+        return self.media_player.position() / 1000
+
+    def playback_stats(self) -> dict:
+        stats = self.scheduler.summary()
+        stats["frames_skipped"] = self.decoder.frames_skipped if self.decoder is not None else 0
+        stats["clock_resyncs"] = self.clock.resyncs
+        return stats
             
+    def _display_frame(self, frame):
+        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb_image.shape
+        self._frame_size = (w, h)
+        qt_image = QImage(rgb_image.data, w, h, ch * w, QImage.Format.Format_RGB888)
+        
+        # Draw bounce history on the QImage before displaying
+        painter = QPainter(qt_image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for bounce_x, bounce_y, result_type in self.bounce_history:
+            x_pixel = int(bounce_x * w)
+            y_pixel = int(bounce_y * h)
+            
+            color_map = {'Good': QColor(0, 255, 0), 'Out': QColor(255, 0, 0), 'Net': QColor(255, 255, 0)}
+            color = color_map.get(result_type, QColor("gray"))
+            painter.setBrush(color)
+            painter.setPen(color)
+            painter.drawEllipse(QPointF(x_pixel, y_pixel), 5, 5)
+        painter.end()
+
+        scaled_pixmap = QPixmap.fromImage(qt_image).scaled(
+            self.screen.size(), 
+            Qt.AspectRatioMode.KeepAspectRatio, 
+            Qt.TransformationMode.SmoothTransformation
+        )
+        self.screen.setPixmap(scaled_pixmap)
+
     def update_analysis_data(self, stats: dict):
         """Receives analysis results asynchronously and stores them."""
         self.bounce_history = stats.get('bounce_history', [])
+        count = stats.get('bounce_count', len(self.bounce_history))
+        if count == self._bounces_seen + 1 and self.bounce_history and stats.get('frame_idx') is not None:
+            # 이번 프레임에서 새로 생긴 바운스 (seek 으로 한꺼번에 늘어난 것은 캐시에서 이미 인덱스에 있음)
+            x, y, result = self.bounce_history[-1]
+            self.bounce_index.add(stats['frame_idx'], x, y, result, stats.get('ball_pos_court'))
+        self._bounces_seen = count
+
+    def set_bounce_index(self, index: BounceIndex):
+        """이미 분석된 바운스 (ResultsCache.bounce_index())로 시작"""
+        self.bounce_index = index
+        self._bounces_seen = 0
+
+    def set_rally_index(self, index: RallyIndex | None):
+        """저장된 랠리 구간 (app.rallies.rally_index_for()). None 이면 랠리 이동 버튼을 끔"""
+        self.rally_index = index if index is not None else RallyIndex()
+        self.enable_controls(self.slider.isEnabled())
+
+    def _current_frame(self) -> int:
+        return self._shown_idx
+
+    def next_rally(self):
+        if not self.cap:
+            return
+        target = self.rally_index.next_start(self._current_frame())
+        if target is not None:
+            self.seek_to_frame(target)
+
+    def prev_rally(self):
+        if not self.cap:
+            return
+        # 랠리 시작 후 1초 안에 누르면 같은 랠리 처음이 아니라 앞 랠리로
+        target = self.rally_index.prev_start(self._current_frame(), slack=int(self.fps))
+        if target is not None:
+            self.seek_to_frame(target)
+
+    def _frame_ratio_at(self, pos):
+        """위젯 좌표 → 표시 중인 프레임 위의 비율 좌표 (영상 밖이면 None). 화면 라벨은 비율 유지로 가운데 정렬됨."""
+        if self._frame_size is None:
+            return None
+        fw, fh = self._frame_size
+        label = self.screen.geometry()
+        scale = min(label.width() / fw, label.height() / fh)
+        left = label.x() + (label.width() - fw * scale) / 2
+        top = label.y() + (label.height() - fh * scale) / 2
+        x = (pos.x() - left) / (fw * scale)
+        y = (pos.y() - top) / (fh * scale)
+        if not (0 <= x <= 1 and 0 <= y <= 1):
+            return None
+        return x, y, fw * scale
+
+    def mousePressEvent(self, event):
+        # 영상 위 바운스 마커를 클릭하면 그 프레임으로 이동
+        hit = self._frame_ratio_at(event.position()) if self.cap else None
+        if hit is not None and len(self.bounce_index):
+            x, y, shown_width = hit
+            fw, fh = self._frame_size
+            row = self.bounce_index.nearest(x, y, HIT_RADIUS_PX / shown_width, aspect=fw / fh)
+            if row is not None:
+                self.seek_to_frame(self.bounce_index.row(row)["frame"])
+                return
+        super().mousePressEvent(event)
+
+    def seek_to_frame(self, frame_idx: int):
+        if not self.cap:
+            return
+        frame_idx = max(0, min(int(frame_idx), self.total_frames))
+        self.slider.setValue(frame_idx)
+        self._set_media_player_position(frame_idx)
 
     def toggle_play(self):
         if self.is_playing:
@@ -170,36 +447,41 @@ class VideoWidget(QWidget):
     def play_video(self):
         if self.cap:
             self.is_playing = True
-            self.timer.start(int(1000 / self.fps))
+            self.scheduler.reset_stats()
+            self._rebase_clock = True
+            self.clock.start()
             self.btn_play.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPause))
             self.media_player.play()
+            self.play_timer.start(0)
 
     def pause_video(self):
+        was_playing = self.is_playing
         self.is_playing = False
         self.timer.stop()
+        self.play_timer.stop()
+        self.clock.pause()
         self.btn_play.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
         self.media_player.pause()
+        if was_playing and self.scheduler.frames_presented:
+            stats = self.playback_stats()
+            print(f"Playback: {stats['frames_presented']} presented, {stats['frames_dropped']} dropped, "
+                  f"{stats['frames_skipped']} skipped, {stats['frames_late']} late "
+                  f"(max {stats['max_late_ms']:.0f} ms)")
     
     def resume_video(self):
         if not self.is_playing:
             self.play_video()
 
     def _set_media_player_position(self, frame_idx):
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        self.decoder.seek(frame_idx)
         self.media_player.setPosition(int(frame_idx / self.fps * 1000))
-        self.next_frame()
-
-    def _sync_media_player_position(self):
-        if not self.slider.isSliderDown() and self.is_playing:
-            current_frame = int(self.media_player.position() / 1000 * self.fps)
-            self.slider.setValue(current_frame)
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
+        if self.is_playing:
+            self._rebase_clock = True # 재생 중이면 _tick 이 새 위치의 첫 프레임부터 이어서 보여줌
+        else:
+            self.next_frame()
 
     def seek_relative(self, seconds):
         if self.cap:
-            curr_frame = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-            target_frame = max(0, min(curr_frame + (seconds * self.fps), self.total_frames))
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
-            self.slider.setValue(int(target_frame))
-            self.media_player.setPosition(int(target_frame / self.fps * 1000))
-            self.next_frame()
+            target_frame = int(max(0, min(self._shown_idx + (seconds * self.fps), self.total_frames)))
+            self.slider.setValue(target_frame)
+            self._set_media_player_position(target_frame)